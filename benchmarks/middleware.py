@@ -0,0 +1,289 @@
+"""
+Time CorsMiddleware on its hot paths, in sync and async mode, and write the
+results to a JSON file, so they can be compared between releases.
+
+Each case is a combination of:
+
+* mode: sync or async middleware
+* request: a simple GET or a preflight OPTIONS request
+* origin: allowed, denied, or absent
+* config: an allowlist of 10, 1,000 or 50,000 origins, 1, 50 or 500 regexes
+  of exact origins, or 50 or 500 regexes that need the combined alternation
+* signal: with or without a check_request_enabled receiver
+
+Run with:
+
+    python benchmarks/middleware.py --output results.json
+
+Then, after a change, compare against the earlier results:
+
+    python benchmarks/middleware.py --compare results.json
+
+Times are the best of several repeats, including a trivial inner view, with
+the cost of copying the request subtracted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import platform
+import sys
+import timeit
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+settings.configure(
+    ALLOWED_HOSTS=["*"],
+    ROOT_URLCONF=__name__,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+django.setup()
+
+from django.http import HttpRequest, HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from corsheaders.middleware import CorsMiddleware  # noqa: E402
+from corsheaders.signals import check_request_enabled  # noqa: E402
+
+urlpatterns: list[Any] = []
+
+ALLOWED = "https://allowed.example.com"
+DENIED = "https://denied.example.net"
+
+
+def origin_list(size: int) -> list[str]:
+    origins = [f"https://site{i}.example.com" for i in range(size - 1)]
+    # In the middle, so it's neither first nor last in any list.
+    origins.insert(size // 2, ALLOWED)
+    return origins
+
+
+def regex_list(size: int) -> list[str]:
+    # Exact origins, so these are compiled into dict lookups. The allowed
+    # origin matches the last regex.
+    return [rf"^https://app{i}\.example\.org$" for i in range(size - 1)] + [
+        r"^https://allowed\.example\.com$"
+    ]
+
+
+def combined_regex_list(size: int) -> list[str]:
+    # Alternations and ".*" runs can't be reduced to dict lookups, so these
+    # are matched with the combined alternation. The allowed origin matches
+    # the last regex, the worst case.
+    patterns = [
+        rf"^https://(www|api)\.app{i}\.example\.org$"
+        if i % 2
+        else rf"^https://.*\.app{i}\.example\.org$"
+        for i in range(size - 1)
+    ]
+    return patterns + [r"^https://(allowed|permitted)\.example\.com$"]
+
+
+CONFIGS: dict[str, dict[str, Any]] = {
+    "origins-10": {"CORS_ALLOWED_ORIGINS": origin_list(10)},
+    "origins-1k": {"CORS_ALLOWED_ORIGINS": origin_list(1_000)},
+    "origins-50k": {"CORS_ALLOWED_ORIGINS": origin_list(50_000)},
+    "regexes-1": {"CORS_ALLOWED_ORIGIN_REGEXES": regex_list(1)},
+    "regexes-50": {"CORS_ALLOWED_ORIGIN_REGEXES": regex_list(50)},
+    "regexes-500": {"CORS_ALLOWED_ORIGIN_REGEXES": regex_list(500)},
+    "combined-regexes-50": {"CORS_ALLOWED_ORIGIN_REGEXES": combined_regex_list(50)},
+    "combined-regexes-500": {"CORS_ALLOWED_ORIGIN_REGEXES": combined_regex_list(500)},
+}
+MODES = ("sync", "async")
+REQUESTS = ("simple", "preflight")
+ORIGINS = {"allowed": ALLOWED, "denied": DENIED, "absent": None}
+SIGNALS = ("none", "receiver")
+
+
+def make_request(kind: str, origin: str | None) -> HttpRequest:
+    headers = {}
+    if origin is not None:
+        headers["origin"] = origin
+    factory = RequestFactory()
+    if kind == "preflight":
+        headers["access-control-request-method"] = "GET"
+        request = factory.options("/", headers=headers)
+    else:
+        request = factory.get("/", headers=headers)
+    # Computed once here, so the copies share it.
+    request.headers  # noqa: B018
+    return request
+
+
+def deny(sender: object, request: HttpRequest, **kwargs: Any) -> bool:
+    return False
+
+
+@contextmanager
+def signal_receiver(signal: str) -> Iterator[None]:
+    if signal == "none":
+        yield
+        return
+    check_request_enabled.connect(deny)
+    try:
+        yield
+    finally:
+        check_request_enabled.disconnect(deny)
+
+
+def view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse()
+
+
+async def aview(request: HttpRequest) -> HttpResponse:
+    return HttpResponse()
+
+
+def copy_timer(request: HttpRequest) -> Callable[[int], float]:
+    def time(number: int) -> float:
+        return timeit.timeit(lambda: copy.copy(request), number=number)
+
+    return time
+
+
+def sync_timer(
+    middleware: CorsMiddleware, request: HttpRequest
+) -> Callable[[int], float]:
+    def time(number: int) -> float:
+        return timeit.timeit(lambda: middleware(copy.copy(request)), number=number)
+
+    return time
+
+
+def async_timer(
+    middleware: CorsMiddleware, request: HttpRequest
+) -> Callable[[int], float]:
+    async def run(number: int) -> float:
+        start = timeit.default_timer()
+        for _ in range(number):
+            await middleware(copy.copy(request))  # type: ignore [misc]
+        return timeit.default_timer() - start
+
+    def time(number: int) -> float:
+        return asyncio.run(run(number))
+
+    return time
+
+
+def best(time: Callable[[int], float], number: int, repeat: int) -> float:
+    return min(time(number) for _ in range(repeat)) / number
+
+
+def calibrate(time: Callable[[int], float]) -> int:
+    # Enough iterations for each repeat to take about 0.1 seconds.
+    number = 1
+    while True:
+        if time(number) >= 0.1:
+            return number
+        number *= 10
+
+
+def run_cases(filter_: str, repeat: int) -> list[dict[str, Any]]:
+    results = []
+    for config, mode in itertools.product(CONFIGS, MODES):
+        with override_settings(**CONFIGS[config]):
+            if mode == "sync":
+                middleware = CorsMiddleware(view)
+                timer = sync_timer
+            else:
+                middleware = CorsMiddleware(aview)
+                timer = async_timer
+
+            for request_kind, origin_name, signal in itertools.product(
+                REQUESTS, ORIGINS, SIGNALS
+            ):
+                name = "/".join((mode, request_kind, origin_name, config, signal))
+                if filter_ not in name:
+                    continue
+                request = make_request(request_kind, ORIGINS[origin_name])
+                with signal_receiver(signal):
+                    time = timer(middleware, request)
+                    number = calibrate(time)
+                    total = best(time, number, repeat)
+                baseline = best(copy_timer(request), number, repeat)
+                ns = max(total - baseline, 0.0) * 1e9
+                results.append(
+                    {
+                        "name": name,
+                        "mode": mode,
+                        "request": request_kind,
+                        "origin": origin_name,
+                        "config": config,
+                        "signal": signal,
+                        "ns_per_call": round(ns, 1),
+                        "number": number,
+                        "repeat": repeat,
+                    }
+                )
+                print(f"{name:<48}{ns:>10.0f}ns", flush=True)
+    return results
+
+
+def compare(results: list[dict[str, Any]], path: Path) -> None:
+    previous = {
+        result["name"]: result["ns_per_call"]
+        for result in json.loads(path.read_text())["results"]
+    }
+    print(f"\n{'case':<48}{'before':>10}{'after':>10}{'change':>9}")
+    for result in results:
+        before = previous.get(result["name"])
+        if not before:
+            continue
+        after = result["ns_per_call"]
+        print(
+            f"{result['name']:<48}{before:>8.0f}ns{after:>8.0f}ns"
+            + f"{(after - before) / before:>+9.0%}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Write the results to this JSON file."
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Compare to results from an earlier run."
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="Only run cases whose name contains this, e.g. 'async/preflight'.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.filter, args.repeat)
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.__version__,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
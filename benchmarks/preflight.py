@@ -0,0 +1,62 @@
+"""
+Compare answering a preflight request by building a new response with
+HttpResponse(), against cloning the policy's prebuilt PreflightResponse.
+
+Run with:
+
+    python benchmarks/preflight.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+settings.configure()
+django.setup()
+
+from django.http import HttpResponse  # noqa: E402
+
+from corsheaders.policy import CorsPolicy  # noqa: E402
+
+ORIGIN = "https://example.com"
+
+CASES = {
+    "echo": CorsPolicy(allowed_origins=[ORIGIN], allow_credentials=True),
+    "wildcard": CorsPolicy(allow_all_origins=True),
+}
+
+
+def main() -> None:
+    number = 100_000
+    print(f"{'case':<12}{'build':>10}{'clone':>10}{'speedup':>10}")
+    for name, policy in CASES.items():
+
+        def build(policy: CorsPolicy = policy) -> None:
+            response = HttpResponse(headers={"content-length": "0"})
+            if not policy.wildcard_origin:
+                response["Vary"] = "origin"
+            for header, value in policy.response_headers(
+                ORIGIN, options=True, private_network=False
+            ):
+                response[header] = value
+
+        def clone(policy: CorsPolicy = policy) -> None:
+            policy.preflight_response(ORIGIN, private_network=False)
+
+        slow = min(timeit.repeat(build, number=number, repeat=5))
+        fast = min(timeit.repeat(clone, number=number, repeat=5))
+        print(
+            f"{name:<12}{slow / number * 1e9:>8.0f}ns{fast / number * 1e9:>8.0f}ns"
+            + f"{slow / fast:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Time django-cors-headers' startup costs in fresh processes, as paid by
+management commands and serverless cold starts, and write the results to a
+JSON file, so they can be compared between releases.
+
+The measurements are:
+
+* setup: django.setup() with corsheaders installed, minus without it
+* import: importing corsheaders.middleware after django.setup()
+* first-request: creating CorsMiddleware and handling its first request,
+  including building the policy
+* next-request: handling a second request, for comparison
+
+Run with:
+
+    python benchmarks/startup.py --output startup.json
+
+Then, after a change, compare against the earlier results:
+
+    python benchmarks/startup.py --compare startup.json
+
+Times are the median of several runs, each in a new interpreter, with
+bytecode caching enabled even if PYTHONDONTWRITEBYTECODE is set, as in most
+deployments.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+
+ORIGIN = "https://example.com"
+
+
+def child(installed: bool) -> dict[str, float]:
+    # Runs in a fresh interpreter, started by main().
+    sys.path.insert(0, SRC)
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        ALLOWED_HOSTS=["*"],
+        INSTALLED_APPS=["corsheaders"] if installed else [],
+        ROOT_URLCONF=__name__,
+        CORS_ALLOWED_ORIGINS=[ORIGIN],
+    )
+    times = {}
+    start = perf_counter()
+    django.setup()
+    times["setup"] = perf_counter() - start
+    if not installed:
+        return times
+
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    start = perf_counter()
+    from corsheaders.middleware import CorsMiddleware
+
+    times["import"] = perf_counter() - start
+
+    factory = RequestFactory()
+    requests = [factory.get("/", headers={"origin": ORIGIN}) for _ in range(2)]
+    start = perf_counter()
+    middleware = CorsMiddleware(lambda request: HttpResponse())
+    middleware(requests[0])
+    times["first-request"] = perf_counter() - start
+    start = perf_counter()
+    middleware(requests[1])
+    times["next-request"] = perf_counter() - start
+    return times
+
+
+urlpatterns: list[Any] = []
+
+
+def run_child(installed: bool) -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", "installed" if installed else "bare"],
+        capture_output=True,
+        check=True,
+        env={
+            name: value
+            for name, value in os.environ.items()
+            if name != "PYTHONDONTWRITEBYTECODE"
+        },
+        text=True,
+    )
+    times: dict[str, float] = json.loads(result.stdout)
+    return times
+
+
+def run(repeat: int) -> list[dict[str, Any]]:
+    samples: dict[str, list[float]] = {}
+    # Once first, so writing the bytecode cache isn't counted.
+    run_child(installed=True)
+    for _ in range(repeat):
+        bare = run_child(installed=False)
+        installed = run_child(installed=True)
+        installed["setup"] -= bare["setup"]
+        for name, seconds in installed.items():
+            samples.setdefault(name, []).append(seconds)
+
+    results = []
+    for name, values in samples.items():
+        us = statistics.median(values) * 1e6
+        results.append({"name": name, "us": round(us, 1), "repeat": repeat})
+        print(f"{name:<16}{us:>10.0f}us", flush=True)
+    return results
+
+
+def compare(results: list[dict[str, Any]], path: Path) -> None:
+    previous = {
+        result["name"]: result["us"]
+        for result in json.loads(path.read_text())["results"]
+    }
+    print(f"\n{'measurement':<16}{'before':>10}{'after':>10}{'change':>9}")
+    for result in results:
+        before = previous.get(result["name"])
+        if not before:
+            continue
+        after = result["us"]
+        print(
+            f"{result['name']:<16}{before:>8.0f}us{after:>8.0f}us"
+            + f"{(after - before) / before:>+9.0%}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Write the results to this JSON file."
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Compare to results from an earlier run."
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--child", choices=["installed", "bare"], help=argparse.SUPPRESS
+    )
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        print(json.dumps(child(installed=args.child == "installed")))
+        return
+
+    import django
+
+    results = run(args.repeat)
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.__version__,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Measure the peak memory allocated while streaming responses of increasing
+size through django-cors-headers, to check it stays constant per stream
+rather than growing with the body.
+
+Each case streams 64KiB chunks through one of:
+
+* sync: CorsMiddleware with a StreamingHttpResponse over a generator
+* async: CorsMiddleware with a StreamingHttpResponse over an async generator
+* asgi: CorsASGIMiddleware around an app sending one message per chunk
+* wsgi: CorsWSGIMiddleware around an app returning a generator
+
+Run with:
+
+    python benchmarks/streaming.py --output streaming.json
+
+Peaks are measured with tracemalloc, so include the chunk being sent and
+the per-request objects, but not memory allocated before the stream began.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tracemalloc
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+settings.configure(
+    ALLOWED_HOSTS=["*"],
+    ROOT_URLCONF=__name__,
+    CORS_ALLOWED_ORIGINS=["https://example.com"],
+)
+django.setup()
+
+from django.http import HttpRequest, StreamingHttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from corsheaders.asgi import CorsASGIMiddleware, Message, Receive, Scope, Send  # noqa: E402
+from corsheaders.middleware import CorsMiddleware  # noqa: E402
+from corsheaders.wsgi import CorsWSGIMiddleware  # noqa: E402
+
+urlpatterns: list[Any] = []
+
+ORIGIN = "https://example.com"
+CHUNK_SIZE = 64 * 1024
+SIZES_MB = (1, 16, 256)
+
+
+def chunks(count: int) -> Iterator[bytes]:
+    for _ in range(count):
+        # A new object each time, so anything holding on to chunks shows up.
+        yield b"x" * CHUNK_SIZE
+
+
+async def achunks(count: int) -> AsyncIterator[bytes]:
+    for chunk in chunks(count):
+        yield chunk
+
+
+def request() -> HttpRequest:
+    return RequestFactory().get("/", headers={"origin": ORIGIN})
+
+
+def stream_sync(count: int) -> None:
+    def view(request: HttpRequest) -> StreamingHttpResponse:
+        return StreamingHttpResponse(chunks(count))
+
+    response = CorsMiddleware(view)(request())
+    assert isinstance(response, StreamingHttpResponse)
+    for _ in response:
+        pass
+
+
+def stream_async(count: int) -> None:
+    async def view(request: HttpRequest) -> StreamingHttpResponse:
+        return StreamingHttpResponse(achunks(count))
+
+    async def run() -> None:
+        response = await CorsMiddleware(view)(request())  # type: ignore [misc]
+        async for _ in response:
+            pass
+
+    asyncio.run(run())
+
+
+def stream_asgi(count: int) -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in chunks(count):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"origin", ORIGIN.encode())],
+    }
+    asyncio.run(CorsASGIMiddleware(app)(scope, receive, send))
+
+
+def stream_wsgi(count: int) -> None:
+    def app(environ: dict[str, Any], start_response: Any) -> Iterable[bytes]:
+        start_response("200 OK", [])
+        return chunks(count)
+
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/",
+        "HTTP_ORIGIN": ORIGIN,
+    }
+
+    def start_response(status: str, headers: Any, exc_info: Any = None) -> Any:
+        return None
+
+    for _ in CorsWSGIMiddleware(app)(environ, start_response):
+        pass
+
+
+CASES: dict[str, Callable[[int], None]] = {
+    "sync": stream_sync,
+    "async": stream_async,
+    "asgi": stream_asgi,
+    "wsgi": stream_wsgi,
+}
+
+
+def peak(stream: Callable[[int], None], size_mb: int) -> int:
+    count = size_mb * 1024 * 1024 // CHUNK_SIZE
+    tracemalloc.start()
+    try:
+        stream(count)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_cases(sizes: Iterable[int]) -> list[dict[str, Any]]:
+    results = []
+    for name, stream in CASES.items():
+        # Once first, so imports and caches aren't counted.
+        stream(1)
+        for size_mb in sizes:
+            kib = peak(stream, size_mb) / 1024
+            results.append({"name": f"{name}/{size_mb}MB", "peak_kib": round(kib, 1)})
+            print(f"{name + '/' + str(size_mb) + 'MB':<16}{kib:>10.0f}KiB", flush=True)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Write the results to this JSON file."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=SIZES_MB,
+        help="Response sizes to stream, in MiB.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.sizes)
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.__version__,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
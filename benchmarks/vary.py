@@ -0,0 +1,67 @@
+"""
+Compare patch_vary_origin() with Django's patch_vary_headers(), for responses
+with different existing Vary headers.
+
+Run with:
+
+    python benchmarks/vary.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+settings.configure()
+django.setup()
+
+from django.http import HttpResponse  # noqa: E402
+from django.utils.cache import patch_vary_headers  # noqa: E402
+
+from corsheaders.middleware import patch_vary_origin  # noqa: E402
+
+CASES = {
+    "none": None,
+    "one": "Cookie",
+    "several": "Accept-Encoding, Accept-Language, Cookie, Authorization",
+    "has-origin": "Accept-Encoding, Accept-Language, Origin, Cookie",
+}
+
+
+def main() -> None:
+    number = 100_000
+    print(f"{'case':<12}{'django':>10}{'fast':>10}{'speedup':>10}")
+    for name, vary in CASES.items():
+        response = HttpResponse()
+
+        def reset(vary: str | None = vary, response: HttpResponse = response) -> None:
+            if vary is None:
+                del response["Vary"]
+            else:
+                response["Vary"] = vary
+
+        def django_patch(response: HttpResponse = response) -> None:
+            reset()
+            patch_vary_headers(response, ("origin",))
+
+        def fast_patch(response: HttpResponse = response) -> None:
+            reset()
+            patch_vary_origin(response)
+
+        baseline = min(timeit.repeat(reset, number=number, repeat=5))
+        slow = min(timeit.repeat(django_patch, number=number, repeat=5)) - baseline
+        fast = min(timeit.repeat(fast_patch, number=number, repeat=5)) - baseline
+        print(
+            f"{name:<12}{slow / number * 1e9:>8.0f}ns{fast / number * 1e9:>8.0f}ns"
+            + f"{slow / fast:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from django.apps import AppConfig
-from django.core.checks import Tags, register
+from typing import Any
 
-from corsheaders.checks import check_settings
+from django.apps import AppConfig
+from django.core.checks import CheckMessage, Tags, register
 
 
 class CorsHeadersAppConfig(AppConfig):
@@ -12,3 +12,27 @@ class CorsHeadersAppConfig(AppConfig):
 
     def ready(self) -> None:
         register(Tags.security)(check_settings)
+        register(Tags.security)(check_regexes)
+        register(Tags.security, deploy=True)(check_regex_cost)
+
+
+# The checks module is only imported when checks run, since it pulls in most
+# of the package, which management commands and cold starts may not need.
+
+
+def check_settings(**kwargs: Any) -> list[CheckMessage]:
+    from corsheaders.checks import check_settings
+
+    return check_settings(**kwargs)
+
+
+def check_regexes(**kwargs: Any) -> list[CheckMessage]:
+    from corsheaders.checks import check_regexes
+
+    return check_regexes(**kwargs)
+
+
+def check_regex_cost(**kwargs: Any) -> list[CheckMessage]:
+    from corsheaders.checks import check_regex_cost
+
+    return check_regex_cost(**kwargs)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import Any
+
+from django.core.handlers.asgi import get_script_prefix
+
+from corsheaders.policy import HANDLED_KEY, add_headers, get_policy
+
+Scope = dict[str, Any]
+Message = Mapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+RawHeaders = list[tuple[bytes, bytes]]
+
+
+class CorsASGIMiddleware:
+    """
+    Apply the CORS policy around an ASGI application, answering preflight
+    requests directly from the scope so they never reach Django.
+
+    Requests whose outcome depends on check_request_enabled receivers are
+    passed through untouched, for CorsMiddleware to handle.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path_info = scope["path"]
+        script_name = get_script_prefix(scope)
+        if script_name:
+            path_info = path_info.removeprefix(script_name)
+        origin = request_method = request_headers = private_network = None
+        trace_requested = False
+        for name, value in scope.get("headers", ()):
+            if name == b"origin":
+                origin = _join(origin, value)
+            elif name == b"access-control-request-method":
+                request_method = _join(request_method, value)
+            elif name == b"access-control-request-headers":
+                request_headers = _join(request_headers, value)
+            elif name == b"access-control-request-private-network":
+                private_network = _join(private_network, value)
+            elif name == b"x-cors-trace":
+                trace_requested = True
+
+        decision = await get_policy().adecide(
+            path_info,
+            method=scope["method"],
+            origin=origin,
+            request_method=request_method,
+            request_headers=request_headers or "",
+            private_network=private_network == "true",
+            trace_requested=trace_requested,
+        )
+        if decision is None:
+            return await self.app(scope, receive, send)
+
+        if decision.preflight:
+            # ASGI requires lower case header names.
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in decision.headers
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return None
+
+        cors_headers = _encode(decision.headers)
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": add_raw_headers(
+                        message.get("headers", ()), cors_headers, vary=decision.vary
+                    ),
+                }
+            await send(message)
+
+        return await self.app({**scope, HANDLED_KEY: True}, receive, send_with_cors)
+
+
+def _join(current: str | None, value: bytes) -> str:
+    # Repeated headers are combined like Django does for request.headers.
+    decoded = value.decode("latin-1")
+    if current is None:
+        return decoded
+    return f"{current},{decoded}"
+
+
+def add_raw_headers(
+    headers: Iterable[tuple[bytes, bytes]],
+    cors_headers: RawHeaders,
+    *,
+    vary: bool = True,
+) -> RawHeaders:
+    """
+    Like add_headers(), for raw ASGI headers.
+    """
+    return _encode(
+        add_headers(
+            _decode(headers), _decode(cors_headers), vary=vary, vary_name="vary"
+        )
+    )
+
+
+def _encode(headers: Iterable[tuple[str, str]]) -> RawHeaders:
+    return [
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in headers
+    ]
+
+
+def _decode(headers: Iterable[tuple[bytes, bytes]]) -> list[tuple[str, str]]:
+    return [
+        (name.decode("latin-1"), value.decode("latin-1")) for name, value in headers
+    ]
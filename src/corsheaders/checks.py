@@ -1,137 +1,201 @@
 from __future__ import annotations
 
 import re
-from collections.abc import Sequence
+import sys
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from os import PathLike
+from re import Pattern
+from time import perf_counter
 from typing import Any
 from urllib.parse import urlsplit
 
 from django.conf import settings
-from django.core.checks import CheckMessage, Error
+from django.core.checks import CheckMessage, Error, Warning
+from django.utils.module_loading import import_string
 
 from corsheaders.conf import conf
+from corsheaders.origins import is_valid_wildcard
+from corsheaders.policy import PATH_POLICY_SETTINGS
+from corsheaders.sources import read_origins_file
+
+if sys.version_info >= (3, 11):
+    from re import _constants as sre_constants  # type: ignore [attr-defined]
+    from re import _parser as sre_parse  # type: ignore [attr-defined]
+else:
+    import sre_constants
+    import sre_parse
+
+# The longest a pattern may take to match a generated input in
+# check_regex_cost(), in seconds.
+REGEX_TIME_LIMIT = 0.01
 
 
 def check_settings(**kwargs: Any) -> list[CheckMessage]:
     errors: list[CheckMessage] = []
 
-    if not is_sequence(conf.CORS_ALLOW_HEADERS, str):
-        errors.append(
-            Error(
-                "CORS_ALLOW_HEADERS should be a sequence of strings.",
-                id="corsheaders.E001",
-            )
+    # Report the old names of renamed settings when those are the ones set.
+    aliases = {}
+    if not hasattr(settings, "CORS_ALLOW_ALL_ORIGINS"):
+        aliases["CORS_ALLOW_ALL_ORIGINS"] = "CORS_ORIGIN_ALLOW_ALL"
+    if not hasattr(settings, "CORS_ALLOWED_ORIGINS"):
+        aliases["CORS_ALLOWED_ORIGINS"] = "CORS_ORIGIN_WHITELIST"
+    if not hasattr(settings, "CORS_ALLOWED_ORIGIN_REGEXES"):
+        aliases["CORS_ALLOWED_ORIGIN_REGEXES"] = "CORS_ORIGIN_REGEX_WHITELIST"
+    errors.extend(
+        check_policy_values(
+            {name: getattr(conf, name) for name in PATH_POLICY_SETTINGS},
+            {name: aliases.get(name, name) for name in PATH_POLICY_SETTINGS},
         )
+    )
 
-    if not is_sequence(conf.CORS_ALLOW_METHODS, str):
+    if (
+        not isinstance(conf.CORS_ORIGIN_CACHE_SIZE, int)  # type: ignore [redundant-expr]
+        or conf.CORS_ORIGIN_CACHE_SIZE < 0
+    ):
         errors.append(
             Error(
-                "CORS_ALLOW_METHODS should be a sequence of strings.",
-                id="corsheaders.E002",
+                (
+                    "CORS_ORIGIN_CACHE_SIZE should be an integer greater than "
+                    + "or equal to zero."
+                ),
+                id="corsheaders.E017",
             )
         )
 
-    if not isinstance(conf.CORS_ALLOW_CREDENTIALS, bool):
-        errors.append(  # type: ignore [unreachable]
-            Error("CORS_ALLOW_CREDENTIALS should be a bool.", id="corsheaders.E003")
-        )
+    source = conf.CORS_ALLOWED_ORIGINS_SOURCE
+    if source is not None:
+        load: Any = source
+        if isinstance(source, str):
+            try:
+                load = import_string(source)
+            except ImportError:
+                load = None
+        if not callable(load):
+            errors.append(
+                Error(
+                    (
+                        "CORS_ALLOWED_ORIGINS_SOURCE should be a callable or "
+                        + "the dotted path to one."
+                    ),
+                    id="corsheaders.E018",
+                )
+            )
+        elif kwargs.get("databases"):
+            # Loading origins probably queries the database, so like Django's
+            # database checks, only do so when databases are specified.
+            errors.extend(check_origin_source(load))
 
-    if not isinstance(conf.CORS_ALLOW_PRIVATE_NETWORK, bool):
-        errors.append(  # type: ignore [unreachable]
-            Error(
-                "CORS_ALLOW_PRIVATE_NETWORK should be a bool.",
-                id="corsheaders.E015",
+    instrument = conf.CORS_INSTRUMENTATION
+    if instrument is not None:
+        if isinstance(instrument, str):
+            try:
+                instrument = import_string(instrument)
+            except ImportError:
+                instrument = None
+        if not callable(instrument):
+            errors.append(
+                Error(
+                    (
+                        "CORS_INSTRUMENTATION should be a callable or the "
+                        + "dotted path to one."
+                    ),
+                    id="corsheaders.E025",
+                )
             )
+
+    if not isinstance(conf.CORS_TRACE, bool):
+        errors.append(  # type: ignore [unreachable]
+            Error("CORS_TRACE should be a bool.", id="corsheaders.E026")
         )
 
-    if (
-        not isinstance(conf.CORS_PREFLIGHT_MAX_AGE, int)  # type: ignore [redundant-expr]
-        or conf.CORS_PREFLIGHT_MAX_AGE < 0
+    trace_secret = conf.CORS_TRACE_SECRET
+    if trace_secret is not None and (
+        not isinstance(trace_secret, str)  # type: ignore [redundant-expr]
+        or not trace_secret
     ):
         errors.append(
             Error(
-                (
-                    "CORS_PREFLIGHT_MAX_AGE should be an integer greater than "
-                    + "or equal to zero."
-                ),
-                id="corsheaders.E004",
+                "CORS_TRACE_SECRET should be None or a non-empty string.",
+                id="corsheaders.E027",
             )
         )
 
-    if not isinstance(conf.CORS_ALLOW_ALL_ORIGINS, bool):
-        if hasattr(settings, "CORS_ALLOW_ALL_ORIGINS"):  # type: ignore [unreachable]
-            allow_all_alias = "CORS_ALLOW_ALL_ORIGINS"
+    origins_file = conf.CORS_ALLOWED_ORIGINS_FILE
+    if origins_file is not None:
+        if not isinstance(origins_file, (str, PathLike)):
+            errors.append(  # type: ignore [unreachable]
+                Error(
+                    "CORS_ALLOWED_ORIGINS_FILE should be a path.",
+                    id="corsheaders.E020",
+                )
+            )
         else:
-            allow_all_alias = "CORS_ORIGIN_ALLOW_ALL"
+            try:
+                file_origins = read_origins_file(origins_file)
+            except (OSError, UnicodeDecodeError) as exc:
+                errors.append(
+                    Error(
+                        f"CORS_ALLOWED_ORIGINS_FILE could not be read: {exc}",
+                        id="corsheaders.E021",
+                    )
+                )
+            else:
+                errors.extend(check_origins(file_origins, "CORS_ALLOWED_ORIGINS_FILE"))
+
+    refresh = conf.CORS_ALLOWED_ORIGINS_SOURCE_REFRESH
+    if (
+        not isinstance(refresh, (int, float))  # type: ignore [redundant-expr]
+        or isinstance(refresh, bool)
+        or refresh < 0
+    ):
         errors.append(
             Error(
-                f"{allow_all_alias} should be a bool.",
-                id="corsheaders.E005",
+                (
+                    "CORS_ALLOWED_ORIGINS_SOURCE_REFRESH should be a number "
+                    + "greater than or equal to zero."
+                ),
+                id="corsheaders.E019",
             )
         )
 
-    if hasattr(settings, "CORS_ALLOWED_ORIGINS"):
-        allowed_origins_alias = "CORS_ALLOWED_ORIGINS"
-    else:
-        allowed_origins_alias = "CORS_ORIGIN_WHITELIST"
-
-    if not is_sequence(conf.CORS_ALLOWED_ORIGINS, str):
+    if not is_sequence(conf.CORS_PATH_POLICIES, tuple) or not all(
+        is_path_policy(entry) for entry in conf.CORS_PATH_POLICIES
+    ):
         errors.append(
             Error(
-                f"{allowed_origins_alias} should be a sequence of strings.",
-                id="corsheaders.E006",
+                (
+                    "CORS_PATH_POLICIES should be a sequence of (path, settings) "
+                    + "pairs."
+                ),
+                id="corsheaders.E022",
+                hint=(
+                    "Each path should be a prefix string or compiled regex, and "
+                    + "each settings value a dict or None."
+                ),
             )
         )
     else:
-        special_origin_values = (
-            # From 'security sensitive' contexts
-            "null",
-            # From files on Chrome on Android
-            # https://bugs.chromium.org/p/chromium/issues/detail?id=991107
-            "file://",
-        )
-        for origin in conf.CORS_ALLOWED_ORIGINS:
-            if origin in special_origin_values:
-                continue
-            parsed = urlsplit(origin)
-            if parsed.scheme == "" or parsed.netloc == "":
+        for path, overrides in conf.CORS_PATH_POLICIES:
+            for name in sorted(set(overrides or ()) - PATH_POLICY_SETTINGS):
                 errors.append(
                     Error(
-                        f"Origin {repr(origin)} in {allowed_origins_alias} is missing scheme or netloc",
-                        id="corsheaders.E013",
-                        hint=(
-                            "Add a scheme (e.g. https://) or netloc (e.g. "
-                            + "example.com)."
-                        ),
+                        f"Setting {name!r} for path {path!r} in CORS_PATH_POLICIES can't be overridden per path.",
+                        id="corsheaders.E023",
                     )
                 )
-            else:
-                # Only do this check in this case because if the scheme is not
-                # provided, netloc ends up in path
-                for part in ("path", "query", "fragment"):
-                    if getattr(parsed, part) != "":
-                        errors.append(
-                            Error(
-                                f"Origin {repr(origin)} in {allowed_origins_alias} should not have {part}",
-                                id="corsheaders.E014",
-                            )
-                        )
-
-    if hasattr(settings, "CORS_ALLOWED_ORIGIN_REGEXES"):
-        allowed_regexes_alias = "CORS_ALLOWED_ORIGIN_REGEXES"
-    else:
-        allowed_regexes_alias = "CORS_ORIGIN_REGEX_WHITELIST"
-    if not is_sequence(conf.CORS_ALLOWED_ORIGIN_REGEXES, (str, re.Pattern)):
-        errors.append(
-            Error(
-                f"{allowed_regexes_alias} should be a sequence of strings and/or compiled regexes.",
-                id="corsheaders.E007",
+            errors.extend(
+                check_policy_values(
+                    {
+                        name: value
+                        for name, value in (overrides or {}).items()
+                        if name in PATH_POLICY_SETTINGS
+                    },
+                    {
+                        name: f"{name} for path {path!r} in CORS_PATH_POLICIES"
+                        for name in PATH_POLICY_SETTINGS
+                    },
+                )
             )
-        )
-
-    if not is_sequence(conf.CORS_EXPOSE_HEADERS, str):
-        errors.append(
-            Error("CORS_EXPOSE_HEADERS should be a sequence.", id="corsheaders.E008")
-        )
 
     if not isinstance(conf.CORS_URLS_REGEX, (str, re.Pattern)):
         errors.append(  # type: ignore [unreachable]
@@ -163,6 +227,443 @@ def check_settings(**kwargs: Any) -> list[CheckMessage]:
     return errors
 
 
+def check_policy_values(
+    values: Mapping[str, Any], labels: Mapping[str, str]
+) -> list[CheckMessage]:
+    """
+    Check the values of the settings that CORS_PATH_POLICIES and
+    cors_policy() can override, skipping any not in ``values``. ``labels``
+    gives the name to report each setting under.
+    """
+    errors: list[CheckMessage] = []
+
+    def check(name: str, valid: Callable[[Any], bool], message: str, id: str) -> None:
+        if name in values and not valid(values[name]):
+            errors.append(Error(f"{labels[name]} {message}", id=id))
+
+    check(
+        "CORS_ALLOW_HEADERS",
+        lambda value: is_sequence(value, str),
+        "should be a sequence of strings.",
+        "corsheaders.E001",
+    )
+    check(
+        "CORS_ALLOW_METHODS",
+        lambda value: is_sequence(value, str),
+        "should be a sequence of strings.",
+        "corsheaders.E002",
+    )
+    check(
+        "CORS_ALLOW_CREDENTIALS",
+        lambda value: isinstance(value, bool),
+        "should be a bool.",
+        "corsheaders.E003",
+    )
+    check(
+        "CORS_ALLOW_PRIVATE_NETWORK",
+        lambda value: isinstance(value, bool),
+        "should be a bool.",
+        "corsheaders.E015",
+    )
+    check(
+        "CORS_PREFLIGHT_MAX_AGE",
+        lambda value: isinstance(value, int) and value >= 0,
+        "should be an integer greater than or equal to zero.",
+        "corsheaders.E004",
+    )
+    check(
+        "CORS_PREFLIGHT_STRICT",
+        lambda value: isinstance(value, bool),
+        "should be a bool.",
+        "corsheaders.E024",
+    )
+    check(
+        "CORS_ALLOW_ALL_ORIGINS",
+        lambda value: isinstance(value, bool),
+        "should be a bool.",
+        "corsheaders.E005",
+    )
+    check(
+        "CORS_ALLOWED_ORIGINS",
+        lambda value: is_sequence(value, str),
+        "should be a sequence of strings.",
+        "corsheaders.E006",
+    )
+    origins: Any = values.get("CORS_ALLOWED_ORIGINS")
+    if is_sequence(origins, str):
+        errors.extend(check_origins(origins, labels["CORS_ALLOWED_ORIGINS"]))
+    check(
+        "CORS_ALLOWED_ORIGIN_REGEXES",
+        lambda value: is_sequence(value, (str, re.Pattern)),
+        "should be a sequence of strings and/or compiled regexes.",
+        "corsheaders.E007",
+    )
+    check(
+        "CORS_EXPOSE_HEADERS",
+        lambda value: is_sequence(value, str),
+        "should be a sequence.",
+        "corsheaders.E008",
+    )
+    return errors
+
+
+def check_origins(origins: Iterable[str], name: str) -> list[CheckMessage]:
+    errors: list[CheckMessage] = []
+    special_origin_values = (
+        # From 'security sensitive' contexts
+        "null",
+        # From files on Chrome on Android
+        # https://bugs.chromium.org/p/chromium/issues/detail?id=991107
+        "file://",
+    )
+    for origin in origins:
+        if origin in special_origin_values:
+            continue
+        parsed = urlsplit(origin)
+        if parsed.scheme == "" or parsed.netloc == "":
+            errors.append(
+                Error(
+                    f"Origin {repr(origin)} in {name} is missing scheme or netloc",
+                    id="corsheaders.E013",
+                    hint=(
+                        "Add a scheme (e.g. https://) or netloc (e.g. "
+                        + "example.com)."
+                    ),
+                )
+            )
+        else:
+            if "*" in parsed.netloc and not is_valid_wildcard(parsed.netloc):
+                errors.append(
+                    Error(
+                        f"Origin {repr(origin)} in {name} has an invalid wildcard",
+                        id="corsheaders.E016",
+                        hint=(
+                            "Wildcards are only supported as the whole "
+                            + "first label of the hostname, followed by at "
+                            + "least two labels, e.g. https://*.example.com."
+                        ),
+                    )
+                )
+            # Only do this check in this case because if the scheme is not
+            # provided, netloc ends up in path
+            for part in ("path", "query", "fragment"):
+                if getattr(parsed, part) != "":
+                    errors.append(
+                        Error(
+                            f"Origin {repr(origin)} in {name} should not have {part}",
+                            id="corsheaders.E014",
+                        )
+                    )
+    return errors
+
+
+def check_origin_source(load: Callable[[], Iterable[Any]]) -> list[CheckMessage]:
+    # Reported as warnings, so that bad data doesn't block migrate. Invalid
+    # rows are ignored by the middleware.
+    name = "CORS_ALLOWED_ORIGINS_SOURCE"
+    try:
+        origins = list(load())
+    except Exception as exc:
+        return [
+            Warning(
+                f"{name} could not be loaded: {exc!r}",
+                id="corsheaders.W002",
+            )
+        ]
+
+    warnings: list[CheckMessage] = []
+    for origin in origins:
+        if not isinstance(origin, str):
+            warnings.append(
+                Warning(
+                    f"Origin {repr(origin)} in {name} should be a string",
+                    id="corsheaders.W001",
+                )
+            )
+            continue
+        warnings.extend(
+            Warning(error.msg, hint=error.hint, id="corsheaders.W001")
+            for error in check_origins([origin], name)
+        )
+    return warnings
+
+
+def check_regexes(**kwargs: Any) -> list[CheckMessage]:
+    """
+    Check that the configured regexes compile, and look for patterns that are
+    slow or too permissive.
+    """
+    errors: list[CheckMessage] = []
+    for name, pattern, is_origin in configured_regexes():
+        try:
+            compiled = re.compile(pattern)
+        except re.error as exc:
+            errors.append(
+                Error(
+                    f"{name} pattern {_pattern_text(pattern)!r} is invalid: {exc}.",
+                    id="corsheaders.E028",
+                )
+            )
+            continue
+        parsed = sre_parse.parse(compiled.pattern, compiled.flags)
+        if has_nested_quantifier(parsed):
+            errors.append(
+                Warning(
+                    (
+                        f"{name} pattern {compiled.pattern!r} has nested "
+                        + "quantifiers, which can take exponential time to "
+                        + "match some inputs."
+                    ),
+                    hint=(
+                        "Require a separator between repetitions, such as "
+                        + r"(\w+\.)* rather than (\w+\.?)*."
+                    ),
+                    id="corsheaders.W003",
+                )
+            )
+        if is_origin and not is_anchored_at_end(parsed):
+            errors.append(
+                Warning(
+                    (
+                        f"{name} pattern {compiled.pattern!r} isn't anchored "
+                        + "at the end, so it also allows origins that only "
+                        + "start with a match, such as "
+                        + "https://example.com.evil.com."
+                    ),
+                    hint="End the pattern with $.",
+                    id="corsheaders.W004",
+                )
+            )
+    return errors
+
+
+def check_regex_cost(**kwargs: Any) -> list[CheckMessage]:
+    """
+    Time each configured regex against generated inputs designed to cause
+    excessive backtracking. Registered as a deployment check, since it can
+    take a moment.
+    """
+    errors: list[CheckMessage] = []
+    for name, pattern, _ in configured_regexes():
+        try:
+            compiled = re.compile(pattern)
+        except re.error:
+            # Reported by check_regexes().
+            continue
+        worst = worst_match_time(compiled, REGEX_TIME_LIMIT)
+        if worst > REGEX_TIME_LIMIT:
+            errors.append(
+                Warning(
+                    (
+                        f"{name} pattern {compiled.pattern!r} took "
+                        + f"{worst * 1000:.0f}ms to match a generated input, "
+                        + "so crafted requests could stall workers."
+                    ),
+                    hint="Simplify the pattern to avoid backtracking.",
+                    id="corsheaders.W005",
+                )
+            )
+    return errors
+
+
+def configured_regexes() -> list[tuple[str, str | Pattern[str], bool]]:
+    """
+    Return each regex in the settings, as (setting name, pattern, whether it
+    matches origins), skipping any with the wrong type, since
+    check_settings() reports those.
+    """
+    regexes: list[tuple[str, str | Pattern[str], bool]] = []
+
+    def add(name: str, patterns: object, is_origin: bool) -> None:
+        if is_sequence(patterns, (str, re.Pattern)):
+            assert isinstance(patterns, Sequence)
+            regexes.extend((name, pattern, is_origin) for pattern in patterns)
+
+    add("CORS_ALLOWED_ORIGIN_REGEXES", conf.CORS_ALLOWED_ORIGIN_REGEXES, True)
+    add("CORS_URLS_REGEX", [conf.CORS_URLS_REGEX], False)
+    path_policies = conf.CORS_PATH_POLICIES
+    if is_sequence(path_policies, tuple):
+        for index, entry in enumerate(path_policies):
+            if not is_path_policy(entry):
+                continue
+            name = f"CORS_PATH_POLICIES[{index}]"
+            if isinstance(entry[0], re.Pattern):
+                add(name, [entry[0]], False)
+            if entry[1] is not None:
+                add(
+                    f"{name} CORS_ALLOWED_ORIGIN_REGEXES",
+                    entry[1].get("CORS_ALLOWED_ORIGIN_REGEXES", ()),
+                    True,
+                )
+    return regexes
+
+
+def _pattern_text(pattern: str | Pattern[str]) -> str:
+    return pattern if isinstance(pattern, str) else pattern.pattern
+
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+
+def has_nested_quantifier(parsed: Any) -> bool:
+    """
+    Whether a parsed pattern repeats a group which can itself match a
+    variable number of repetitions, with nothing else required, like
+    ``(a+)+``. Such patterns can match the same input in exponentially many
+    ways, all of which the regex engine tries before failing.
+    Possessive quantifiers and atomic groups never backtrack, so are skipped.
+    """
+    for op, av in parsed:
+        if op in _REPEATS:
+            _, max_, item = av
+            if max_ > 1 and _repeats_ambiguously(item):
+                return True
+            if has_nested_quantifier(item):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if has_nested_quantifier(av[-1]):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(has_nested_quantifier(branch) for branch in av[1]):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if has_nested_quantifier(av[1]):
+                return True
+    return False
+
+
+def _repeats_ambiguously(parsed: Any) -> bool:
+    items = list(parsed)
+    while len(items) == 1 and items[0][0] is sre_constants.SUBPATTERN:
+        parsed = items[0][1][-1]
+        items = list(parsed)
+    if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+        return any(_repeats_ambiguously(branch) for branch in items[0][1][1])
+    for index, (op, av) in enumerate(items):
+        if op in _REPEATS and av[0] != av[1]:
+            others = sre_parse.SubPattern(
+                parsed.state, items[:index] + items[index + 1 :]
+            )
+            if others.getwidth()[0] == 0:
+                return True
+    return False
+
+
+def is_anchored_at_end(parsed: Any) -> bool:
+    """
+    Whether a parsed pattern can only match up to the end of the string.
+    """
+    items = list(parsed)
+    if not items:
+        return False
+    op, av = items[-1]
+    if op is sre_constants.AT:
+        return av in (sre_constants.AT_END, sre_constants.AT_END_STRING)
+    if op is sre_constants.SUBPATTERN:
+        return is_anchored_at_end(av[-1])
+    if op is sre_constants.BRANCH:
+        return all(is_anchored_at_end(branch) for branch in av[1])
+    return False
+
+
+# Repetition counts for generated inputs. Small steps at first, to catch
+# exponential patterns before they take too long, then doubling, to catch
+# polynomial ones.
+_PUMP_COUNTS = (*range(2, 34, 2), 64, 128, 256, 512, 1024)
+
+
+def worst_match_time(pattern: Pattern[str], limit: float) -> float:
+    """
+    Return the longest time the pattern took to match the inputs from
+    adversarial_inputs(), stopping early once it exceeds ``limit``.
+    """
+    worst = 0.0
+    for value in adversarial_inputs(pattern):
+        start = perf_counter()
+        pattern.match(value)
+        worst = max(worst, perf_counter() - start)
+        if worst > limit:
+            break
+    return worst
+
+
+def adversarial_inputs(pattern: Pattern[str]) -> Iterator[str]:
+    """
+    Generate inputs that repeat a sample of each repeated part of the
+    pattern many times, then end with a character that probably fails to
+    match, forcing the engine to backtrack through every way of matching the
+    repetitions.
+    """
+    pumps: list[str] = []
+    _collect_pumps(sre_parse.parse(pattern.pattern, pattern.flags), pumps)
+    pumps = list(dict.fromkeys(pump for pump in pumps if pump)) or ["a"]
+    for count in _PUMP_COUNTS:
+        for pump in pumps:
+            if len(pump) * count > 4096:
+                continue
+            for prefix in ("", "https://"):
+                yield prefix + pump * count + "!"
+
+
+def _collect_pumps(parsed: Any, pumps: list[str]) -> None:
+    for op, av in parsed:
+        if op in _REPEATS:
+            pumps.append(_sample(av[2]))
+            _collect_pumps(av[2], pumps)
+        elif op is sre_constants.SUBPATTERN:
+            _collect_pumps(av[-1], pumps)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _collect_pumps(branch, pumps)
+
+
+_CATEGORY_SAMPLES = {
+    sre_constants.CATEGORY_DIGIT: "0",
+    sre_constants.CATEGORY_NOT_DIGIT: "a",
+    sre_constants.CATEGORY_WORD: "a",
+    sre_constants.CATEGORY_NOT_WORD: "-",
+    sre_constants.CATEGORY_SPACE: " ",
+    sre_constants.CATEGORY_NOT_SPACE: "a",
+}
+
+
+def _sample(parsed: Any) -> str:
+    # A short string that the parsed pattern probably matches.
+    parts = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            parts.append(chr(av))
+        elif op in (sre_constants.NOT_LITERAL, sre_constants.ANY):
+            parts.append("b" if av == ord("a") else "a")
+        elif op is sre_constants.CATEGORY:
+            parts.append(_CATEGORY_SAMPLES.get(av, "a"))
+        elif op is sre_constants.IN:
+            kind, value = av[0]
+            if kind is sre_constants.LITERAL:
+                parts.append(chr(value))
+            elif kind is sre_constants.RANGE:
+                parts.append(chr(value[0]))
+            elif kind is sre_constants.CATEGORY:
+                parts.append(_CATEGORY_SAMPLES.get(value, "a"))
+            else:
+                parts.append("a")
+        elif op in _REPEATS:
+            parts.append(_sample(av[2]) * max(av[0], 1))
+        elif op is sre_constants.SUBPATTERN:
+            parts.append(_sample(av[-1]))
+        elif op is sre_constants.BRANCH:
+            parts.append(_sample(av[1][0]))
+    return "".join(parts)
+
+
+def is_path_policy(entry: tuple[Any, ...]) -> bool:
+    return (
+        len(entry) == 2
+        and isinstance(entry[0], (str, re.Pattern))
+        and (entry[1] is None or isinstance(entry[1], Mapping))
+    )
+
+
 def is_sequence(thing: Any, type_or_types: type[Any] | tuple[type[Any], ...]) -> bool:
     return (
         isinstance(thing, Sequence)
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from os import PathLike
 from re import Pattern
-from typing import cast
+from typing import TYPE_CHECKING, Any, cast
 
 from django.conf import settings
 
 from corsheaders.defaults import default_headers, default_methods
 
+if TYPE_CHECKING:
+    from corsheaders.instrumentation import CorsEvent
+
 
 class Settings:
     """
@@ -34,6 +38,10 @@ class Settings:
     def CORS_PREFLIGHT_MAX_AGE(self) -> int:
         return getattr(settings, "CORS_PREFLIGHT_MAX_AGE", 86400)
 
+    @property
+    def CORS_PREFLIGHT_STRICT(self) -> bool:
+        return getattr(settings, "CORS_PREFLIGHT_STRICT", False)
+
     @property
     def CORS_ALLOW_ALL_ORIGINS(self) -> bool:
         return getattr(
@@ -51,6 +59,22 @@ class Settings:
         )
         return cast(list[str] | tuple[str], value)
 
+    @property
+    def CORS_ALLOWED_ORIGINS_FILE(self) -> str | PathLike[str] | None:
+        return getattr(settings, "CORS_ALLOWED_ORIGINS_FILE", None)
+
+    @property
+    def CORS_ALLOWED_ORIGINS_SOURCE(self) -> str | Callable[[], Iterable[str]] | None:
+        return getattr(settings, "CORS_ALLOWED_ORIGINS_SOURCE", None)
+
+    @property
+    def CORS_ALLOWED_ORIGINS_SOURCE_CACHE(self) -> str:
+        return getattr(settings, "CORS_ALLOWED_ORIGINS_SOURCE_CACHE", "default")
+
+    @property
+    def CORS_ALLOWED_ORIGINS_SOURCE_REFRESH(self) -> float:
+        return getattr(settings, "CORS_ALLOWED_ORIGINS_SOURCE_REFRESH", 5.0)
+
     @property
     def CORS_ALLOWED_ORIGIN_REGEXES(self) -> Sequence[str | Pattern[str]]:
         return getattr(
@@ -63,6 +87,28 @@ class Settings:
     def CORS_EXPOSE_HEADERS(self) -> Sequence[str]:
         return getattr(settings, "CORS_EXPOSE_HEADERS", ())
 
+    @property
+    def CORS_ORIGIN_CACHE_SIZE(self) -> int:
+        return getattr(settings, "CORS_ORIGIN_CACHE_SIZE", 0)
+
+    @property
+    def CORS_PATH_POLICIES(
+        self,
+    ) -> Sequence[tuple[str | Pattern[str], Mapping[str, Any] | None]]:
+        return getattr(settings, "CORS_PATH_POLICIES", ())
+
+    @property
+    def CORS_INSTRUMENTATION(self) -> str | Callable[[CorsEvent], object] | None:
+        return getattr(settings, "CORS_INSTRUMENTATION", None)
+
+    @property
+    def CORS_TRACE(self) -> bool:
+        return getattr(settings, "CORS_TRACE", False)
+
+    @property
+    def CORS_TRACE_SECRET(self) -> str | None:
+        return getattr(settings, "CORS_TRACE_SECRET", None)
+
     @property
     def CORS_URLS_REGEX(self) -> str | Pattern[str]:
         return getattr(settings, "CORS_URLS_REGEX", r"^.*$")
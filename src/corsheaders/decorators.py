@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from django.urls import Resolver404, URLResolver, get_resolver, get_urlconf
+
+from corsheaders.policy import PATH_POLICY_SETTINGS, CorsPolicy, get_policy
+
+ViewT = TypeVar("ViewT", bound=Callable[..., Any])
+
+VIEW_POLICY_ATTRIBUTE = "_cors_view_policy"
+
+# How many distinct paths resolve_view_policy() caches the view policy for.
+RESOLVED_PATHS_CACHE_SIZE = 1024
+
+
+class ViewPolicy:
+    """
+    The settings overridden for a view, compiled into a CorsPolicy on first
+    use and again only when the settings change.
+    """
+
+    __slots__ = ("overrides", "_compiled")
+
+    overrides: dict[str, Any]
+    _compiled: tuple[CorsPolicy, CorsPolicy] | None
+
+    def __init__(self, overrides: dict[str, Any]) -> None:
+        self.overrides = overrides
+        self._compiled = None
+
+    @property
+    def policy(self) -> CorsPolicy:
+        base = get_policy()
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not base:
+            compiled = (
+                base,
+                CorsPolicy.from_overrides(
+                    self.overrides, origin_sources=base.origin_sources
+                ),
+            )
+            self._compiled = compiled
+        return compiled[1]
+
+
+def cors_policy(**overrides: Any) -> Callable[[ViewT], ViewT]:
+    """
+    Apply a CORS policy to a view function or class, overriding settings for
+    it. Arguments are setting names in lower case without the ``CORS_``
+    prefix, such as ``allow_all_origins=True``.
+    """
+    settings_overrides = {}
+    for name, value in overrides.items():
+        setting = f"CORS_{name.upper()}"
+        if setting not in PATH_POLICY_SETTINGS:
+            raise TypeError(
+                f"cors_policy() got an unexpected keyword argument {name!r}"
+            )
+        settings_overrides[setting] = value
+    _check_overrides(settings_overrides)
+    view_policy = ViewPolicy(settings_overrides)
+
+    def decorator(view: ViewT) -> ViewT:
+        setattr(view, VIEW_POLICY_ATTRIBUTE, view_policy)
+        CorsPolicy.views_decorated = True
+        return view
+
+    return decorator
+
+
+# Errors about values, rather than their types.
+_VALUE_ERRORS = frozenset(
+    ("corsheaders.E004", "corsheaders.E013", "corsheaders.E014", "corsheaders.E016")
+)
+
+
+def _check_overrides(overrides: dict[str, Any]) -> None:
+    # Run the system checks for the settings here, since those only look at
+    # the settings module, and raise for the first error.
+    if not overrides:
+        return
+
+    # Imported here, as the checks module is otherwise only loaded when
+    # checks run.
+    from corsheaders.checks import check_policy_values
+
+    labels = {
+        name: f"cors_policy() argument {name[5:].lower()!r}"
+        for name in PATH_POLICY_SETTINGS
+    }
+    errors = check_policy_values(overrides, labels)
+    if errors:
+        error = errors[0]
+        raise (ValueError if error.id in _VALUE_ERRORS else TypeError)(error.msg)
+
+
+def get_view_policy(view: Callable[..., Any]) -> CorsPolicy | None:
+    """
+    Return the policy set with cors_policy() for a resolved view, also
+    checking the class for class-based views and DRF viewsets.
+    """
+    view_policy = _get_view_policy(view)
+    return None if view_policy is None else view_policy.policy
+
+
+def _get_view_policy(view: Callable[..., Any]) -> ViewPolicy | None:
+    view_policy: ViewPolicy | None = getattr(view, VIEW_POLICY_ATTRIBUTE, None)
+    if view_policy is None:
+        view_class = getattr(view, "view_class", None) or getattr(view, "cls", None)
+        view_policy = getattr(view_class, VIEW_POLICY_ATTRIBUTE, None)
+    return view_policy
+
+
+def resolve_view_policy(
+    path_info: str, urlconf: str | None = None
+) -> CorsPolicy | None:
+    """
+    Resolve a path to its view, and return the view's policy, if any.
+    """
+    if urlconf is None:
+        urlconf = get_urlconf()
+    view_policy = _resolve_view_policy(get_resolver(urlconf), path_info)
+    return None if view_policy is None else view_policy.policy
+
+
+# Keyed on the resolver rather than the URLconf name, so changing the URLconf,
+# which makes Django build new resolvers, doesn't serve stale entries. The
+# ViewPolicy is cached rather than its CorsPolicy, which follows the settings.
+@lru_cache(maxsize=RESOLVED_PATHS_CACHE_SIZE)
+def _resolve_view_policy(resolver: URLResolver, path_info: str) -> ViewPolicy | None:
+    try:
+        match = resolver.resolve(path_info)
+    except Resolver404:
+        return None
+    return _get_view_policy(match.func)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import NamedTuple
+
+
+class CorsEvent(NamedTuple):
+    """
+    What CorsMiddleware decided for a request, passed to the
+    CORS_INSTRUMENTATION callback.
+    """
+
+    # Whether the request was a preflight, rather than a simple request.
+    preflight: bool
+    # One of the OUTCOMES.
+    outcome: str
+    # Whether the origin was found in the CORS_ORIGIN_CACHE_SIZE cache, or
+    # None if the cache is disabled or wasn't consulted.
+    cache_hit: bool | None
+    # Seconds spent in the middleware, excluding the view.
+    duration: float
+
+
+OUTCOMES = (
+    # CORS is disabled for the URL.
+    "disabled",
+    # The request had no Origin header.
+    "no-origin",
+    # Allowed by CORS_ALLOW_ALL_ORIGINS.
+    "all",
+    # Allowed by CORS_ALLOWED_ORIGINS.
+    "allowlist",
+    # Allowed by CORS_ALLOWED_ORIGIN_REGEXES.
+    "regex",
+    # Allowed by CORS_ALLOWED_ORIGINS_FILE or CORS_ALLOWED_ORIGINS_SOURCE.
+    "source",
+    # Allowed by a check_request_enabled receiver.
+    "signal",
+    # Not allowed.
+    "denied",
+)
+
+Instrument = Callable[[CorsEvent], object]
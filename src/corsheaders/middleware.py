@@ -1,25 +1,49 @@
 from __future__ import annotations
 
-import re
 from collections.abc import Awaitable, Callable
-from urllib.parse import SplitResult, urlsplit
+from time import perf_counter
+from typing import TYPE_CHECKING
 
 from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpRequest, HttpResponse
 from django.http.response import HttpResponseBase
-from django.utils.cache import patch_vary_headers
 
-from corsheaders.conf import conf
+from corsheaders.policy import (
+    ACCESS_CONTROL_ALLOW_CREDENTIALS,
+    ACCESS_CONTROL_ALLOW_HEADERS,
+    ACCESS_CONTROL_ALLOW_METHODS,
+    ACCESS_CONTROL_ALLOW_ORIGIN,
+    ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK,
+    ACCESS_CONTROL_EXPOSE_HEADERS,
+    ACCESS_CONTROL_MAX_AGE,
+    ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK,
+    HANDLED_KEY,
+    CorsPolicy,
+    get_policy,
+    view_policies_used,
+)
+from corsheaders.responses import PreflightResponse
 from corsheaders.signals import check_request_enabled
 
-ACCESS_CONTROL_ALLOW_ORIGIN = "access-control-allow-origin"
-ACCESS_CONTROL_EXPOSE_HEADERS = "access-control-expose-headers"
-ACCESS_CONTROL_ALLOW_CREDENTIALS = "access-control-allow-credentials"
-ACCESS_CONTROL_ALLOW_HEADERS = "access-control-allow-headers"
-ACCESS_CONTROL_ALLOW_METHODS = "access-control-allow-methods"
-ACCESS_CONTROL_MAX_AGE = "access-control-max-age"
-ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK = "access-control-request-private-network"
-ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK = "access-control-allow-private-network"
+if TYPE_CHECKING:
+    from urllib.parse import SplitResult
+
+    from corsheaders.instrumentation import CorsEvent
+    from corsheaders.tracing import Trace
+
+# The header names used to be defined here.
+__all__ = [
+    "ACCESS_CONTROL_ALLOW_CREDENTIALS",
+    "ACCESS_CONTROL_ALLOW_HEADERS",
+    "ACCESS_CONTROL_ALLOW_METHODS",
+    "ACCESS_CONTROL_ALLOW_ORIGIN",
+    "ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK",
+    "ACCESS_CONTROL_EXPOSE_HEADERS",
+    "ACCESS_CONTROL_MAX_AGE",
+    "ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK",
+    "CorsMiddleware",
+    "patch_vary_origin",
+]
 
 
 class CorsMiddleware:
@@ -35,6 +59,7 @@ class CorsMiddleware:
     ) -> None:
         self.get_response = get_response
         self.async_mode = iscoroutinefunction(self.get_response)
+        get_policy()
 
         if self.async_mode:
             # Mark the class as async-capable, but do the actual switch
@@ -42,11 +67,22 @@ class CorsMiddleware:
             # inside __call__ to avoid swapping out dunder methods
             markcoroutinefunction(self)
 
+    @property
+    def policy(self) -> CorsPolicy:
+        return get_policy()
+
     def __call__(
         self, request: HttpRequest
     ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
         if self.async_mode:
             return self.__acall__(request)
+        if self._handled_upstream(request):
+            return self.get_response(request)
+        policy = self.policy
+        if policy.observed:
+            return self._observed_call(request)
+        if self._sources_needed(request):
+            policy.refresh_origins()
         response: HttpResponseBase | None = self.check_preflight(request)
         if response is None:
             result = self.get_response(request)
@@ -56,6 +92,17 @@ class CorsMiddleware:
         return response
 
     async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        if self._handled_upstream(request):
+            return await self.get_response(request)  # type: ignore [no-any-return, misc]
+        policy = self.policy
+        if policy.observed:
+            return await self._aobserved_call(request)
+        if self._sources_needed(request):
+            await policy.arefresh_origins()
+        if check_request_enabled.has_listeners() and self._signal_needed(request):
+            # Run receivers on the event loop now, so check_signal() only has to
+            # read the result.
+            await self.acheck_signal(request)
         response = self.check_preflight(request)
         if response is None:
             result = self.get_response(request)
@@ -64,6 +111,151 @@ class CorsMiddleware:
         self.add_response_headers(request, response)
         return response
 
+    # Copies of __call__() and __acall__() that time the middleware's work and
+    # report or trace it, kept separate so they cost nothing when not in use.
+    # The tracing and instrumentation modules are imported in them, and in
+    # cors_event(), for the same reason.
+
+    def _observed_call(self, request: HttpRequest) -> HttpResponseBase:
+        from corsheaders.tracing import start_trace, trace_signal
+
+        trace = start_trace(request, self.policy)
+        start = perf_counter()
+        request._cors_record_lookup = True  # type: ignore [attr-defined]
+        policy = self.policy_for(request) or self.policy
+        if self._sources_needed(request):
+            self.policy.refresh_origins()
+        if (
+            trace is not None
+            and check_request_enabled.has_listeners()
+            and self._signal_needed(request)
+        ):
+            request._cors_signal_result = trace_signal(request, trace)  # type: ignore [attr-defined]
+        response: HttpResponseBase | None = self.check_preflight(request)
+        duration = perf_counter() - start
+        if response is None:
+            result = self.get_response(request)
+            assert isinstance(result, HttpResponseBase)
+            response = result
+            start = perf_counter()
+            self.add_response_headers(request, response)
+            duration += perf_counter() - start
+        self._report(request, response, policy, duration, trace)
+        return response
+
+    async def _aobserved_call(self, request: HttpRequest) -> HttpResponseBase:
+        from corsheaders.tracing import atrace_signal, start_trace
+
+        trace = start_trace(request, self.policy)
+        start = perf_counter()
+        request._cors_record_lookup = True  # type: ignore [attr-defined]
+        policy = self.policy_for(request) or self.policy
+        if self._sources_needed(request):
+            await self.policy.arefresh_origins()
+        if check_request_enabled.has_listeners() and self._signal_needed(request):
+            if trace is not None:
+                request._cors_signal_result = await atrace_signal(request, trace)  # type: ignore [attr-defined]
+            else:
+                await self.acheck_signal(request)
+        response = self.check_preflight(request)
+        duration = perf_counter() - start
+        if response is None:
+            result = self.get_response(request)
+            assert not isinstance(result, HttpResponseBase)
+            response = await result
+            start = perf_counter()
+            self.add_response_headers(request, response)
+            duration += perf_counter() - start
+        self._report(request, response, policy, duration, trace)
+        return response
+
+    def _report(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        policy: CorsPolicy,
+        duration: float,
+        trace: Trace | None,
+    ) -> None:
+        instrument = self.policy.instrument
+        if instrument is None and trace is None:
+            return
+        event = self.cors_event(request, policy, duration)
+        if instrument is not None:
+            instrument(event)
+        if trace is not None:
+            from corsheaders.tracing import finish_trace
+
+            finish_trace(request, response, trace, event, policy, self.policy)
+
+    def cors_event(
+        self,
+        request: HttpRequest,
+        policy: CorsPolicy,
+        duration: float,
+    ) -> CorsEvent:
+        """
+        Describe the decision made for a request, for CORS_INSTRUMENTATION.
+        """
+        preflight = (
+            request.method == "OPTIONS"
+            and "access-control-request-method" in request.headers
+        )
+        # Recorded by the request's first origin lookup, if there was one.
+        cache_hit = getattr(request, "_cors_cache_hit", None)
+
+        origin = request.headers.get("origin")
+        enabled = getattr(request, "_cors_enabled", None)
+        if enabled is None:
+            enabled = self.is_enabled(request)
+        if not enabled:
+            outcome = "disabled"
+        elif not origin:
+            outcome = "no-origin"
+        else:
+            # Recorded by the request's first origin lookup. Policies that
+            # answer with a wildcard allow every origin without one.
+            outcome = getattr(request, "_cors_outcome", "all")
+            if outcome == "denied" and getattr(request, "_cors_signal_result", False):
+                outcome = "signal"
+        from corsheaders.instrumentation import CorsEvent
+
+        return CorsEvent(preflight, outcome, cache_hit, duration)
+
+    def _sources_needed(self, request: HttpRequest) -> bool:
+        # Refreshing origin sources may query the cache or database, so is only
+        # done for requests whose origin they may be asked about.
+        if not self.policy.origin_sources or "origin" not in request.headers:
+            return False
+        policy = self.policy_for(request)
+        return policy is not None and bool(policy.origin_sources)
+
+    def _handled_upstream(self, request: HttpRequest) -> bool:
+        # The ASGI scope, or for WSGI, the environ.
+        return bool(getattr(request, "scope", request.META).get(HANDLED_KEY))
+
+    def _signal_needed(self, request: HttpRequest) -> bool:
+        policy = self.policy_for(request)
+        if policy is None:
+            return True
+        origin = request.headers.get("origin")
+        if not origin:
+            return False
+        return self._match_origin(request, policy, origin) is False
+
+    def _match_origin(
+        self, request: HttpRequest, policy: CorsPolicy, origin: str
+    ) -> bool | None:
+        # When observed, the first lookup for the request records its outcome
+        # and whether the origin cache answered it, for cors_event().
+        if getattr(request, "_cors_record_lookup", False):
+            request._cors_record_lookup = False  # type: ignore [attr-defined]
+            allowed, cache_hit, outcome = policy.lookup_origin(origin)
+            request._cors_cache_hit = cache_hit  # type: ignore [attr-defined]
+            request._cors_outcome = outcome  # type: ignore [attr-defined]
+            return allowed
+        return policy.match_origin(origin)
+
     def check_preflight(self, request: HttpRequest) -> HttpResponseBase | None:
         """
         Generate a response for CORS preflight requests.
@@ -74,6 +266,25 @@ class CorsMiddleware:
             and request.method == "OPTIONS"
             and "access-control-request-method" in request.headers
         ):
+            policy = self.policy_for(request)
+            origin = request.headers.get("origin")
+            # Allowed origins get a clone of the policy's complete response, the
+            # rest take the general path through add_response_headers().
+            if policy is not None and (
+                policy.wildcard_origin
+                or (origin and self._match_origin(request, policy, origin))
+            ):
+                return policy.preflight_response(
+                    origin or "*",
+                    private_network=(
+                        request.headers.get("access-control-request-private-network")
+                        == "true"
+                    ),
+                    request_method=request.headers["access-control-request-method"],
+                    request_headers=request.headers.get(
+                        "access-control-request-headers", ""
+                    ),
+                )
             return HttpResponse(headers={"content-length": "0"})
         return None
 
@@ -83,6 +294,9 @@ class CorsMiddleware:
         """
         Add the respective CORS headers
         """
+        if isinstance(response, PreflightResponse):
+            # Built complete by check_preflight().
+            return response
         enabled = getattr(request, "_cors_enabled", None)
         if enabled is None:
             enabled = self.is_enabled(request)
@@ -90,76 +304,119 @@ class CorsMiddleware:
         if not enabled:
             return response
 
-        patch_vary_headers(response, ("origin",))
-
-        origin = request.headers.get("origin")
-        if not origin:
-            return response
-
-        try:
-            url = urlsplit(origin)
-        except ValueError:
-            return response
-
-        if (
-            not conf.CORS_ALLOW_ALL_ORIGINS
-            and not self.origin_found_in_white_lists(origin, url)
-            and not self.check_signal(request)
-        ):
-            return response
-
-        if conf.CORS_ALLOW_ALL_ORIGINS and not conf.CORS_ALLOW_CREDENTIALS:
-            response[ACCESS_CONTROL_ALLOW_ORIGIN] = "*"
+        policy = self.policy_for(request)
+        origin: str | None
+        if policy is not None and policy.wildcard_origin:
+            # The headers are the same for every request, with or without an
+            # origin, so caches needn't vary on it.
+            origin = "*"
         else:
-            response[ACCESS_CONTROL_ALLOW_ORIGIN] = origin
+            patch_vary_origin(response)
 
-        if conf.CORS_ALLOW_CREDENTIALS:
-            response[ACCESS_CONTROL_ALLOW_CREDENTIALS] = "true"
+            origin = request.headers.get("origin")
+            if not origin:
+                return response
 
-        if len(conf.CORS_EXPOSE_HEADERS):
-            response[ACCESS_CONTROL_EXPOSE_HEADERS] = ", ".join(
-                conf.CORS_EXPOSE_HEADERS
-            )
+            # Enabled by the signal if there's no policy for the path.
+            policy = policy or self.policy
+            allowed = self._match_origin(request, policy, origin)
+            if allowed is None:
+                return response
 
-        if request.method == "OPTIONS":
-            response[ACCESS_CONTROL_ALLOW_HEADERS] = ", ".join(conf.CORS_ALLOW_HEADERS)
-            response[ACCESS_CONTROL_ALLOW_METHODS] = ", ".join(conf.CORS_ALLOW_METHODS)
-            if conf.CORS_PREFLIGHT_MAX_AGE:
-                response[ACCESS_CONTROL_MAX_AGE] = str(conf.CORS_PREFLIGHT_MAX_AGE)
+            if not allowed and not self.check_signal(request):
+                return response
 
-        if (
-            conf.CORS_ALLOW_PRIVATE_NETWORK
-            and request.headers.get(ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK) == "true"
-        ):
-            response[ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK] = "true"
+        headers = policy.response_headers(
+            origin,
+            options=request.method == "OPTIONS",
+            private_network=(
+                policy.allow_private_network
+                and request.headers.get(ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK)
+                == "true"
+            ),
+            request_method=request.headers.get("access-control-request-method", ""),
+            request_headers=request.headers.get("access-control-request-headers", ""),
+        )
+        for name, value in headers:
+            response[name] = value
 
         return response
 
     def origin_found_in_white_lists(self, origin: str, url: SplitResult) -> bool:
-        return (
-            (origin == "null" and origin in conf.CORS_ALLOWED_ORIGINS)
-            or self._url_in_whitelist(url)
-            or self.regex_domain_match(origin)
-        )
+        return self.policy.origin_allowed(origin, url.scheme, url.netloc)
 
     def regex_domain_match(self, origin: str) -> bool:
-        return any(
-            re.match(domain_pattern, origin)
-            for domain_pattern in conf.CORS_ALLOWED_ORIGIN_REGEXES
-        )
+        return self.policy.allowed_origin_regexes.match(origin) is not None
 
     def is_enabled(self, request: HttpRequest) -> bool:
-        return bool(
-            re.match(conf.CORS_URLS_REGEX, request.path_info)
-        ) or self.check_signal(request)
+        return self.policy_for(request) is not None or self.check_signal(request)
+
+    def policy_for(self, request: HttpRequest) -> CorsPolicy | None:
+        """
+        Return the policy for the request's view or path, or None if CORS is
+        disabled for it.
+        """
+        try:
+            return request._cors_policy  # type: ignore [attr-defined, no-any-return]
+        except AttributeError:
+            policy = None
+            if view_policies_used():
+                policy = self.view_policy(request)
+            if policy is None:
+                policy = self.policy.for_path(request.path_info)
+            request._cors_policy = policy  # type: ignore [attr-defined]
+            return policy
+
+    def view_policy(self, request: HttpRequest) -> CorsPolicy | None:
+        """
+        Return the policy set for the request's view with cors_policy(), if
+        any. This is needed before Django resolves the URL, so the URL is
+        resolved here too, with the result cached per path.
+        """
+        # Imported here, as it's only needed once a view is decorated.
+        from corsheaders.decorators import resolve_view_policy
+
+        return resolve_view_policy(request.path_info, getattr(request, "urlconf", None))
 
     def check_signal(self, request: HttpRequest) -> bool:
-        signal_responses = check_request_enabled.send(sender=None, request=request)
-        return any(return_value for function, return_value in signal_responses)
+        # Receivers may be expensive, so only send the signal once per request.
+        result: bool | None = getattr(request, "_cors_signal_result", None)
+        if result is None:
+            signal_responses = check_request_enabled.send(sender=None, request=request)
+            result = any(return_value for function, return_value in signal_responses)
+            request._cors_signal_result = result  # type: ignore [attr-defined]
+        return result
+
+    async def acheck_signal(self, request: HttpRequest) -> bool:
+        result: bool | None = getattr(request, "_cors_signal_result", None)
+        if result is None:
+            signal_responses = await check_request_enabled.asend(
+                sender=None, request=request
+            )
+            result = any(return_value for function, return_value in signal_responses)
+            request._cors_signal_result = result  # type: ignore [attr-defined]
+        return result
 
     def _url_in_whitelist(self, url: SplitResult) -> bool:
-        origins = [urlsplit(o) for o in conf.CORS_ALLOWED_ORIGINS]
-        return any(
-            origin.scheme == url.scheme and origin.netloc == url.netloc
-            for origin in origins
-        )
+        return self.policy.url_allowed(url.scheme, url.netloc)
+
+
+def patch_vary_origin(response: HttpResponseBase) -> None:
+    """
+    Add "origin" to the response's Vary header, like Django's
+    patch_vary_headers(), but without splitting and rebuilding the header in
+    the common cases.
+    """
+    vary = response.get("Vary")
+    if not vary:
+        response["Vary"] = "origin"
+        return
+    lowered = vary.lower()
+    if "origin" in lowered or "*" in lowered:
+        tokens = {token.strip() for token in lowered.split(",")}
+        if "origin" in tokens:
+            return
+        if "*" in tokens:
+            response["Vary"] = "*"
+            return
+    response["Vary"] = f"{vary}, origin"
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from re import Pattern
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from corsheaders.regexes import LabelEntry
+
+# Browsers omit the port from the Origin header when it's the default for the
+# scheme, so strip it from both sides when comparing.
+_DEFAULT_PORT_SUFFIXES = {"http": ":80", "https": ":443"}
+
+
+def origin_key(scheme: str, netloc: str) -> tuple[str, str]:
+    """
+    Normalize a split origin into a hashable key.
+    """
+    suffix = _DEFAULT_PORT_SUFFIXES.get(scheme)
+    if suffix is not None and netloc.endswith(suffix):
+        netloc = netloc[: -len(suffix)]
+    return (scheme, netloc)
+
+
+# Origins in the strict form scheme "://" host [":" port]. For these,
+# urlsplit() would return the same scheme and netloc, so it can be skipped.
+_STRICT_ORIGIN_RE = re.compile(
+    r"([a-z][a-z0-9+.-]*)://([A-Za-z0-9_.-]+(?::[0-9]*)?)", re.ASCII
+)
+
+
+def parse_origin(origin: str) -> tuple[str, str] | None:
+    """
+    Split an Origin header into its scheme and netloc, as ``urlsplit()``
+    would, or return None if ``urlsplit()`` would raise ValueError.
+    """
+    match = _STRICT_ORIGIN_RE.fullmatch(origin)
+    if match is not None:
+        return match.groups()  # type: ignore [return-value]
+    try:
+        url = urlsplit(origin)
+    except ValueError:
+        return None
+    return (url.scheme, url.netloc)
+
+
+class OriginRegexes:
+    r"""
+    Match origins against a sequence of regexes.
+
+    Patterns that reduce to an exact origin, like ``^https://example\.com$``,
+    or to one subdomain label before a fixed suffix, like
+    ``^https://\w+\.example\.com$``, are compiled into dict lookups. The rest
+    are combined into one alternation per set of flags so a single ``match()``
+    call checks them all. Patterns that can't be combined safely are matched
+    individually.
+    """
+
+    __slots__ = ("patterns", "_exact", "_labels", "_combined", "_separate")
+
+    patterns: tuple[Pattern[str], ...]
+    _exact: dict[str, int]
+    _labels: dict[str, dict[str, list[LabelEntry]]]
+    _combined: tuple[Pattern[str], ...]
+    _separate: tuple[tuple[int, Pattern[str]], ...]
+
+    def __init__(self, patterns: Iterable[str | Pattern[str]]) -> None:
+        self.patterns = tuple(re.compile(pattern) for pattern in patterns)
+        self._exact, self._labels, self._combined, self._separate = {}, {}, (), ()
+        if self.patterns:
+            # Imported here, as most projects don't use origin regexes.
+            from corsheaders.regexes import compile_lookups
+
+            lookups = compile_lookups(self.patterns)
+            self._exact, self._labels, self._combined, self._separate = lookups
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def match(self, origin: str) -> int | None:
+        """
+        Return the index of a pattern matching the origin, or None.
+        """
+        index = self._exact.get(origin)
+        if index is not None:
+            return index
+        if self._labels:
+            index = self._match_label(origin)
+            if index is not None:
+                return index
+        for combined in self._combined:
+            match = combined.match(origin)
+            if match is not None:
+                return int(match.lastgroup[1:])  # type: ignore [index]
+        for index, pattern in self._separate:
+            if pattern.match(origin):
+                return index
+        return None
+
+    def _match_label(self, origin: str) -> int | None:
+        # "$" also matches before a trailing newline.
+        body = origin[:-1] if origin.endswith("\n") else origin
+        for prefix, suffixes in self._labels.items():
+            if not body.startswith(prefix):
+                continue
+            start = len(prefix)
+            # Labels can't contain dots, so the suffix starts at the next one.
+            dot = body.find(".", start)
+            if dot == -1:
+                continue
+            entries = suffixes.get(body[dot:])
+            if entries is None:
+                continue
+            label = body[start:dot]
+            for index, check, min_length, max_length, newline in entries:
+                if (
+                    (newline or body is origin)
+                    and min_length <= len(label) <= max_length
+                    and check(label)
+                ):
+                    return index
+        return None
+
+
+def is_wildcard_origin(netloc: str) -> bool:
+    return netloc.startswith("*.")
+
+
+def is_valid_wildcard(netloc: str) -> bool:
+    suffix = netloc[2:]
+    host = suffix.partition(":")[0]
+    # At least two labels must follow the wildcard, so it can't match every
+    # domain under a top-level domain, such as with "*.com".
+    return (
+        netloc.startswith("*.")
+        and "*" not in suffix
+        and "." in host
+        and all(host.split("."))
+    )
+
+
+# Marks the node where a wildcard entry ends. Not a string, so it can't be
+# confused with a label.
+_WILDCARD = None
+
+
+class OriginWildcards:
+    """
+    Match origins against wildcard subdomain entries like
+    ``https://*.example.com``, using a trie keyed on reversed hostname labels
+    under each scheme and port. Lookup cost depends on the origin's label
+    depth, not the number of entries.
+
+    Entries that fail is_valid_wildcard(), such as ``https://*.com``, are
+    skipped, as the system checks report them.
+    """
+
+    __slots__ = ("_roots",)
+
+    _roots: dict[tuple[str, str], dict[str | None, Any]]
+
+    def __init__(self, keys: Iterable[tuple[str, str]] = ()) -> None:
+        self._roots = {}
+        for scheme, netloc in keys:
+            if not is_valid_wildcard(netloc):
+                continue
+            host, port = _split_port(netloc[2:])
+            node = self._roots.setdefault((scheme, port), {})
+            for label in reversed(host.split(".")):
+                node = node.setdefault(label, {})
+            node[_WILDCARD] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._roots)
+
+    def match(self, key: tuple[str, str]) -> bool:
+        scheme, netloc = key
+        host, port = _split_port(netloc)
+        node = self._roots.get((scheme, port))
+        if node is None:
+            return False
+        labels = host.split(".")
+        # Stop before the first label, since the wildcard must match at least
+        # one label.
+        for index in range(len(labels) - 1, 0, -1):
+            node = node.get(labels[index])
+            if node is None:
+                return False
+            if _WILDCARD in node:
+                return True
+        return False
+
+
+def _split_port(netloc: str) -> tuple[str, str]:
+    host, sep, port = netloc.rpartition(":")
+    if not sep:
+        return netloc, ""
+    return host, port
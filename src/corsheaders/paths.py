@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from re import Pattern
+
+
+class PathIndex:
+    """
+    Find the first of an ordered sequence of path prefixes and compiled
+    regexes that matches a path. Prefixes are looked up in a dict, once per
+    distinct prefix length, so only the regexes are checked one by one.
+    """
+
+    __slots__ = ("_prefixes", "_lengths", "_patterns")
+
+    _prefixes: dict[str, int]
+    _lengths: tuple[int, ...]
+    _patterns: tuple[tuple[int, Pattern[str]], ...]
+
+    def __init__(self, paths: Iterable[str | Pattern[str]]) -> None:
+        prefixes: dict[str, int] = {}
+        patterns = []
+        for index, path in enumerate(paths):
+            if isinstance(path, str):
+                prefixes.setdefault(path, index)
+            else:
+                patterns.append((index, path))
+        self._prefixes = prefixes
+        self._lengths = tuple(sorted({len(prefix) for prefix in prefixes}))
+        self._patterns = tuple(patterns)
+
+    def resolve(self, path: str) -> int | None:
+        """
+        Return the index of the first entry matching the path, or None.
+        """
+        best = None
+        for length in self._lengths:
+            if length > len(path):
+                break
+            index = self._prefixes.get(path[:length])
+            if index is not None and (best is None or index < best):
+                best = index
+        for index, pattern in self._patterns:
+            # Regexes after the best prefix can't win.
+            if best is not None and index > best:
+                break
+            if pattern.match(path):
+                return index
+        return best
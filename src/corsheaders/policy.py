@@ -0,0 +1,747 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from functools import cache, lru_cache
+from re import Pattern
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
+from urllib.parse import urlsplit
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from corsheaders.conf import conf
+from corsheaders.defaults import default_headers, default_methods
+from corsheaders.origins import (
+    OriginRegexes,
+    OriginWildcards,
+    is_wildcard_origin,
+    origin_key,
+    parse_origin,
+)
+from corsheaders.responses import PreflightResponse
+from corsheaders.signals import check_request_enabled
+
+if TYPE_CHECKING:
+    from functools import _CacheInfo
+
+    from corsheaders.instrumentation import Instrument
+    from corsheaders.paths import PathIndex
+    from corsheaders.sources import OriginSource
+
+ACCESS_CONTROL_ALLOW_ORIGIN = "access-control-allow-origin"
+ACCESS_CONTROL_EXPOSE_HEADERS = "access-control-expose-headers"
+ACCESS_CONTROL_ALLOW_CREDENTIALS = "access-control-allow-credentials"
+ACCESS_CONTROL_ALLOW_HEADERS = "access-control-allow-headers"
+ACCESS_CONTROL_ALLOW_METHODS = "access-control-allow-methods"
+ACCESS_CONTROL_MAX_AGE = "access-control-max-age"
+ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK = "access-control-request-private-network"
+ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK = "access-control-allow-private-network"
+
+# How many distinct requested methods and headers each strict policy caches
+# the answers for.
+PREFLIGHT_CACHE_SIZE = 1024
+
+# Set in the ASGI scope or WSGI environ by the wrappers once they have applied
+# the policy, so CorsMiddleware doesn't apply it again.
+HANDLED_KEY = "corsheaders.handled"
+
+# The settings that entries in CORS_PATH_POLICIES can override.
+PATH_POLICY_SETTINGS = frozenset(
+    (
+        "CORS_ALLOW_HEADERS",
+        "CORS_ALLOW_METHODS",
+        "CORS_ALLOW_CREDENTIALS",
+        "CORS_ALLOW_PRIVATE_NETWORK",
+        "CORS_PREFLIGHT_MAX_AGE",
+        "CORS_PREFLIGHT_STRICT",
+        "CORS_ALLOW_ALL_ORIGINS",
+        "CORS_ALLOWED_ORIGINS",
+        "CORS_ALLOWED_ORIGIN_REGEXES",
+        "CORS_EXPOSE_HEADERS",
+    )
+)
+ORIGIN_SETTINGS = frozenset(
+    ("CORS_ALLOW_ALL_ORIGINS", "CORS_ALLOWED_ORIGINS", "CORS_ALLOWED_ORIGIN_REGEXES")
+)
+
+# Marked when the origin cache has to compute an answer, so lookup_origin()
+# can tell a hit from a miss without reading the shared hit counters, which
+# other threads and tasks also update.
+_origin_lookup = threading.local()
+
+
+class Decision(NamedTuple):
+    """
+    How CorsASGIMiddleware or CorsWSGIMiddleware should handle a request,
+    from CorsPolicy.decide().
+    """
+
+    # Whether to answer the request directly, as a preflight request, with
+    # ``headers`` as the whole response's headers. Otherwise ``headers`` are
+    # added to the application's response with add_headers().
+    preflight: bool
+    headers: tuple[tuple[str, str], ...]
+    # Whether to add "origin" to the response's Vary header.
+    vary: bool
+
+
+class CorsPolicy:
+    """
+    An immutable snapshot of the CORS settings, normalized once so the
+    middleware doesn't need to read Django's settings on every request.
+    """
+
+    __slots__ = (
+        "allow_all_origins",
+        "allow_credentials",
+        "allow_private_network",
+        "allowed_origins",
+        "allowed_origin_keys",
+        "allowed_origin_wildcards",
+        "allow_null_origin",
+        "allowed_origin_regexes",
+        "urls_regex",
+        "expose_headers",
+        "allow_headers",
+        "allow_methods",
+        "preflight_max_age",
+        "preflight_strict",
+        "allowed_method_set",
+        "allowed_header_set",
+        "preflight_grants",
+        "wildcard_origin",
+        "simple_headers",
+        "preflight_headers",
+        "preflight_template",
+        "origin_sources",
+        "instrument",
+        "trace",
+        "trace_secret",
+        "observed",
+        "path_index",
+        "path_policies",
+        "match_static_origin",
+        "match_origin",
+    )
+
+    allow_all_origins: bool
+    allow_credentials: bool
+    allow_private_network: bool
+    allowed_origins: tuple[str, ...]
+    allowed_origin_keys: frozenset[tuple[str, str]]
+    allowed_origin_wildcards: OriginWildcards
+    allow_null_origin: bool
+    allowed_origin_regexes: OriginRegexes
+    urls_regex: Pattern[str]
+    expose_headers: str
+    allow_headers: str
+    allow_methods: str
+    preflight_max_age: str
+    preflight_strict: bool
+    allowed_method_set: frozenset[str]
+    allowed_header_set: frozenset[str]
+    preflight_grants: Callable[[str, str], tuple[tuple[str, str], ...]]
+    wildcard_origin: bool
+    simple_headers: tuple[tuple[str, str], ...]
+    preflight_headers: tuple[tuple[str, str], ...]
+    preflight_template: PreflightResponse
+    origin_sources: tuple[OriginSource, ...]
+    instrument: Instrument | None
+    trace: bool
+    trace_secret: str | None
+    observed: bool
+    path_index: PathIndex | None
+    path_policies: tuple[CorsPolicy | None, ...]
+    match_static_origin: Callable[[str], bool | None]
+    match_origin: Callable[[str], bool | None]
+
+    # Set by cors_policy() once any view is decorated, so the middleware knows
+    # whether it needs to resolve URLs itself.
+    views_decorated: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        *,
+        allow_headers: Sequence[str] = default_headers,
+        allow_methods: Sequence[str] = default_methods,
+        allow_credentials: bool = False,
+        allow_private_network: bool = False,
+        preflight_max_age: int = 86400,
+        preflight_strict: bool = False,
+        allow_all_origins: bool = False,
+        allowed_origins: Sequence[str] = (),
+        allowed_origin_regexes: Sequence[str | Pattern[str]] = (),
+        expose_headers: Sequence[str] = (),
+        urls_regex: str | Pattern[str] = r"^.*$",
+        origin_cache_size: int = 0,
+        origin_sources: Sequence[OriginSource] = (),
+        instrument: Instrument | None = None,
+        trace: bool = False,
+        trace_secret: str | None = None,
+        path_policies: Sequence[tuple[str | Pattern[str], CorsPolicy | None]] = (),
+    ) -> None:
+        set_ = super().__setattr__
+        set_("allow_all_origins", bool(allow_all_origins))
+        set_("allow_credentials", bool(allow_credentials))
+        set_("allow_private_network", bool(allow_private_network))
+        set_("allowed_origins", tuple(allowed_origins))
+        keys = {
+            origin_key(url.scheme, url.netloc) for url in map(urlsplit, allowed_origins)
+        }
+        wildcards = {key for key in keys if is_wildcard_origin(key[1])}
+        set_("allowed_origin_keys", frozenset(keys - wildcards))
+        set_("allowed_origin_wildcards", OriginWildcards(wildcards))
+        set_("allow_null_origin", "null" in allowed_origins)
+        set_("allowed_origin_regexes", OriginRegexes(allowed_origin_regexes))
+        set_("urls_regex", re.compile(urls_regex))
+        if path_policies:
+            # Imported here, as most projects don't use CORS_PATH_POLICIES.
+            from corsheaders.paths import PathIndex
+
+            set_("path_index", PathIndex(path for path, _ in path_policies))
+        else:
+            set_("path_index", None)
+        set_("path_policies", tuple(policy for _, policy in path_policies))
+        set_("expose_headers", ", ".join(expose_headers))
+        set_("allow_headers", ", ".join(allow_headers))
+        set_("allow_methods", ", ".join(allow_methods))
+        set_("preflight_max_age", str(preflight_max_age) if preflight_max_age else "")
+        set_("preflight_strict", bool(preflight_strict))
+        set_("allowed_method_set", frozenset(allow_methods))
+        set_("allowed_header_set", frozenset(map(str.lower, allow_headers)))
+        set_(
+            "preflight_grants",
+            lru_cache(maxsize=PREFLIGHT_CACHE_SIZE)(self._grant_preflight),
+        )
+
+        # Header blocks added to allowed responses. Unless the policy answers
+        # with a wildcard, the origin is echoed back separately.
+        set_("wildcard_origin", self.allow_all_origins and not self.allow_credentials)
+        simple_headers: list[tuple[str, str]] = []
+        if self.wildcard_origin:
+            simple_headers.append((ACCESS_CONTROL_ALLOW_ORIGIN, "*"))
+        if self.allow_credentials:
+            simple_headers.append((ACCESS_CONTROL_ALLOW_CREDENTIALS, "true"))
+        if self.expose_headers:
+            simple_headers.append((ACCESS_CONTROL_EXPOSE_HEADERS, self.expose_headers))
+        preflight_headers = list(simple_headers)
+        if not self.preflight_strict:
+            # Strict policies add these per request, from preflight_grants().
+            preflight_headers += [
+                (ACCESS_CONTROL_ALLOW_HEADERS, self.allow_headers),
+                (ACCESS_CONTROL_ALLOW_METHODS, self.allow_methods),
+            ]
+        if self.preflight_max_age:
+            preflight_headers.append((ACCESS_CONTROL_MAX_AGE, self.preflight_max_age))
+        set_("simple_headers", tuple(simple_headers))
+        set_("preflight_headers", tuple(preflight_headers))
+        preflight_template = PreflightResponse(
+            headers={"content-length": "0", **dict(preflight_headers)}
+        )
+        if not self.wildcard_origin:
+            preflight_template["Vary"] = "origin"
+        set_("preflight_template", preflight_template)
+
+        # Origins from sources change at runtime, so can't be cached.
+        set_("origin_sources", tuple(origin_sources))
+        set_("instrument", instrument)
+        set_("trace", bool(trace))
+        set_("trace_secret", trace_secret or None)
+        # Whether the middleware needs to measure requests at all.
+        set_(
+            "observed",
+            instrument is not None or self.trace or self.trace_secret is not None,
+        )
+        if origin_cache_size:
+            set_(
+                "match_static_origin",
+                lru_cache(maxsize=origin_cache_size)(self._match_origin_miss),
+            )
+        else:
+            set_("match_static_origin", self._match_origin)
+        if not origin_sources:
+            set_("match_origin", self.match_static_origin)
+        else:
+            set_("match_origin", self._match_origin_with_sources)
+
+    @classmethod
+    def from_conf(cls) -> CorsPolicy:
+        origin_sources: list[OriginSource] = []
+        if (
+            conf.CORS_ALLOWED_ORIGINS_SOURCE is not None
+            or conf.CORS_ALLOWED_ORIGINS_FILE is not None
+        ):
+            # Imported here, as most projects don't use origin sources.
+            from corsheaders.sources import FileOriginSource, OriginSource
+        if conf.CORS_ALLOWED_ORIGINS_SOURCE is not None:
+            origin_sources.append(
+                OriginSource.from_setting(
+                    conf.CORS_ALLOWED_ORIGINS_SOURCE,
+                    cache_alias=conf.CORS_ALLOWED_ORIGINS_SOURCE_CACHE,
+                    refresh_interval=conf.CORS_ALLOWED_ORIGINS_SOURCE_REFRESH,
+                )
+            )
+        if conf.CORS_ALLOWED_ORIGINS_FILE is not None:
+            origin_sources.append(
+                FileOriginSource(
+                    conf.CORS_ALLOWED_ORIGINS_FILE,
+                    refresh_interval=conf.CORS_ALLOWED_ORIGINS_SOURCE_REFRESH,
+                )
+            )
+        path_policies = [
+            (
+                path,
+                None
+                if overrides is None
+                else cls.from_overrides(overrides, origin_sources=origin_sources),
+            )
+            for path, overrides in conf.CORS_PATH_POLICIES
+        ]
+        instrument = conf.CORS_INSTRUMENTATION
+        if isinstance(instrument, str):
+            instrument = import_string(instrument)
+        return cls.from_overrides(
+            {},
+            urls_regex=conf.CORS_URLS_REGEX,
+            instrument=instrument,
+            trace=conf.CORS_TRACE,
+            trace_secret=conf.CORS_TRACE_SECRET,
+            origin_sources=origin_sources,
+            path_policies=path_policies,
+        )
+
+    @classmethod
+    def from_overrides(
+        cls,
+        overrides: Mapping[str, Any],
+        *,
+        origin_sources: Sequence[OriginSource] = (),
+        **kwargs: Any,
+    ) -> CorsPolicy:
+        """
+        Build a policy from the settings, with some replaced by ``overrides``,
+        which are keyed by setting name.
+        """
+        values = {name: getattr(conf, name) for name in PATH_POLICY_SETTINGS}
+        if not ORIGIN_SETTINGS.isdisjoint(overrides):
+            # Allowed origins are replaced as a whole, so that an allowlist
+            # isn't widened by the top-level settings.
+            values.update(
+                CORS_ALLOW_ALL_ORIGINS=False,
+                CORS_ALLOWED_ORIGINS=(),
+                CORS_ALLOWED_ORIGIN_REGEXES=(),
+            )
+            origin_sources = ()
+        values.update(overrides)
+        return cls(
+            allow_headers=values["CORS_ALLOW_HEADERS"],
+            allow_methods=values["CORS_ALLOW_METHODS"],
+            allow_credentials=values["CORS_ALLOW_CREDENTIALS"],
+            allow_private_network=values["CORS_ALLOW_PRIVATE_NETWORK"],
+            preflight_max_age=values["CORS_PREFLIGHT_MAX_AGE"],
+            preflight_strict=values["CORS_PREFLIGHT_STRICT"],
+            allow_all_origins=values["CORS_ALLOW_ALL_ORIGINS"],
+            allowed_origins=values["CORS_ALLOWED_ORIGINS"],
+            allowed_origin_regexes=values["CORS_ALLOWED_ORIGIN_REGEXES"],
+            expose_headers=values["CORS_EXPOSE_HEADERS"],
+            origin_cache_size=conf.CORS_ORIGIN_CACHE_SIZE,
+            origin_sources=origin_sources,
+            **kwargs,
+        )
+
+    def url_enabled(self, path_info: str) -> bool:
+        return self.urls_regex.match(path_info) is not None
+
+    def for_path(self, path_info: str) -> CorsPolicy | None:
+        """
+        Return the policy for a path, from the first matching entry in
+        ``path_policies``, or else this policy if ``urls_regex`` matches. None
+        means CORS is disabled for the path.
+        """
+        if self.path_index is not None:
+            index = self.path_index.resolve(path_info)
+            if index is not None:
+                return self.path_policies[index]
+        return self if self.url_enabled(path_info) else None
+
+    def resolve(self, path_info: str) -> CorsPolicy | None:
+        """
+        Return the policy for a path, as for_path() does, unless the path's
+        view is decorated with cors_policy().
+        """
+        if view_policies_used():
+            # Imported here, as it's only needed once a view is decorated.
+            from corsheaders.decorators import resolve_view_policy
+
+            policy = resolve_view_policy(path_info)
+            if policy is not None:
+                return policy
+        return self.for_path(path_info)
+
+    def decide(
+        self,
+        path_info: str,
+        *,
+        method: str,
+        origin: str | None,
+        request_method: str | None,
+        request_headers: str,
+        private_network: bool,
+        trace_requested: bool = False,
+    ) -> Decision | None:
+        """
+        Decide how the ASGI and WSGI wrappers should handle a request, from
+        its path, method, and the values of its ``Origin`` and
+        ``Access-Control-Request-*`` headers. ``request_method`` is None if
+        that header is missing, and ``trace_requested`` is whether the request
+        has an ``X-CORS-Trace`` header. Returns None if the request should be
+        passed through untouched, for CorsMiddleware to handle if need be.
+        """
+        policy = self._wrapped_policy(path_info, trace_requested)
+        if policy is None:
+            return None
+        if origin and not policy.wildcard_origin:
+            policy.refresh_origins()
+        return policy._decide(
+            method, origin, request_method, request_headers, private_network
+        )
+
+    async def adecide(
+        self,
+        path_info: str,
+        *,
+        method: str,
+        origin: str | None,
+        request_method: str | None,
+        request_headers: str,
+        private_network: bool,
+        trace_requested: bool = False,
+    ) -> Decision | None:
+        policy = self._wrapped_policy(path_info, trace_requested)
+        if policy is None:
+            return None
+        if origin and not policy.wildcard_origin:
+            await policy.arefresh_origins()
+        return policy._decide(
+            method, origin, request_method, request_headers, private_network
+        )
+
+    def _wrapped_policy(
+        self, path_info: str, trace_requested: bool
+    ) -> CorsPolicy | None:
+        # Only CorsMiddleware reports events and traces requests, so the
+        # wrappers leave requests to it when either may be needed.
+        if (
+            self.instrument is not None
+            or self.trace
+            or (trace_requested and self.trace_secret is not None)
+        ):
+            return None
+        return self.resolve(path_info)
+
+    def _decide(
+        self,
+        method: str,
+        origin: str | None,
+        request_method: str | None,
+        request_headers: str,
+        private_network: bool,
+    ) -> Decision | None:
+        # Wildcard headers are the same for every request, so are added even
+        # without an origin, and the response needn't vary on it.
+        vary = not self.wildcard_origin
+        allowed: bool | None = not vary
+        if vary and origin:
+            allowed = self.match_origin(origin)
+            if allowed is False and check_request_enabled.has_listeners():
+                return None
+        headers: tuple[tuple[str, str], ...] = ()
+        if allowed:
+            headers = self.response_headers(
+                origin or "*",
+                options=method == "OPTIONS",
+                private_network=private_network,
+                request_method=request_method or "",
+                request_headers=request_headers,
+            )
+        if method != "OPTIONS" or request_method is None:
+            return Decision(False, headers, vary)
+
+        template = self.preflight_template
+        preflight_headers = [
+            ("Content-Type", template["Content-Type"]),
+            ("Content-Length", template["Content-Length"]),
+        ]
+        if vary:
+            preflight_headers.append(("Vary", "origin"))
+        return Decision(True, (*preflight_headers, *headers), vary)
+
+    def _match_origin(self, origin: str) -> bool | None:
+        """
+        Check an origin against the static parts of the policy, returning None
+        if it can't be parsed. The check_request_enabled signal is not
+        consulted.
+        """
+        parts = parse_origin(origin)
+        if parts is None:
+            return None
+        return self.allow_all_origins or self.origin_allowed(origin, *parts)
+
+    def _match_origin_miss(self, origin: str) -> bool | None:
+        # Only called by the origin cache, on a miss.
+        _origin_lookup.miss = True
+        return self._match_origin(origin)
+
+    def lookup_origin(self, origin: str) -> tuple[bool | None, bool | None, str]:
+        """
+        Return match_origin() for an origin, whether the origin cache answered
+        it, or None for that if the cache is disabled, and the outcome, as for
+        origin_outcome(). The origin is only matched once, so sources are
+        asked at most once too.
+        """
+        cache_hit = None
+        if getattr(self.match_static_origin, "cache_info", None) is None:
+            allowed = self.match_static_origin(origin)
+        else:
+            _origin_lookup.miss = False
+            allowed = self.match_static_origin(origin)
+            cache_hit = not _origin_lookup.miss
+        if allowed is False and any(
+            source.allows(origin) for source in self.origin_sources
+        ):
+            return True, cache_hit, "source"
+        if not allowed:
+            return allowed, cache_hit, "denied"
+        if self.allow_all_origins:
+            return True, cache_hit, "all"
+        if not self.allowed_origin_regexes:
+            return True, cache_hit, "allowlist"
+        # Allowed statically, so the origin parses, and is either in the
+        # allowlist or matched by a regex.
+        parts = parse_origin(origin)
+        assert parts is not None
+        if (origin == "null" and self.allow_null_origin) or self.url_allowed(*parts):
+            return True, cache_hit, "allowlist"
+        return True, cache_hit, "regex"
+
+    def _match_origin_with_sources(self, origin: str) -> bool | None:
+        allowed = self.match_static_origin(origin)
+        if allowed is False:
+            return any(source.allows(origin) for source in self.origin_sources)
+        return allowed
+
+    def refresh_origins(self) -> None:
+        """
+        Reload the origins from any sources that are stale. Call this before
+        match_origin() for each request.
+        """
+        for source in self.origin_sources:
+            if source.stale():
+                source.refresh()
+
+    async def arefresh_origins(self) -> None:
+        for source in self.origin_sources:
+            if source.stale():
+                await source.arefresh()
+
+    def origin_allowed(self, origin: str, scheme: str, netloc: str) -> bool:
+        return (
+            (origin == "null" and self.allow_null_origin)
+            or self.url_allowed(scheme, netloc)
+            or self.allowed_origin_regexes.match(origin) is not None
+        )
+
+    def origin_outcome(self, origin: str) -> str:
+        """
+        Return which setting allows an origin, as one of the OUTCOMES from
+        corsheaders.instrumentation, ignoring the check_request_enabled
+        signal.
+        """
+        return self.explain_origin(origin)[0]
+
+    def explain_origin(self, origin: str) -> tuple[str, str | None]:
+        """
+        Return the outcome for an origin, as origin_outcome() does, and a
+        description of the entry that matched it, for tracing.
+        """
+        if self.allow_all_origins:
+            return ("all", None)
+        parts = parse_origin(origin)
+        if parts is None:
+            return ("denied", "invalid origin")
+        if origin == "null" and self.allow_null_origin:
+            return ("allowlist", "null")
+        scheme, netloc = origin_key(*parts)
+        if (scheme, netloc) in self.allowed_origin_keys:
+            return ("allowlist", f"{scheme}://{netloc}")
+        if self.allowed_origin_wildcards and self.allowed_origin_wildcards.match(
+            (scheme, netloc)
+        ):
+            return ("allowlist", "wildcard")
+        index = self.allowed_origin_regexes.match(origin)
+        if index is not None:
+            pattern = self.allowed_origin_regexes.patterns[index].pattern
+            return ("regex", f"{index}: {pattern}")
+        for index, source in enumerate(self.origin_sources):
+            if source.allows(origin):
+                return ("source", f"{index}: {type(source).__name__}")
+        return ("denied", None)
+
+    def url_allowed(self, scheme: str, netloc: str) -> bool:
+        key = origin_key(scheme, netloc)
+        return key in self.allowed_origin_keys or (
+            bool(self.allowed_origin_wildcards)
+            and self.allowed_origin_wildcards.match(key)
+        )
+
+    def response_headers(
+        self,
+        origin: str,
+        *,
+        options: bool,
+        private_network: bool,
+        request_method: str = "",
+        request_headers: str = "",
+    ) -> tuple[tuple[str, str], ...]:
+        """
+        Return the CORS headers for a response to an allowed origin.
+        ``private_network`` is whether the request asked for private network
+        access. ``request_method`` and ``request_headers`` are the values of
+        the preflight request's ``Access-Control-Request-*`` headers, which
+        only strict policies use.
+        """
+        headers = self.preflight_headers if options else self.simple_headers
+        if not self.wildcard_origin:
+            headers = ((ACCESS_CONTROL_ALLOW_ORIGIN, origin), *headers)
+        if options and self.preflight_strict:
+            headers = (
+                *headers,
+                *self.preflight_grants(request_method, request_headers),
+            )
+        if private_network and self.allow_private_network:
+            headers = (*headers, (ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK, "true"))
+        return headers
+
+    def preflight_response(
+        self,
+        origin: str,
+        *,
+        private_network: bool,
+        request_method: str = "",
+        request_headers: str = "",
+    ) -> PreflightResponse:
+        """
+        Return a complete response to a preflight request from an allowed
+        origin.
+        """
+        response = self.preflight_template.clone()
+        if not self.wildcard_origin:
+            response[ACCESS_CONTROL_ALLOW_ORIGIN] = origin
+        if self.preflight_strict:
+            for name, value in self.preflight_grants(request_method, request_headers):
+                response[name] = value
+        if private_network and self.allow_private_network:
+            response[ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK] = "true"
+        return response
+
+    def _grant_preflight(
+        self, request_method: str, request_headers: str
+    ) -> tuple[tuple[str, str], ...]:
+        """
+        Return the ``Access-Control-Allow-Methods`` and
+        ``Access-Control-Allow-Headers`` headers for a strict policy, granting
+        only the requested method and headers that are allowed. Cached in
+        preflight_grants(), keyed on the raw header values.
+        """
+        grants = []
+        if request_method in self.allowed_method_set:
+            grants.append((ACCESS_CONTROL_ALLOW_METHODS, request_method))
+        requested = dict.fromkeys(
+            name for name in map(str.strip, request_headers.lower().split(",")) if name
+        )
+        if "*" not in self.allowed_header_set:
+            requested = {
+                name: None for name in requested if name in self.allowed_header_set
+            }
+        if requested:
+            grants.append((ACCESS_CONTROL_ALLOW_HEADERS, ", ".join(requested)))
+        return tuple(grants)
+
+    def origin_cache_info(self) -> _CacheInfo | None:
+        """
+        Return the hit and miss counts for the origin cache, if enabled.
+        """
+        cache_info: Callable[[], _CacheInfo] | None = getattr(
+            self.match_static_origin, "cache_info", None
+        )
+        if cache_info is None:
+            return None
+        return cache_info()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+
+@cache
+def get_policy() -> CorsPolicy:
+    """
+    Return the policy for the current settings, shared by all middleware.
+    """
+    return CorsPolicy.from_conf()
+
+
+def view_policies_used() -> bool:
+    """
+    Return whether any view has been decorated with cors_policy().
+    """
+    if not CorsPolicy.views_decorated:
+        # Views are normally imported by the URLconf, which Django only loads
+        # when it first resolves a URL, after CorsMiddleware has run.
+        get_resolver().url_patterns  # noqa: B018
+    return CorsPolicy.views_decorated
+
+
+def add_headers(
+    headers: Iterable[tuple[str, str]],
+    cors_headers: Sequence[tuple[str, str]],
+    *,
+    vary: bool = True,
+    vary_name: str = "Vary",
+) -> list[tuple[str, str]]:
+    """
+    Return a copy of response headers with the CORS headers replacing any
+    existing ones, and if ``vary`` is set, "origin" added to the Vary header,
+    which is added as ``vary_name`` if missing.
+    """
+    replaced = {name for name, _ in cors_headers}
+    result = []
+    has_vary = False
+    for name, value in headers:
+        lower_name = name.lower()
+        if lower_name in replaced:
+            continue
+        if vary and lower_name == "vary" and not has_vary:
+            has_vary = True
+            tokens = {token.strip().lower() for token in value.split(",")}
+            if "*" not in tokens and "origin" not in tokens:
+                value = value + ", origin"
+        result.append((name, value))
+    if vary and not has_vary:
+        result.append((vary_name, "origin"))
+    result.extend(cors_headers)
+    return result
+
+
+@receiver(setting_changed)
+def _reset_policy(*, setting: str, **kwargs: Any) -> None:
+    # Rebuilt lazily, so that invalid values only fail when used.
+    # The preflight template's Content-Type depends on DEFAULT_CHARSET.
+    if setting.startswith("CORS_") or setting == "DEFAULT_CHARSET":
+        get_policy.cache_clear()
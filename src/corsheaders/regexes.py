@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import re
+import sys
+from collections.abc import Callable, Sequence
+from re import Pattern
+from typing import Any
+
+if sys.version_info >= (3, 11):
+    from re import _constants as sre_constants  # type: ignore [attr-defined]
+    from re import _parser as sre_parse  # type: ignore [attr-defined]
+else:
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger("corsheaders")
+
+# Constructs whose meaning depends on group numbering or global position, so
+# patterns using them can't be wrapped into a larger alternation.
+_UNMERGEABLE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+def compile_lookups(
+    patterns: Sequence[Pattern[str]],
+) -> tuple[
+    dict[str, int],
+    dict[str, dict[str, list[LabelEntry]]],
+    tuple[Pattern[str], ...],
+    tuple[tuple[int, Pattern[str]], ...],
+]:
+    """
+    Split origin patterns into the exact and label lookups, combined
+    alternations, and separately matched patterns used by OriginRegexes.
+    """
+    exact: dict[str, int] = {}
+    labels: dict[str, dict[str, list[LabelEntry]]] = {}
+    by_flags: dict[int, list[str]] = {}
+    separate = []
+    for index, pattern in enumerate(patterns):
+        simple = _simplify(pattern)
+        if simple is not None:
+            prefix, label, suffix, end = simple
+            if label is None:
+                for origin in (prefix, prefix + "\n") if end == "$" else (prefix,):
+                    exact.setdefault(origin, index)
+                logger.debug(
+                    "Matching CORS_ALLOWED_ORIGIN_REGEXES pattern %r by exact lookup.",
+                    pattern.pattern,
+                )
+            else:
+                check, min_length, max_length = label
+                labels.setdefault(prefix, {}).setdefault(suffix, []).append(
+                    (index, check, min_length, max_length, end == "$")
+                )
+                logger.debug(
+                    "Matching CORS_ALLOWED_ORIGIN_REGEXES pattern %r by suffix lookup.",
+                    pattern.pattern,
+                )
+        elif (
+            pattern.groupindex
+            or pattern.flags & re.VERBOSE
+            or _UNMERGEABLE_RE.search(pattern.pattern)
+        ):
+            separate.append((index, pattern))
+        else:
+            by_flags.setdefault(pattern.flags, []).append(
+                f"(?P<_{index}>{pattern.pattern})"
+            )
+
+    combined = tuple(
+        re.compile("|".join(branches), flags) for flags, branches in by_flags.items()
+    )
+    return exact, labels, combined, tuple(separate)
+
+
+# A label pattern's (index, character check, min length, max length, whether
+# "$" allows a trailing newline).
+LabelEntry = tuple[int, Callable[[str], bool], int, int, bool]
+
+_AT_END = {sre_constants.AT_END: "$", sre_constants.AT_END_STRING: r"\Z"}
+_REPEAT_OPS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", sre_constants.MAX_REPEAT),
+}
+# Skip huge ranges like [\x00-\uffff], which are rare in origin patterns.
+_MAX_CLASS_SIZE = 1024
+
+
+def _simplify(
+    pattern: Pattern[str],
+) -> tuple[str, tuple[Callable[[str], bool], int, int] | None, str, str] | None:
+    """
+    Reduce a pattern to (prefix, label, suffix, end) if it's a literal prefix,
+    optionally followed by one repeated character class that can't match dots
+    and a literal suffix starting with a dot, then an end anchor. Otherwise
+    return None.
+    """
+    if pattern.flags != re.UNICODE:
+        return None
+    items = list(sre_parse.parse(pattern.pattern))
+    if items and items[0] in (
+        (sre_constants.AT, sre_constants.AT_BEGINNING),
+        (sre_constants.AT, sre_constants.AT_BEGINNING_STRING),
+    ):
+        items.pop(0)
+    if not items or items[-1][0] != sre_constants.AT:
+        return None
+    end = _AT_END.get(items.pop()[1])
+    if end is None:
+        return None
+
+    parts: list[list[str]] = [[]]
+    label = None
+    for op, av in items:
+        if op == sre_constants.SUBPATTERN:
+            # A plain group around the repeat, like ([^.]+).
+            group, add_flags, del_flags, subpattern = av
+            if add_flags or del_flags or len(subpattern) != 1:
+                return None
+            op, av = subpattern[0]
+        if op == sre_constants.LITERAL:
+            parts[-1].append(chr(av))
+        elif op in _REPEAT_OPS and label is None:
+            min_length, max_length, subpattern = av
+            if len(subpattern) != 1:
+                return None
+            check = _label_check(*subpattern[0])
+            if check is None:
+                return None
+            label = (check, min_length, max_length)
+            parts.append([])
+        else:
+            return None
+
+    prefix = "".join(parts[0])
+    suffix = "".join(parts[-1]) if label is not None else ""
+    if label is not None and not suffix.startswith("."):
+        return None
+    return prefix, label, suffix, end
+
+
+def _label_check(op: Any, av: Any) -> Callable[[str], bool] | None:
+    """
+    Return a function checking every character of a string is in the given
+    character class, or None if the class is unsupported or matches dots.
+    """
+    if op == sre_constants.NOT_LITERAL:
+        op, av = sre_constants.IN, [(sre_constants.NEGATE, None), (op, av)]
+    elif op == sre_constants.LITERAL:
+        op, av = sre_constants.IN, [(op, av)]
+    if op != sre_constants.IN:
+        return None
+
+    negate = False
+    chars: set[str] = set()
+    categories = set()
+    for item_op, item_av in av:
+        if item_op == sre_constants.NEGATE:
+            negate = True
+        elif item_op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL):
+            chars.add(chr(item_av))
+        elif item_op == sre_constants.RANGE:
+            low, high = item_av
+            if high - low >= _MAX_CLASS_SIZE:
+                return None
+            chars.update(map(chr, range(low, high + 1)))
+        elif item_op == sre_constants.CATEGORY and item_av in (
+            sre_constants.CATEGORY_WORD,
+            sre_constants.CATEGORY_DIGIT,
+        ):
+            categories.add(item_av)
+        else:
+            return None
+
+    delete = str.maketrans("", "", "".join(chars))
+    if negate:
+        if categories or "." not in chars:
+            return None
+        return lambda label: len(label.translate(delete)) == len(label)
+    if "." in chars:
+        return None
+    # str.isalnum() and str.isdecimal() match exactly the Unicode characters
+    # that \w (without the underscore) and \d do.
+    if sre_constants.CATEGORY_WORD in categories:
+        return lambda label: _is_word(label.translate(delete))
+    if sre_constants.CATEGORY_DIGIT in categories:
+        return lambda label: _is_decimal(label.translate(delete))
+    return lambda label: not label.translate(delete)
+
+
+def _is_word(rest: str) -> bool:
+    return not rest or rest.replace("_", "a").isalnum()
+
+
+def _is_decimal(rest: str) -> bool:
+    return not rest or rest.isdecimal()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from http.cookies import SimpleCookie
+
+from django.http import HttpResponse
+from django.http.response import ResponseHeaders
+
+
+class PreflightResponse(HttpResponse):
+    """
+    An empty response to a preflight request. Each policy builds one as a
+    template, with its headers already validated, and clones it for each
+    request, which is much cheaper than building a new response.
+    """
+
+    def clone(self) -> PreflightResponse:
+        response = object.__new__(type(self))
+        state = response.__dict__
+        state.update(self.__dict__)
+        # Copy the mutable parts, so changes to the clone, such as from later
+        # middleware, don't leak into the template.
+        headers = object.__new__(ResponseHeaders)
+        headers._store = self.headers._store.copy()
+        state["headers"] = headers
+        state["cookies"] = SimpleCookie()
+        state["_resource_closers"] = []
+        state["_container"] = [b""]
+        return response
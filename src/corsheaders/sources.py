@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from functools import partial
+from os import PathLike
+from time import monotonic
+from typing import Any
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from corsheaders.conf import conf
+from corsheaders.origins import (
+    OriginWildcards,
+    is_valid_wildcard,
+    is_wildcard_origin,
+    origin_key,
+    parse_origin,
+)
+
+logger = logging.getLogger("corsheaders")
+
+VERSION_KEY = "corsheaders:origins-version"
+
+OriginLoader = Callable[[], Iterable[str]]
+
+
+class OriginIndex:
+    """
+    A lookup structure for a fixed set of origins.
+    """
+
+    __slots__ = ("keys", "wildcards", "allow_null")
+
+    keys: frozenset[tuple[str, str]]
+    wildcards: OriginWildcards
+    allow_null: bool
+
+    def __init__(self, origins: Iterable[object]) -> None:
+        keys = set()
+        allow_null = False
+        for origin in origins:
+            if not isinstance(origin, str):
+                continue
+            if origin == "null":
+                allow_null = True
+                continue
+            try:
+                url = urlsplit(origin)
+            except ValueError:
+                continue
+            # Skip invalid rows rather than letting them match malformed
+            # Origin headers, such as those without a scheme, or match too
+            # much, such as wildcards like https://*.com.
+            if not url.scheme or not url.netloc:
+                continue
+            if is_wildcard_origin(url.netloc) and not is_valid_wildcard(url.netloc):
+                continue
+            keys.add(origin_key(url.scheme, url.netloc))
+        wildcards = {key for key in keys if is_wildcard_origin(key[1])}
+        self.keys = frozenset(keys - wildcards)
+        self.wildcards = OriginWildcards(wildcards)
+        self.allow_null = allow_null
+
+    def allows(self, origin: str, scheme: str, netloc: str) -> bool:
+        if origin == "null":
+            return self.allow_null
+        key = origin_key(scheme, netloc)
+        return key in self.keys or (bool(self.wildcards) and self.wildcards.match(key))
+
+
+class OriginSource:
+    """
+    Origins loaded by a callable, such as a database query, and kept in an
+    in-process index.
+
+    The index is reloaded when the version stored in Django's cache changes,
+    which invalidate_origins() does. The version is checked at most once per
+    ``refresh_interval`` seconds, so most requests make no queries at all.
+    If checking the version or loading fails, the error is logged and the
+    previous index kept, to be retried after the interval.
+    """
+
+    background_reload = False
+
+    def __init__(
+        self,
+        load: OriginLoader,
+        *,
+        cache_alias: str = "default",
+        refresh_interval: float = 5.0,
+    ) -> None:
+        self.load = load
+        self.cache_alias = cache_alias
+        self.refresh_interval = refresh_interval
+        self.index: OriginIndex | None = None
+        self.version: object = None
+        self.next_check = float("-inf")
+        self.reload_thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_setting(cls, value: str | OriginLoader, **kwargs: Any) -> OriginSource:
+        load = import_string(value) if isinstance(value, str) else value
+        return cls(load, **kwargs)
+
+    def stale(self) -> bool:
+        return monotonic() >= self.next_check
+
+    def get_version(self) -> object:
+        return caches[self.cache_alias].get(VERSION_KEY)
+
+    def refresh(self) -> None:
+        """
+        Reload the index if its version has changed. This may query the cache
+        and call the loader, so in async code use arefresh().
+        """
+        with self._lock:
+            # Another thread may have refreshed whilst this one waited.
+            if not self.stale():
+                return
+            self.next_check = monotonic() + self.refresh_interval
+            try:
+                version = self.get_version()
+            except Exception:
+                logger.exception("Could not check whether CORS origins changed.")
+                return
+            if self.index is None:
+                self.reload(version)
+            elif version != self.version:
+                if not self.background_reload:
+                    self.reload(version)
+                elif self.reload_thread is None or not self.reload_thread.is_alive():
+                    # Keep answering from the old index whilst the new one is
+                    # built.
+                    self.reload_thread = threading.Thread(
+                        target=self.reload,
+                        args=(version,),
+                        name="corsheaders-reload",
+                        daemon=True,
+                    )
+                    self.reload_thread.start()
+
+    def reload(self, version: object) -> None:
+        try:
+            index = OriginIndex(self.load())
+        except Exception:
+            # The version is left unchanged, so the next refresh retries.
+            logger.exception("Could not load CORS origins, keeping the previous ones.")
+            return
+        # Swapped in whole, so concurrent lookups see either the old or the
+        # new index.
+        self.index = index
+        self.version = version
+
+    async def arefresh(self) -> None:
+        await sync_to_async(self.refresh)()
+
+    def expire(self) -> None:
+        self.next_check = float("-inf")
+
+    def allows(self, origin: str) -> bool:
+        index = self.index
+        if index is None:
+            return False
+        parts = parse_origin(origin)
+        if parts is None:
+            return False
+        return index.allows(origin, *parts)
+
+
+class FileOriginSource(OriginSource):
+    """
+    Origins listed in a text file, one per line, reloaded in a background
+    thread when the file's modification time, size, or inode changes.
+    """
+
+    background_reload = True
+
+    def __init__(self, path: str | PathLike[str], *, refresh_interval: float = 5.0):
+        super().__init__(
+            partial(read_origins_file, path), refresh_interval=refresh_interval
+        )
+        self.path = path
+
+    def get_version(self) -> object:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # Probably mid-replace, keep the current index.
+            return self.version
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def read_origins_file(path: str | PathLike[str]) -> list[str]:
+    """
+    Read origins from a file, skipping blank lines and ``#`` comments.
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return [line for line in map(str.strip, lines) if line and not line.startswith("#")]
+
+
+def invalidate_origins() -> None:
+    """
+    Mark the origins loaded by CORS_ALLOWED_ORIGINS_SOURCE as out of date, so
+    every process reloads them on its next version check.
+    """
+    from corsheaders.policy import get_policy  # circular import
+
+    caches[conf.CORS_ALLOWED_ORIGINS_SOURCE_CACHE].set(
+        VERSION_KEY, uuid4().hex, timeout=None
+    )
+    for source in get_policy().origin_sources:
+        source.expire()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.crypto import constant_time_compare
+
+from corsheaders.signals import check_request_enabled
+
+if TYPE_CHECKING:
+    from corsheaders.instrumentation import CorsEvent
+    from corsheaders.policy import CorsPolicy
+
+# Requests with this header set to CORS_TRACE_SECRET are traced, and their
+# trace is also returned in the same response header.
+TRACE_HEADER = "X-CORS-Trace"
+
+logger = logging.getLogger("corsheaders.trace")
+
+
+class Trace:
+    """
+    The CORS decision path for one request, filled in as the middleware
+    handles it.
+    """
+
+    def __init__(self, *, respond: bool) -> None:
+        # Whether to add the trace to the response.
+        self.respond = respond
+        self.receivers: list[dict[str, Any]] | None = None
+
+    def add_receiver(self, receiver: object, result: object, duration: float) -> None:
+        if self.receivers is None:
+            self.receivers = []
+        self.receivers.append(
+            {
+                "receiver": _name(receiver),
+                "result": bool(result),
+                "duration": round(duration, 6),
+            }
+        )
+
+
+def start_trace(request: HttpRequest, policy: CorsPolicy) -> Trace | None:
+    """
+    Return a Trace if the request should be traced, from CORS_TRACE or a
+    header matching CORS_TRACE_SECRET, or else None.
+    """
+    secret = policy.trace_secret
+    if secret is not None:
+        value = request.headers.get(TRACE_HEADER)
+        if value is not None and constant_time_compare(value, secret):
+            return Trace(respond=True)
+    if policy.trace:
+        return Trace(respond=False)
+    return None
+
+
+def trace_signal(request: HttpRequest, trace: Trace) -> bool:
+    """
+    Send check_request_enabled like CorsMiddleware.check_signal(), but calling
+    receivers one at a time, so each can be timed.
+    """
+    # There's no public API to time each receiver, so this uses the same
+    # private method as Signal.send(). It's only called when tracing.
+    sync_receivers, async_receivers = check_request_enabled._live_receivers(None)
+    receivers = [
+        *((receiver, receiver) for receiver in sync_receivers),
+        *((receiver, async_to_sync(receiver)) for receiver in async_receivers),
+    ]
+    result = False
+    for receiver, call in receivers:
+        result |= _call_receiver(trace, receiver, call, request)
+    return result
+
+
+async def atrace_signal(request: HttpRequest, trace: Trace) -> bool:
+    """
+    The async equivalent of trace_signal().
+    """
+    sync_receivers, async_receivers = check_request_enabled._live_receivers(None)
+    result = False
+    for receiver in sync_receivers:
+        result |= await sync_to_async(_call_receiver)(
+            trace, receiver, receiver, request
+        )
+    for receiver in async_receivers:
+        start = perf_counter()
+        value = await receiver(
+            signal=check_request_enabled, sender=None, request=request
+        )
+        trace.add_receiver(receiver, value, perf_counter() - start)
+        result |= bool(value)
+    return result
+
+
+def _call_receiver(
+    trace: Trace,
+    receiver: object,
+    call: Callable[..., Any],
+    request: HttpRequest,
+) -> bool:
+    start = perf_counter()
+    value = call(signal=check_request_enabled, sender=None, request=request)
+    trace.add_receiver(receiver, value, perf_counter() - start)
+    return bool(value)
+
+
+def finish_trace(
+    request: HttpRequest,
+    response: HttpResponseBase,
+    trace: Trace,
+    event: CorsEvent,
+    policy: CorsPolicy,
+    base_policy: CorsPolicy,
+) -> None:
+    """
+    Log the trace for a request, and if requested, add it to the response.
+    """
+    data: dict[str, Any] = {
+        "method": request.method,
+        "path": request.path_info,
+        "origin": request.headers.get("origin"),
+        "preflight": event.preflight,
+        "policy": _policy_source(request, base_policy),
+        "outcome": event.outcome,
+    }
+    origin = data["origin"]
+    if origin and event.outcome not in ("disabled", "signal"):
+        data["match"] = policy.explain_origin(origin)[1]
+    if trace.receivers is not None:
+        data["receivers"] = trace.receivers
+    data["cache_hit"] = event.cache_hit
+    data["headers"] = {
+        name: value
+        for name, value in response.items()
+        if name.lower().startswith("access-control-") or name.lower() == "vary"
+    }
+    data["duration"] = round(event.duration, 6)
+
+    encoded = json.dumps(data, separators=(",", ":"))
+    logger.info("CORS trace %s", encoded, extra={"cors_trace": data})
+    if trace.respond:
+        response[TRACE_HEADER] = encoded
+
+
+def _policy_source(request: HttpRequest, base_policy: CorsPolicy) -> str | None:
+    # Where the request's policy came from, or None if CORS was disabled for
+    # the URL.
+    policy = getattr(request, "_cors_policy", None)
+    if policy is None:
+        return None
+    if policy is base_policy:
+        return "CORS_URLS_REGEX"
+    for index, path_policy in enumerate(base_policy.path_policies):
+        if policy is path_policy:
+            return f"CORS_PATH_POLICIES[{index}]"
+    return "cors_policy()"
+
+
+def _name(receiver: object) -> str:
+    module = getattr(receiver, "__module__", None)
+    qualname = getattr(receiver, "__qualname__", None)
+    if module is None or qualname is None:
+        return repr(receiver)
+    return f"{module}.{qualname}"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+from django.core.handlers.wsgi import get_path_info
+
+from corsheaders.policy import HANDLED_KEY, add_headers, get_policy
+
+if TYPE_CHECKING:
+    from _typeshed import OptExcInfo
+    from _typeshed.wsgi import StartResponse, WSGIApplication, WSGIEnvironment
+
+Headers = list[tuple[str, str]]
+
+
+class CorsWSGIMiddleware:
+    """
+    Apply the CORS policy around a WSGI application, answering preflight
+    requests directly from the environ so they never reach Django.
+
+    Requests whose outcome depends on check_request_enabled receivers are
+    passed through untouched, for CorsMiddleware to handle.
+    """
+
+    def __init__(self, app: WSGIApplication) -> None:
+        self.app = app
+
+    def __call__(
+        self, environ: WSGIEnvironment, start_response: StartResponse
+    ) -> Iterable[bytes]:
+        decision = get_policy().decide(
+            get_path_info(environ),
+            method=environ["REQUEST_METHOD"],
+            origin=environ.get("HTTP_ORIGIN"),
+            request_method=environ.get("HTTP_ACCESS_CONTROL_REQUEST_METHOD"),
+            request_headers=environ.get("HTTP_ACCESS_CONTROL_REQUEST_HEADERS", ""),
+            private_network=(
+                environ.get("HTTP_ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK") == "true"
+            ),
+            trace_requested="HTTP_X_CORS_TRACE" in environ,
+        )
+        if decision is None:
+            return self.app(environ, start_response)
+
+        if decision.preflight:
+            start_response("200 OK", list(decision.headers))
+            return []
+
+        def start_response_with_cors(
+            status: str, headers: Headers, exc_info: OptExcInfo | None = None, /
+        ) -> Callable[[bytes], object]:
+            return start_response(
+                status,
+                add_headers(headers, decision.headers, vary=decision.vary),
+                exc_info,
+            )
+
+        environ[HANDLED_KEY] = True
+        return self.app(environ, start_response_with_cors)
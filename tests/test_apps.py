@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+
+class CorsHeadersAppConfigTests(SimpleTestCase):
+    def test_runtime_imports(self):
+        # In a fresh process, as this one has already imported everything.
+        code = (
+            "import sys, django; django.setup(); import corsheaders.middleware; "
+            + "print(' '.join(sorted(sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            env={
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": "tests.settings",
+                "PYTHONPATH": os.pathsep.join(sys.path),
+            },
+            text=True,
+        )
+        modules = result.stdout.split()
+        assert "corsheaders.middleware" in modules
+        assert "corsheaders.checks" not in modules
+        assert "corsheaders.sources" not in modules
+        assert "corsheaders.tracing" not in modules
+        assert "corsheaders.decorators" not in modules
+        assert "corsheaders.instrumentation" not in modules
+        assert "corsheaders.paths" not in modules
+        assert "corsheaders.regexes" not in modules
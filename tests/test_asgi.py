@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import asyncio
+from http import HTTPStatus
+from io import BytesIO
+from typing import Any
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from corsheaders.asgi import (
+    ASGIApp,
+    CorsASGIMiddleware,
+    Message,
+    Receive,
+    Scope,
+    Send,
+    add_raw_headers,
+)
+from corsheaders.middleware import CorsMiddleware
+from corsheaders.policy import HANDLED_KEY
+from tests.utils import recorded_events, temporary_check_request_handler
+
+
+def make_scope(
+    path: str = "/", method: str = "GET", headers: dict[str, str] | None = None
+) -> dict[str, Any]:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ],
+    }
+
+
+async def run(app: ASGIApp, scope: Scope) -> list[Message]:
+    messages: list[Message] = []
+    requested = False
+
+    async def receive() -> Message:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Never disconnect.
+        await asyncio.Future()
+        raise AssertionError("unreachable")
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+class RecordingApp:
+    def __init__(self, headers: list[tuple[bytes, bytes]] | None = None) -> None:
+        self.headers = headers or []
+        self.scopes: list[Scope] = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scopes.append(scope)
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": self.headers}
+        )
+        await send({"type": "http.response.body", "body": b"Hello"})
+
+
+async def cors_middleware_app(scope: Scope, receive: Receive, send: Send) -> None:
+    # Runs CorsMiddleware as Django's handler would, without its signals.
+    async def get_response(request: HttpRequest) -> HttpResponse:
+        return HttpResponse()
+
+    middleware = CorsMiddleware(get_response)
+    response = await middleware(ASGIRequest(scope, BytesIO()))  # type: ignore [misc]
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in response.items()
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": response.content})
+
+
+def response_headers(messages: list[Message]) -> list[tuple[str, str]]:
+    assert messages[0]["type"] == "http.response.start"
+    return [
+        (name.decode("latin-1"), value.decode("latin-1"))
+        for name, value in messages[0]["headers"]
+    ]
+
+
+class CorsASGIMiddlewareTests(SimpleTestCase):
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_preflight_answered_directly(self):
+        app = RecordingApp()
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+        )
+        assert app.scopes == []
+        assert messages[0]["status"] == HTTPStatus.OK
+        headers = dict(response_headers(messages))
+        assert headers["content-length"] == "0"
+        assert headers["vary"] == "origin"
+        assert headers["access-control-allow-origin"] == "https://example.com"
+        assert "access-control-allow-methods" in headers
+        assert messages[1] == {"type": "http.response.body", "body": b""}
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], DEFAULT_CHARSET="latin-1"
+    )
+    async def test_preflight_default_charset(self):
+        messages = await run(
+            CorsASGIMiddleware(RecordingApp()),
+            make_scope(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+        )
+        headers = dict(response_headers(messages))
+        assert headers["content-type"] == "text/html; charset=latin-1"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_preflight_not_allowed(self):
+        app = RecordingApp()
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.org",
+                    "access-control-request-method": "GET",
+                },
+            ),
+        )
+        assert app.scopes == []
+        assert messages[0]["status"] == HTTPStatus.OK
+        headers = dict(response_headers(messages))
+        assert "access-control-allow-origin" not in headers
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_preflight_deferred_to_signal(self):
+        app = RecordingApp()
+
+        def handler(*args, **kwargs):
+            return True
+
+        scope = make_scope(
+            method="OPTIONS",
+            headers={
+                "origin": "https://example.org",
+                "access-control-request-method": "GET",
+            },
+        )
+        with temporary_check_request_handler(handler):
+            await run(CorsASGIMiddleware(app), scope)
+
+        assert app.scopes == [scope]
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_INSTRUMENTATION="tests.utils.record_event",
+    )
+    async def test_instrumented_deferred_to_django_middleware(self):
+        recorded_events.clear()
+        scope = make_scope(
+            method="OPTIONS",
+            headers={
+                "origin": "https://example.com",
+                "access-control-request-method": "GET",
+            },
+        )
+        messages = await run(CorsASGIMiddleware(cors_middleware_app), scope)
+        headers = dict(response_headers(messages))
+        assert headers["access-control-allow-origin"] == "https://example.com"
+        assert len(recorded_events) == 1
+        assert recorded_events[0].preflight is True
+        assert recorded_events[0].outcome == "allowlist"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_TRACE=True)
+    async def test_trace_deferred_to_django_middleware(self):
+        app = RecordingApp()
+        scope = make_scope(headers={"origin": "https://example.com"})
+        await run(CorsASGIMiddleware(app), scope)
+        assert app.scopes == [scope]
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_TRACE_SECRET="s3cret"
+    )
+    async def test_trace_secret_deferred_to_django_middleware(self):
+        scope = make_scope(
+            headers={"origin": "https://example.com", "x-cors-trace": "s3cret"}
+        )
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            messages = await run(CorsASGIMiddleware(cors_middleware_app), scope)
+        assert "X-CORS-Trace" in dict(response_headers(messages))
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=True,
+        CORS_ALLOW_METHODS=["GET"],
+        CORS_PREFLIGHT_STRICT=True,
+    )
+    async def test_preflight_strict(self):
+        messages = await run(
+            CorsASGIMiddleware(RecordingApp()),
+            make_scope(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "PUT",
+                    "access-control-request-headers": "Content-Type, X-Other",
+                },
+            ),
+        )
+        headers = dict(response_headers(messages))
+        assert "access-control-allow-methods" not in headers
+        assert headers["access-control-allow-headers"] == "content-type"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    async def test_preflight_allow_all_no_vary(self):
+        messages = await run(
+            CorsASGIMiddleware(RecordingApp()),
+            make_scope(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+        )
+        headers = dict(response_headers(messages))
+        assert "vary" not in headers
+        assert headers["access-control-allow-origin"] == "*"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    async def test_simple_request_allow_all_no_origin(self):
+        messages = await run(CorsASGIMiddleware(RecordingApp()), make_scope())
+        assert response_headers(messages) == [("access-control-allow-origin", "*")]
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_URLS_REGEX=r"^/api/")
+    async def test_url_not_enabled(self):
+        app = RecordingApp()
+        scope = make_scope(path="/", headers={"origin": "https://example.com"})
+        messages = await run(CorsASGIMiddleware(app), scope)
+        assert app.scopes == [scope]
+        assert response_headers(messages) == []
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_URLS_REGEX=r"^/api/")
+    async def test_url_enabled_after_root_path(self):
+        app = RecordingApp()
+        scope = make_scope(path="/prefix/api/", headers={"origin": "https://a.com"})
+        scope["root_path"] = "/prefix"
+        messages = await run(CorsASGIMiddleware(app), scope)
+        assert ("access-control-allow-origin", "*") in response_headers(messages)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_simple_request_headers_injected(self):
+        app = RecordingApp(headers=[(b"Vary", b"Cookie")])
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(headers={"origin": "https://example.com"}),
+        )
+        assert app.scopes[0][HANDLED_KEY] is True
+        assert response_headers(messages) == [
+            ("Vary", "Cookie, origin"),
+            ("access-control-allow-origin", "https://example.com"),
+        ]
+        assert messages[1]["body"] == b"Hello"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_simple_request_no_origin(self):
+        app = RecordingApp()
+        messages = await run(CorsASGIMiddleware(app), make_scope())
+        assert response_headers(messages) == [("vary", "origin")]
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_PRIVATE_NETWORK=True)
+    async def test_private_network(self):
+        app = RecordingApp()
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-private-network": "true",
+                }
+            ),
+        )
+        assert ("access-control-allow-private-network", "true") in response_headers(
+            messages
+        )
+
+    async def test_invalid_origin(self):
+        app = RecordingApp()
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(headers={"origin": "https://example.com]"}),
+        )
+        assert response_headers(messages) == [("vary", "origin")]
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_streaming_body_passed_through(self):
+        bodies = [
+            {"type": "http.response.body", "body": b"chunk", "more_body": True}
+            for _ in range(3)
+        ]
+        bodies.append({"type": "http.response.body", "body": b""})
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")],
+                }
+            )
+            for body in bodies:
+                await send(body)
+
+        messages = await run(
+            CorsASGIMiddleware(app),
+            make_scope(headers={"origin": "https://example.com"}),
+        )
+        assert response_headers(messages) == [
+            ("content-type", "text/event-stream"),
+            ("vary", "origin"),
+            ("access-control-allow-origin", "https://example.com"),
+        ]
+        # The same message objects, not copies.
+        assert len(messages) == 5
+        assert all(
+            message is body for message, body in zip(messages[1:], bodies, strict=True)
+        )
+
+    async def test_non_http_passed_through(self):
+        app = RecordingApp()
+        scope: Scope = {"type": "lifespan"}
+        await run(CorsASGIMiddleware(app), scope)
+        assert app.scopes == [scope]
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_django_middleware_skips_handled_requests(self):
+        scope = make_scope(headers={"origin": "https://example.com"})
+        scope[HANDLED_KEY] = True
+        request = ASGIRequest(scope, BytesIO())
+        response = CorsMiddleware(lambda request: HttpResponse())(request)
+        assert isinstance(response, HttpResponse)
+        assert "access-control-allow-origin" not in response
+        assert "vary" not in response
+
+
+class AddRawHeadersTests(SimpleTestCase):
+    def test_no_vary(self):
+        assert add_raw_headers([], []) == [(b"vary", b"origin")]
+
+    def test_vary_already_origin(self):
+        assert add_raw_headers([(b"Vary", b"Origin")], []) == [(b"Vary", b"Origin")]
+
+    def test_vary_star(self):
+        assert add_raw_headers([(b"vary", b"*")], []) == [(b"vary", b"*")]
+
+    def test_no_vary_wanted(self):
+        assert add_raw_headers([], [], vary=False) == []
+
+    def test_replaces_existing(self):
+        assert add_raw_headers(
+            [(b"Access-Control-Allow-Origin", b"https://a.com")],
+            [(b"access-control-allow-origin", b"*")],
+        ) == [(b"vary", b"origin"), (b"access-control-allow-origin", b"*")]
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import re
+import sys
+import tempfile
+from io import StringIO
 
 import pytest
-from django.core.checks import CheckMessage, Error
+from django.core.checks import CheckMessage, Error, Warning
 from django.core.management import base, call_command
 from django.test import SimpleTestCase
 from django.test.utils import override_settings
 
-from corsheaders.checks import check_settings
+from corsheaders.checks import check_regex_cost, check_regexes, check_settings
+from tests.utils import origin_source_rows
+
+
+def fail_to_load() -> list[str]:
+    raise RuntimeError("no table")
 
 
 class ChecksTests(SimpleTestCase):
@@ -70,6 +78,10 @@ class ChecksTests(SimpleTestCase):
     def test_cors_preflight_max_age_negative(self):
         self.check_error_codes(["corsheaders.E004"])
 
+    @override_settings(CORS_PREFLIGHT_STRICT="yes")
+    def test_cors_preflight_strict_non_bool(self):
+        self.check_error_codes(["corsheaders.E024"])
+
     @override_settings(CORS_ALLOW_ALL_ORIGINS=object)
     def test_cors_allow_all_origins_non_bool(self):
         errors = self.check_error_codes(["corsheaders.E005"])
@@ -115,6 +127,41 @@ class ChecksTests(SimpleTestCase):
     def test_cors_allowed_origins_no_netloc(self):
         self.check_error_codes(["corsheaders.E013"])
 
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://*.example.com", "http://*.example.com:8000"]
+    )
+    def test_cors_allowed_origins_wildcard(self):
+        self.check_error_codes([])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*example.com"])
+    def test_cors_allowed_origins_wildcard_partial_label(self):
+        errors = self.check_error_codes(["corsheaders.E016"])
+        assert "in CORS_ALLOWED_ORIGINS" in errors[0].msg
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://foo.*.example.com"])
+    def test_cors_allowed_origins_wildcard_not_first(self):
+        self.check_error_codes(["corsheaders.E016"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.*.example.com"])
+    def test_cors_allowed_origins_wildcard_twice(self):
+        self.check_error_codes(["corsheaders.E016"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*"])
+    def test_cors_allowed_origins_wildcard_alone(self):
+        self.check_error_codes(["corsheaders.E016"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.:8000"])
+    def test_cors_allowed_origins_wildcard_no_suffix(self):
+        self.check_error_codes(["corsheaders.E016"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.com", "http://*.com:8000"])
+    def test_cors_allowed_origins_wildcard_top_level_domain(self):
+        self.check_error_codes(["corsheaders.E016", "corsheaders.E016"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.example..com"])
+    def test_cors_allowed_origins_wildcard_empty_label(self):
+        self.check_error_codes(["corsheaders.E016"])
+
     @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com/foobar"])
     def test_cors_allowed_origins_path(self):
         errors = self.check_error_codes(["corsheaders.E014"])
@@ -146,6 +193,204 @@ class ChecksTests(SimpleTestCase):
     def test_cors_expose_headers_non_string(self):
         self.check_error_codes(["corsheaders.E008"])
 
+    @override_settings(CORS_ORIGIN_CACHE_SIZE="10")
+    def test_cors_origin_cache_size_non_integer(self):
+        self.check_error_codes(["corsheaders.E017"])
+
+    @override_settings(CORS_ORIGIN_CACHE_SIZE=-1)
+    def test_cors_origin_cache_size_negative(self):
+        self.check_error_codes(["corsheaders.E017"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_cors_allowed_origins_source_dotted_path(self):
+        self.check_error_codes([])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE=list)
+    def test_cors_allowed_origins_source_callable(self):
+        self.check_error_codes([])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.does_not_exist")
+    def test_cors_allowed_origins_source_missing(self):
+        self.check_error_codes(["corsheaders.E018"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE=object())
+    def test_cors_allowed_origins_source_not_callable(self):
+        self.check_error_codes(["corsheaders.E018"])
+
+    @override_settings(CORS_INSTRUMENTATION="tests.utils.does_not_exist")
+    def test_cors_instrumentation_missing(self):
+        self.check_error_codes(["corsheaders.E025"])
+
+    @override_settings(CORS_INSTRUMENTATION=object())
+    def test_cors_instrumentation_not_callable(self):
+        self.check_error_codes(["corsheaders.E025"])
+
+    @override_settings(CORS_TRACE="yes")
+    def test_cors_trace_non_bool(self):
+        self.check_error_codes(["corsheaders.E026"])
+
+    @override_settings(CORS_TRACE_SECRET="")
+    def test_cors_trace_secret_empty(self):
+        self.check_error_codes(["corsheaders.E027"])
+
+    @override_settings(CORS_TRACE_SECRET=1234)
+    def test_cors_trace_secret_non_string(self):
+        self.check_error_codes(["corsheaders.E027"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_cors_allowed_origins_source_rows(self):
+        rows = ["https://example.com", "null", "example.com", "https://a.com/", 1]
+        with origin_source_rows(rows):
+            assert check_settings() == []
+            warnings = check_settings(databases=["default"])
+        assert all(isinstance(w, Warning) for w in warnings)
+        assert [w.id for w in warnings] == ["corsheaders.W001"] * 3
+        assert [w.msg for w in warnings] == [
+            (
+                "Origin 'example.com' in CORS_ALLOWED_ORIGINS_SOURCE is "
+                + "missing scheme or netloc"
+            ),
+            "Origin 'https://a.com/' in CORS_ALLOWED_ORIGINS_SOURCE should not have path",
+            "Origin 1 in CORS_ALLOWED_ORIGINS_SOURCE should be a string",
+        ]
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.test_checks.fail_to_load")
+    def test_cors_allowed_origins_source_load_failure(self):
+        warnings = check_settings(databases=["default"])
+        assert [w.id for w in warnings] == ["corsheaders.W002"]
+        assert warnings[0].msg == (
+            "CORS_ALLOWED_ORIGINS_SOURCE could not be loaded: "
+            + "RuntimeError('no table')"
+        )
+
+    def test_cors_allowed_origins_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+            f.write("# Partners\nhttps://example.com\nnull\n")
+            f.flush()
+            with override_settings(CORS_ALLOWED_ORIGINS_FILE=f.name):
+                self.check_error_codes([])
+
+    def test_cors_allowed_origins_file_invalid_origins(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+            f.write("example.com\nhttps://*example.com\n")
+            f.flush()
+            with override_settings(CORS_ALLOWED_ORIGINS_FILE=f.name):
+                errors = self.check_error_codes(
+                    ["corsheaders.E013", "corsheaders.E016"]
+                )
+        assert "in CORS_ALLOWED_ORIGINS_FILE" in errors[0].msg
+
+    @override_settings(CORS_ALLOWED_ORIGINS_FILE=1)
+    def test_cors_allowed_origins_file_non_path(self):
+        self.check_error_codes(["corsheaders.E020"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_FILE="/does/not/exist.txt")
+    def test_cors_allowed_origins_file_missing(self):
+        self.check_error_codes(["corsheaders.E021"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE_REFRESH="5")
+    def test_cors_allowed_origins_source_refresh_non_number(self):
+        self.check_error_codes(["corsheaders.E019"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE_REFRESH=-1)
+    def test_cors_allowed_origins_source_refresh_negative(self):
+        self.check_error_codes(["corsheaders.E019"])
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE_REFRESH=0.5)
+    def test_cors_allowed_origins_source_refresh_float(self):
+        self.check_error_codes([])
+
+    @override_settings(
+        CORS_PATH_POLICIES=[
+            ("/api/", {"CORS_ALLOW_ALL_ORIGINS": True}),
+            (re.compile(r"^/admin/"), None),
+        ]
+    )
+    def test_cors_path_policies(self):
+        self.check_error_codes([])
+
+    @override_settings(CORS_PATH_POLICIES={"/api/": None})
+    def test_cors_path_policies_non_sequence(self):
+        self.check_error_codes(["corsheaders.E022"])
+
+    @override_settings(CORS_PATH_POLICIES=[("/api/", True)])
+    def test_cors_path_policies_invalid_settings(self):
+        self.check_error_codes(["corsheaders.E022"])
+
+    @override_settings(CORS_PATH_POLICIES=[(1, None)])
+    def test_cors_path_policies_invalid_path(self):
+        self.check_error_codes(["corsheaders.E022"])
+
+    @override_settings(
+        CORS_PATH_POLICIES=[("/api/", {"CORS_URLS_REGEX": "^/", "CORS_FOO": 1})]
+    )
+    def test_cors_path_policies_unknown_setting(self):
+        errors = self.check_error_codes(["corsheaders.E023", "corsheaders.E023"])
+        assert errors[0].msg == (
+            "Setting 'CORS_FOO' for path '/api/' in CORS_PATH_POLICIES can't be "
+            + "overridden per path."
+        )
+
+    @override_settings(
+        CORS_PATH_POLICIES=[
+            (
+                "/api/",
+                {
+                    "CORS_ALLOWED_ORIGINS": ["https://*.com"],
+                    "CORS_ALLOW_METHODS": "GET",
+                    "CORS_PREFLIGHT_MAX_AGE": -5,
+                },
+            )
+        ]
+    )
+    def test_cors_path_policies_invalid_values(self):
+        errors = self.check_error_codes(
+            ["corsheaders.E002", "corsheaders.E004", "corsheaders.E016"]
+        )
+        assert errors[0].msg == (
+            "CORS_ALLOW_METHODS for path '/api/' in CORS_PATH_POLICIES should be "
+            + "a sequence of strings."
+        )
+        assert errors[2].msg == (
+            "Origin 'https://*.com' in CORS_ALLOWED_ORIGINS for path '/api/' in "
+            + "CORS_PATH_POLICIES has an invalid wildcard"
+        )
+
+    @override_settings(
+        CORS_PATH_POLICIES=[
+            (
+                "/api/",
+                {
+                    "CORS_ALLOW_HEADERS": "x-custom",
+                    "CORS_ALLOW_CREDENTIALS": 1,
+                    "CORS_ALLOW_PRIVATE_NETWORK": "yes",
+                    "CORS_PREFLIGHT_STRICT": None,
+                    "CORS_ALLOW_ALL_ORIGINS": "no",
+                    "CORS_ALLOWED_ORIGIN_REGEXES": [1],
+                    "CORS_EXPOSE_HEADERS": "x-custom",
+                },
+            )
+        ]
+    )
+    def test_cors_path_policies_invalid_types(self):
+        self.check_error_codes(
+            [
+                "corsheaders.E001",
+                "corsheaders.E003",
+                "corsheaders.E015",
+                "corsheaders.E024",
+                "corsheaders.E005",
+                "corsheaders.E007",
+                "corsheaders.E008",
+            ]
+        )
+
+    @override_settings(
+        CORS_PATH_POLICIES=[("/api/", {"CORS_ALLOWED_ORIGINS": ["example.com"]})]
+    )
+    def test_cors_path_policies_origin_missing_scheme(self):
+        self.check_error_codes(["corsheaders.E013"])
+
     @override_settings(CORS_URLS_REGEX=object)
     def test_cors_urls_regex_non_string(self):
         self.check_error_codes(["corsheaders.E009"])
@@ -157,3 +402,84 @@ class ChecksTests(SimpleTestCase):
     @override_settings(CORS_REPLACE_HTTPS_REFERER="something")
     def test_cors_replace_https_referer_failure(self):
         self.check_error_codes(["corsheaders.E013"])
+
+
+class RegexChecksTests(SimpleTestCase):
+    def test_defaults_pass(self):
+        assert check_regexes() == []
+        assert check_regex_cost() == []
+
+    @override_settings(
+        CORS_ALLOWED_ORIGIN_REGEXES=[
+            r"^https://(\w+\.)*example\.com$",
+            re.compile(r"^https://([a-z0-9-]+\.)+example\.org$"),
+            r"^https://a\.example\.net$|^https://b\.example\.net$",
+        ],
+        CORS_URLS_REGEX=r"^/api/",
+    )
+    def test_safe_patterns_pass(self):
+        assert check_regexes() == []
+        assert check_regex_cost() == []
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://(\w+"])
+    def test_invalid(self):
+        errors = check_regexes()
+        assert [e.id for e in errors] == ["corsheaders.E028"]
+        assert isinstance(errors[0], Error)
+        assert errors[0].msg.startswith(
+            "CORS_ALLOWED_ORIGIN_REGEXES pattern '^https://(\\\\w+' is invalid: "
+        )
+        assert check_regex_cost() == []
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://(\w+\.?)*example\.com$"])
+    def test_nested_quantifier(self):
+        errors = check_regexes()
+        assert [e.id for e in errors] == ["corsheaders.W003"]
+        assert isinstance(errors[0], Warning)
+
+    @override_settings(CORS_URLS_REGEX=r"^/(?:[a-z]+/?)+$")
+    def test_nested_quantifier_urls_regex(self):
+        errors = check_regexes()
+        assert [e.id for e in errors] == ["corsheaders.W003"]
+        assert errors[0].msg.startswith("CORS_URLS_REGEX pattern")
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://(?>(a+))+$"])
+    def test_nested_quantifier_atomic(self):
+        if sys.version_info < (3, 11):
+            pytest.skip("Atomic groups need Python 3.11+")
+        assert check_regexes() == []
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://\w+\.example\.com"])
+    def test_unanchored(self):
+        errors = check_regexes()
+        assert [e.id for e in errors] == ["corsheaders.W004"]
+
+    @override_settings(
+        CORS_PATH_POLICIES=[
+            (
+                re.compile(r"^/(\d+)*/$"),
+                {"CORS_ALLOWED_ORIGIN_REGEXES": [r"^https://a\.com|^https://b\.com$"]},
+            )
+        ]
+    )
+    def test_path_policies(self):
+        errors = check_regexes()
+        assert [e.id for e in errors] == ["corsheaders.W003", "corsheaders.W004"]
+        assert errors[0].msg.startswith("CORS_PATH_POLICIES[0] pattern")
+        assert errors[1].msg.startswith(
+            "CORS_PATH_POLICIES[0] CORS_ALLOWED_ORIGIN_REGEXES pattern"
+        )
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://(a|aa)+$"])
+    def test_slow(self):
+        # Not caught by the nested quantifier heuristic, but by timing.
+        assert check_regexes() == []
+        errors = check_regex_cost()
+        assert [e.id for e in errors] == ["corsheaders.W005"]
+        assert isinstance(errors[0], Warning)
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://(a|aa)+$"])
+    def test_slow_deploy_check(self):
+        out = StringIO()
+        call_command("check", deploy=True, stderr=out)
+        assert "corsheaders.W005" in out.getvalue()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.urls import URLResolver, path
+
+from corsheaders.decorators import cors_policy, get_view_policy, resolve_view_policy
+from corsheaders.policy import get_policy, view_policies_used
+from tests import views
+
+# A URLconf mapping the paths in tests.urls to other views.
+urlpatterns = [
+    path("", views.public),
+    path("public/", views.index),
+]
+
+
+class CorsPolicyDecoratorTests(SimpleTestCase):
+    def test_function(self):
+        @cors_policy(allow_all_origins=True)
+        def view(request):
+            return HttpResponse()
+
+        assert view_policies_used() is True
+        policy = get_view_policy(view)
+        assert policy is not None
+        assert policy.allow_all_origins is True
+
+    def test_unknown_argument(self):
+        with pytest.raises(TypeError) as excinfo:
+            cors_policy(urls_regex=r"^/")
+
+        assert str(excinfo.value) == (
+            "cors_policy() got an unexpected keyword argument 'urls_regex'"
+        )
+
+    def test_invalid_type(self):
+        with pytest.raises(TypeError) as excinfo:
+            cors_policy(allow_methods="GET")
+
+        assert str(excinfo.value) == (
+            "cors_policy() argument 'allow_methods' should be a sequence of strings."
+        )
+
+    def test_invalid_max_age(self):
+        with pytest.raises(ValueError) as excinfo:
+            cors_policy(preflight_max_age=-5)
+
+        assert str(excinfo.value) == (
+            "cors_policy() argument 'preflight_max_age' should be an integer "
+            + "greater than or equal to zero."
+        )
+
+    def test_invalid_wildcard(self):
+        with pytest.raises(ValueError) as excinfo:
+            cors_policy(allowed_origins=["https://*.com"])
+
+        assert str(excinfo.value) == (
+            "Origin 'https://*.com' in cors_policy() argument 'allowed_origins' "
+            + "has an invalid wildcard"
+        )
+
+    def test_undecorated(self):
+        assert get_view_policy(views.index) is None
+
+    def test_class_based_view(self):
+        policy = get_view_policy(views.PartnerView.as_view())
+        assert policy is not None
+        assert policy.allowed_origins == ("https://partner.example.com",)
+        assert policy.allow_credentials is True
+
+    def test_viewset(self):
+        # DRF's ViewSetMixin.as_view() sets cls rather than view_class.
+        def view(request):
+            return HttpResponse()
+
+        view.cls = views.PartnerView  # type: ignore [attr-defined]
+        assert get_view_policy(view) is not None
+
+    def test_compiled_once(self):
+        assert get_view_policy(views.public) is get_view_policy(views.public)
+
+    @override_settings(CORS_ALLOW_HEADERS=["x-setting"])
+    def test_inherits_settings(self):
+        policy = get_view_policy(views.public)
+        assert policy is not None
+        assert policy.allow_headers == "x-setting"
+        assert policy.expose_headers == "x-view"
+
+    def test_recompiled_on_setting_changed(self):
+        policy = get_view_policy(views.public)
+        with override_settings(CORS_ALLOW_HEADERS=["x-setting"]):
+            overridden = get_view_policy(views.public)
+        assert overridden is not policy
+        assert overridden is not None
+        assert overridden.allow_headers == "x-setting"
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_shares_origin_sources(self):
+        @cors_policy(expose_headers=["x-view"])
+        def view(request):
+            return HttpResponse()
+
+        policy = get_view_policy(view)
+        assert policy is not None
+        assert policy.origin_sources == get_policy().origin_sources
+        assert policy.origin_sources != ()
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins",
+    )
+    def test_replaces_origin_settings(self):
+        policy = get_view_policy(views.public)
+        assert policy is not None
+        assert policy.allowed_origins == ()
+        assert policy.origin_sources == ()
+
+    def test_resolve_view_policy(self):
+        assert resolve_view_policy("/public/") is get_view_policy(views.public)
+        assert resolve_view_policy("/") is None
+        assert resolve_view_policy("/does-not-exist/") is None
+
+    def test_resolve_view_policy_cached(self):
+        with mock.patch.object(
+            URLResolver, "resolve", autospec=True, side_effect=URLResolver.resolve
+        ) as resolve:
+            first = resolve_view_policy("/resolved-once/")
+            second = resolve_view_policy("/resolved-once/")
+        assert first is second is None
+        assert resolve.call_count == 1
+
+    def test_resolve_view_policy_follows_settings(self):
+        resolve_view_policy("/public/")
+        with override_settings(CORS_ALLOW_HEADERS=["x-setting"]):
+            policy = resolve_view_policy("/public/")
+        assert policy is not None
+        assert policy.allow_headers == "x-setting"
+
+    def test_resolve_view_policy_follows_urlconf(self):
+        resolve_view_policy("/")
+        resolve_view_policy("/public/")
+        with override_settings(ROOT_URLCONF=__name__):
+            assert resolve_view_policy("/") is get_view_policy(views.public)
+            assert resolve_view_policy("/public/") is None
+        assert resolve_view_policy("/") is None
+
+    def test_resolve_view_policy_urlconf_argument(self):
+        assert resolve_view_policy("/", __name__) is get_view_policy(views.public)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator, Iterator
 from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
 
-from django.http import HttpResponse
-from django.test import TestCase
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
 from django.test.utils import override_settings
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
+from corsheaders.instrumentation import CorsEvent
 from corsheaders.middleware import (
     ACCESS_CONTROL_ALLOW_CREDENTIALS,
     ACCESS_CONTROL_ALLOW_HEADERS,
@@ -15,8 +21,17 @@ from corsheaders.middleware import (
     ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK,
     ACCESS_CONTROL_EXPOSE_HEADERS,
     ACCESS_CONTROL_MAX_AGE,
+    CorsMiddleware,
+    patch_vary_origin,
+)
+from corsheaders.responses import PreflightResponse
+from corsheaders.sources import OriginSource
+from tests.utils import (
+    origin_source_rows,
+    prepend_middleware,
+    recorded_events,
+    temporary_check_request_handler,
 )
-from tests.utils import prepend_middleware, temporary_check_request_handler
 
 
 class ShortCircuitMiddleware(MiddlewareMixin):
@@ -33,6 +48,24 @@ class CorsMiddlewareTests(TestCase):
         resp = self.client.get("/")
         assert resp["vary"] == "origin"
 
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    def test_get_no_origin_allow_all(self):
+        resp = self.client.get("/")
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "*"
+        assert "vary" not in resp
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_CREDENTIALS=True)
+    def test_get_no_origin_allow_all_credentials(self):
+        resp = self.client.get("/")
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+        assert resp["vary"] == "origin"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_URLS_REGEX=r"^/api/")
+    def test_get_allow_all_url_not_enabled(self):
+        resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+        assert "vary" not in resp
+
     def test_get_invalid_origin(self):
         resp = self.client.get("/", headers={"origin": "https://example.com]"})
         assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
@@ -54,11 +87,187 @@ class CorsMiddlewareTests(TestCase):
         resp = self.client.get("/", headers={"origin": "https://example.org"})
         assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
 
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.org:443"])
+    def test_get_in_allowed_origins_default_port(self):
+        resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.org:8443"])
+    def test_get_not_in_allowed_origins_due_to_wrong_port(self):
+        resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.example.org"])
+    def test_get_in_allowed_origins_wildcard(self):
+        resp = self.client.get("/", headers={"origin": "https://foo.example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://foo.example.org"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://*.example.org"])
+    def test_get_not_in_allowed_origins_wildcard_apex(self):
+        resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
     @override_settings(CORS_ALLOWED_ORIGINS=["https://example.org"])
     async def test_async_get_in_allowed_origins(self):
         resp = await self.async_client.get("/async/", origin="https://example.org")
         assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
 
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_get_in_origin_source(self):
+        with origin_source_rows(["https://example.org"]):
+            resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_get_not_in_origin_source(self):
+        with origin_source_rows(["https://example.org"]):
+            resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    async def test_async_get_in_origin_source(self):
+        with origin_source_rows(["https://example.org"]):
+            resp = await self.async_client.get(
+                "/async/", headers={"origin": "https://example.org"}
+            )
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins",
+    )
+    def test_origin_source_error(self):
+        with (
+            mock.patch("tests.utils.load_origins", side_effect=RuntimeError("db down")),
+            self.assertLogs("corsheaders", "ERROR") as logs,
+        ):
+            resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert resp.status_code == HTTPStatus.OK
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        assert logs.records[0].getMessage() == (
+            "Could not load CORS origins, keeping the previous ones."
+        )
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins",
+    )
+    async def test_async_origin_source_error(self):
+        with (
+            mock.patch("tests.utils.load_origins", side_effect=RuntimeError("db down")),
+            self.assertLogs("corsheaders", "ERROR"),
+        ):
+            resp = await self.async_client.get(
+                "/async/", headers={"origin": "https://example.com"}
+            )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins",
+        CORS_PATH_POLICIES=[("/unauthorized/", None)],
+    )
+    def test_origin_source_only_refreshed_when_consulted(self):
+        with mock.patch("tests.utils.load_origins", return_value=[]) as load:
+            self.client.get("/")
+            self.client.get("/unauthorized/", headers={"origin": "https://example.com"})
+            assert load.call_count == 0
+            self.client.get("/", headers={"origin": "https://example.com"})
+            assert load.call_count == 1
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_PATH_POLICIES=[
+            ("/async/", {"CORS_ALLOWED_ORIGINS": ["https://example.org"]}),
+            ("/unauthorized/", None),
+        ],
+    )
+    def test_get_path_policies(self):
+        resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+
+        resp = self.client.get("/async/", headers={"origin": "https://example.com"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+        resp = self.client.get("/async/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+        resp = self.client.get(
+            "/unauthorized/", headers={"origin": "https://example.com"}
+        )
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+        assert "vary" not in resp
+
+    @override_settings(
+        CORS_URLS_REGEX=r"^/api/",
+        CORS_PATH_POLICIES=[("/", {"CORS_ALLOW_ALL_ORIGINS": True})],
+    )
+    def test_options_path_policy_overrides_urls_regex(self):
+        resp = self.client.options(
+            "/",
+            headers={
+                "origin": "https://example.com",
+                "access-control-request-method": "GET",
+            },
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "*"
+
+    @override_settings(CORS_URLS_REGEX=r"^/api/")
+    def test_get_view_policy(self):
+        resp = self.client.get("/public/", headers={"origin": "https://example.com"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "*"
+        assert resp[ACCESS_CONTROL_EXPOSE_HEADERS] == "x-view"
+
+    @override_settings(CORS_URLS_REGEX=r"^/api/")
+    def test_options_view_policy(self):
+        resp = self.client.options(
+            "/partner/",
+            headers={
+                "origin": "https://partner.example.com",
+                "access-control-request-method": "GET",
+            },
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://partner.example.com"
+        assert resp[ACCESS_CONTROL_ALLOW_CREDENTIALS] == "true"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    def test_get_view_policy_not_allowed(self):
+        resp = self.client.get("/partner/", headers={"origin": "https://example.com"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
+    @override_settings(CORS_PATH_POLICIES=[("/public/", None)])
+    def test_view_policy_overrides_path_policy(self):
+        resp = self.client.get("/public/", headers={"origin": "https://example.com"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "*"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.org"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    def test_get_in_allowed_origins_cached(self):
+        resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+        resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    def test_signal_called_when_origin_cached_as_denied(self):
+        calls = 0
+
+        def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            for _ in range(2):
+                resp = self.client.get("/", headers={"origin": "https://example.org"})
+                assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+
+        assert calls == 2
+
     @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com", "null"])
     def test_null_in_allowed_origins(self):
         resp = self.client.get("/", headers={"origin": "null"})
@@ -257,6 +466,86 @@ class CorsMiddlewareTests(TestCase):
         )
         assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
 
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://a.com", "https://b.com"])
+    def test_options_cloned_per_request(self):
+        first = self.client.options(
+            "/",
+            headers={"origin": "https://a.com", "access-control-request-method": "GET"},
+        )
+        second = self.client.options(
+            "/",
+            headers={"origin": "https://b.com", "access-control-request-method": "GET"},
+        )
+        assert isinstance(first, PreflightResponse)
+        assert first is not second
+        assert first[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://a.com"
+        assert second[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://b.com"
+        assert second["vary"] == "origin"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://a.com"])
+    def test_options_not_allowed_not_cloned(self):
+        resp = self.client.options(
+            "/",
+            headers={"origin": "https://b.com", "access-control-request-method": "GET"},
+        )
+        assert not isinstance(resp, PreflightResponse)
+        assert resp["vary"] == "origin"
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_ALLOW_HEADERS=["content-type", "x-token"],
+        CORS_ALLOW_METHODS=["GET", "PUT"],
+        CORS_PREFLIGHT_STRICT=True,
+    )
+    def test_options_strict(self):
+        resp = self.client.options(
+            "/",
+            headers={
+                "origin": "https://example.com",
+                "access-control-request-method": "PUT",
+                "access-control-request-headers": "x-token, x-other",
+            },
+        )
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        assert resp[ACCESS_CONTROL_ALLOW_METHODS] == "PUT"
+        assert resp[ACCESS_CONTROL_ALLOW_HEADERS] == "x-token"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_ALLOW_METHODS=["GET"],
+        CORS_PREFLIGHT_STRICT=True,
+    )
+    def test_options_strict_not_allowed(self):
+        resp = self.client.options(
+            "/",
+            headers={
+                "origin": "https://example.com",
+                "access-control-request-method": "DELETE",
+                "access-control-request-headers": "x-other",
+            },
+        )
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        assert ACCESS_CONTROL_ALLOW_METHODS not in resp
+        assert ACCESS_CONTROL_ALLOW_HEADERS not in resp
+
+    @override_settings(CORS_ALLOW_METHODS=["GET"], CORS_PREFLIGHT_STRICT=True)
+    def test_options_strict_signal(self):
+        def allow_all(*args, **kwargs):
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            resp = self.client.options(
+                "/",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            )
+        assert not isinstance(resp, PreflightResponse)
+        assert resp[ACCESS_CONTROL_ALLOW_METHODS] == "GET"
+        assert ACCESS_CONTROL_ALLOW_HEADERS not in resp
+
     def test_options_empty_request_method(self):
         resp = self.client.options(
             "/",
@@ -401,6 +690,106 @@ class CorsMiddlewareTests(TestCase):
 
             assert calls == 1
 
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_URLS_REGEX=r"^/api/"
+    )
+    def test_signal_called_once_when_url_and_origin_not_allowed(self):
+        calls = 0
+
+        def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            resp = self.client.get("/", headers={"origin": "https://example.org"})
+
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+        assert calls == 1
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_signal_not_called_when_origin_allowed(self):
+        calls = 0
+
+        def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            self.client.get("/", headers={"origin": "https://example.com"})
+
+        assert calls == 0
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_async_signal_handler_that_returns_true(self):
+        calls = 0
+
+        async def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            resp = await self.async_client.options(
+                "/async/",
+                headers={
+                    "origin": "https://example.org",
+                    "access-control-request-method": "GET",
+                },
+            )
+
+        assert resp.status_code == HTTPStatus.OK
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+        assert calls == 1
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_async_signal_handler_that_returns_false(self):
+        async def deny_all(sender, request, **kwargs):
+            return False
+
+        with temporary_check_request_handler(deny_all):
+            resp = await self.async_client.get(
+                "/async/", headers={"origin": "https://example.org"}
+            )
+
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_URLS_REGEX=r"^/api/"
+    )
+    async def test_async_signal_called_once_when_url_and_origin_not_allowed(self):
+        calls = 0
+
+        def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            resp = await self.async_client.get(
+                "/async/", headers={"origin": "https://example.org"}
+            )
+
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+        assert calls == 1
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_async_signal_not_called_when_origin_allowed(self):
+        calls = 0
+
+        async def allow_all(sender, request, **kwargs):
+            nonlocal calls
+            calls += 1
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            await self.async_client.get(
+                "/async/", headers={"origin": "https://example.com"}
+            )
+
+        assert calls == 0
+
     @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
     @prepend_middleware(f"{__name__}.ShortCircuitMiddleware")
     def test_get_short_circuit(self):
@@ -465,3 +854,271 @@ class CorsMiddlewareTests(TestCase):
             "/delete-enabled/", headers={"origin": "https://example.com"}
         )
         assert ACCESS_CONTROL_ALLOW_ORIGIN in resp
+
+
+class UnreadFile(BytesIO):
+    def read(self, size: int | None = -1) -> bytes:
+        raise AssertionError("file read")
+
+
+@override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+class StreamingResponseTests(SimpleTestCase):
+    """
+    CorsMiddleware only changes response headers, so streaming responses
+    must pass through without their content being consumed.
+    """
+
+    def setUp(self):
+        self.request = RequestFactory().get(
+            "/", headers={"origin": "https://example.com"}
+        )
+        self.started = False
+
+    def chunks(self) -> Iterator[bytes]:
+        self.started = True
+        yield b"chunk"
+
+    async def achunks(self) -> AsyncIterator[bytes]:
+        self.started = True
+        yield b"chunk"
+
+    def assert_cors_headers(self, response: object) -> None:
+        assert isinstance(response, (StreamingHttpResponse, FileResponse))
+        assert response[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        assert response["vary"] == "origin"
+
+    def test_streaming(self):
+        streaming = StreamingHttpResponse(self.chunks())
+        response = CorsMiddleware(lambda request: streaming)(self.request)
+        assert response is streaming
+        self.assert_cors_headers(response)
+        assert not self.started
+        assert list(streaming) == [b"chunk"]
+
+    async def test_async_streaming(self):
+        streaming = StreamingHttpResponse(self.achunks())
+
+        async def get_response(request):
+            return streaming
+
+        response = await CorsMiddleware(get_response)(self.request)  # type: ignore [misc]
+        assert response is streaming
+        self.assert_cors_headers(response)
+        assert not self.started
+        assert [chunk async for chunk in streaming] == [b"chunk"]
+
+    def test_file(self):
+        file = FileResponse(UnreadFile(b"x" * 10), filename="data.bin")
+        response = CorsMiddleware(lambda request: file)(self.request)
+        assert response is file
+        self.assert_cors_headers(response)
+        assert response["content-length"] == "10"
+
+    @override_settings(CORS_TRACE=True)
+    def test_streaming_traced(self):
+        streaming = StreamingHttpResponse(self.chunks())
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            response = CorsMiddleware(lambda request: streaming)(self.request)
+        self.assert_cors_headers(response)
+        assert not self.started
+
+
+@override_settings(CORS_INSTRUMENTATION="tests.utils.record_event")
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        recorded_events.clear()
+
+    def event(self) -> CorsEvent:
+        assert len(recorded_events) == 1
+        return recorded_events[0]
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_allowlist(self):
+        resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        event = self.event()
+        assert event.preflight is False
+        assert event.outcome == "allowlist"
+        assert event.cache_hit is None
+        assert event.duration > 0
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://\w+\.example\.com$"])
+    def test_regex_preflight(self):
+        self.client.options(
+            "/",
+            headers={
+                "origin": "https://foo.example.com",
+                "access-control-request-method": "GET",
+            },
+        )
+        event = self.event()
+        assert event.preflight is True
+        assert event.outcome == "regex"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    def test_all(self):
+        self.client.get("/", headers={"origin": "https://example.com"})
+        assert self.event().outcome == "all"
+
+    def test_denied(self):
+        resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert ACCESS_CONTROL_ALLOW_ORIGIN not in resp
+        assert self.event().outcome == "denied"
+
+    def test_no_origin(self):
+        self.client.get("/")
+        assert self.event().outcome == "no-origin"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_URLS_REGEX=r"^/api/")
+    def test_disabled(self):
+        self.client.get("/", headers={"origin": "https://example.com"})
+        assert self.event().outcome == "disabled"
+
+    def test_signal(self):
+        def allow_all(*args, **kwargs):
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            self.client.get("/", headers={"origin": "https://example.com"})
+        assert self.event().outcome == "signal"
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE="tests.utils.load_origins")
+    def test_source_asked_once(self):
+        allows = OriginSource.allows
+        with (
+            origin_source_rows(["https://example.org"]),
+            mock.patch.object(
+                OriginSource, "allows", autospec=True, side_effect=allows
+            ) as mock_allows,
+        ):
+            resp = self.client.get("/", headers={"origin": "https://example.org"})
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.org"
+        assert self.event().outcome == "source"
+        assert mock_allows.call_count == 1
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    def test_cache_hit(self):
+        self.client.get("/", headers={"origin": "https://example.com"})
+        self.client.get("/", headers={"origin": "https://example.com"})
+        assert [event.cache_hit for event in recorded_events] == [False, True]
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    async def test_cache_hit_first_lookup(self):
+        def allow_none(*args, **kwargs):
+            return False
+
+        # The origin is looked up to decide whether to send the signal, then
+        # again when adding headers, but the first lookup is reported.
+        with temporary_check_request_handler(allow_none):
+            for _ in range(2):
+                await self.async_client.get(
+                    "/async/", headers={"origin": "https://example.com"}
+                )
+        assert [event.cache_hit for event in recorded_events] == [False, True]
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    async def test_cache_hit_concurrent(self):
+        release = asyncio.Event()
+
+        async def view(request):
+            await release.wait()
+            return HttpResponse()
+
+        middleware = CorsMiddleware(view)
+        factory = RequestFactory()
+        release.set()
+        await middleware(factory.get("/", headers={"origin": "https://example.com"}))  # type: ignore [misc]
+        recorded_events.clear()
+        release.clear()
+
+        def allow_none(*args, **kwargs):
+            return False
+
+        # With a receiver, each request's origin is looked up before the view,
+        # so while the others wait in it.
+        with temporary_check_request_handler(allow_none):
+            tasks = [
+                asyncio.ensure_future(middleware(request))  # type: ignore [arg-type]
+                for request in (
+                    factory.get("/"),
+                    factory.get("/", headers={"origin": "https://new.example.com"}),
+                    factory.get("/", headers={"origin": "https://example.com"}),
+                )
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        assert {event.outcome: event.cache_hit for event in recorded_events} == {
+            "no-origin": None,
+            "denied": False,
+            "allowlist": True,
+        }
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    async def test_async(self):
+        resp = await self.async_client.get(
+            "/async/", headers={"origin": "https://example.com"}
+        )
+        assert resp[ACCESS_CONTROL_ALLOW_ORIGIN] == "https://example.com"
+        assert self.event().outcome == "allowlist"
+
+    async def test_async_signal(self):
+        async def allow_all(*args, **kwargs):
+            return True
+
+        with temporary_check_request_handler(allow_all):
+            await self.async_client.get(
+                "/async/", headers={"origin": "https://example.com"}
+            )
+        assert self.event().outcome == "signal"
+
+
+class PatchVaryOriginTests(SimpleTestCase):
+    def patched(self, vary: str | None) -> str:
+        response = HttpResponse()
+        if vary is not None:
+            response["Vary"] = vary
+        patch_vary_origin(response)
+        result: str = response["Vary"]
+        return result
+
+    def test_no_vary(self):
+        assert self.patched(None) == "origin"
+
+    def test_empty(self):
+        assert self.patched("") == "origin"
+
+    def test_other(self):
+        assert self.patched("Cookie") == "Cookie, origin"
+
+    def test_several(self):
+        assert (
+            self.patched("Accept-Encoding, Cookie, Accept-Language")
+            == "Accept-Encoding, Cookie, Accept-Language, origin"
+        )
+
+    def test_already_origin(self):
+        assert self.patched("Cookie, Origin") == "Cookie, Origin"
+
+    def test_origin_substring(self):
+        assert self.patched("X-Origin-Id") == "X-Origin-Id, origin"
+
+    def test_star(self):
+        assert self.patched("*") == "*"
+
+    def test_star_with_others(self):
+        assert self.patched("Cookie, *") == "*"
+
+    def test_matches_patch_vary_headers(self):
+        for vary in ("Cookie", "Cookie, Origin", "X-Origin-Id", "*", "Cookie, *"):
+            expected = HttpResponse()
+            expected["Vary"] = vary
+            patch_vary_headers(expected, ("origin",))
+            assert self.patched(vary) == expected["Vary"]
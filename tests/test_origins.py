@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import re
+from random import Random
+from urllib.parse import urlsplit
+
+from django.test import SimpleTestCase
+
+from corsheaders.origins import (
+    OriginRegexes,
+    OriginWildcards,
+    is_valid_wildcard,
+    origin_key,
+    parse_origin,
+)
+
+
+class OriginKeyTests(SimpleTestCase):
+    def test_no_port(self):
+        assert origin_key("https", "example.com") == ("https", "example.com")
+
+    def test_default_https_port(self):
+        assert origin_key("https", "example.com:443") == ("https", "example.com")
+
+    def test_default_http_port(self):
+        assert origin_key("http", "example.com:80") == ("http", "example.com")
+
+    def test_other_scheme_default_port_kept(self):
+        assert origin_key("http", "example.com:443") == ("http", "example.com:443")
+
+    def test_non_default_port(self):
+        assert origin_key("https", "example.com:8443") == (
+            "https",
+            "example.com:8443",
+        )
+
+    def test_ipv6_default_port(self):
+        assert origin_key("https", "[::1]:443") == ("https", "[::1]")
+
+
+def urlsplit_origin(origin: str) -> tuple[str, str] | None:
+    try:
+        url = urlsplit(origin)
+    except ValueError:
+        return None
+    return (url.scheme, url.netloc)
+
+
+class ParseOriginTests(SimpleTestCase):
+    def test_strict(self):
+        assert parse_origin("https://example.com") == ("https", "example.com")
+
+    def test_port(self):
+        assert parse_origin("http://localhost:8000") == ("http", "localhost:8000")
+
+    def test_uppercase_scheme(self):
+        assert parse_origin("HTTPS://Example.com") == ("https", "Example.com")
+
+    def test_null(self):
+        assert parse_origin("null") == ("", "")
+
+    def test_ipv6(self):
+        assert parse_origin("https://[::1]:8443") == ("https", "[::1]:8443")
+
+    def test_invalid_ipv6(self):
+        assert parse_origin("https://example.com]") is None
+
+    def test_path(self):
+        assert parse_origin("https://example.com/path") == ("https", "example.com")
+
+    def test_whitespace(self):
+        assert parse_origin(" https://exa\tmple.com") == ("https", "example.com")
+
+    def test_same_as_urlsplit(self):
+        alphabet = "aZ09.-_:/?#@[]%+ \t\né"
+        random = Random(0)
+        for _ in range(5000):
+            origin = random.choice(["https://", "http://", "h1+x.y://", "", "1a://"])
+            origin += "".join(random.choices(alphabet, k=random.randint(0, 8)))
+            assert parse_origin(origin) == urlsplit_origin(origin), origin
+
+
+class OriginRegexesTests(SimpleTestCase):
+    def test_empty(self):
+        regexes = OriginRegexes([])
+        assert len(regexes) == 0
+        assert regexes.match("https://example.com") is None
+
+    def test_match_reports_index(self):
+        regexes = OriginRegexes(
+            [r"^https://\w+\.example\.org$", r"^https://\w+\.example\.com$"]
+        )
+        assert regexes.match("https://foo.example.org") == 0
+        assert regexes.match("https://foo.example.com") == 1
+        assert regexes.match("https://example.com") is None
+
+    def test_match_is_anchored_at_start(self):
+        regexes = OriginRegexes([r"example\.com"])
+        assert regexes.match("https://example.com") is None
+        assert regexes.match("example.com") == 0
+
+    def test_capturing_groups(self):
+        regexes = OriginRegexes([r"^https://(foo|bar)\.example\.com$", r"^http://"])
+        assert regexes.match("https://bar.example.com") == 0
+        assert regexes.match("http://example.com") == 1
+
+    def test_different_flags(self):
+        regexes = OriginRegexes(
+            [re.compile(r"^https://example\.com$", re.IGNORECASE), r"^https://b"]
+        )
+        assert regexes.match("HTTPS://EXAMPLE.COM") == 0
+        assert regexes.match("https://b.example.com") == 1
+        assert regexes.match("HTTPS://B.EXAMPLE.COM") is None
+
+    def test_backreference_matched_separately(self):
+        regexes = OriginRegexes([r"^https://a", r"^https://(\w)\1\.example\.com$"])
+        assert regexes.match("https://xx.example.com") == 1
+        assert regexes.match("https://xy.example.com") is None
+
+    def test_named_group_matched_separately(self):
+        regexes = OriginRegexes(
+            [r"^https://(?P<sub>\w+)\.example\.com$", r"^https://(?P<sub>\w+)\.a$"]
+        )
+        assert regexes.match("https://foo.example.com") == 0
+        assert regexes.match("https://foo.a") == 1
+
+    def test_global_inline_flags_matched_separately(self):
+        regexes = OriginRegexes([r"^https://a$", r"(?i)^https://example\.com$"])
+        assert regexes.match("HTTPS://EXAMPLE.COM") == 1
+        assert regexes.match("HTTPS://A") is None
+
+    def test_verbose_matched_separately(self):
+        regexes = OriginRegexes(
+            [re.compile(r"^https://example\.com$  # comment", re.VERBOSE)]
+        )
+        assert regexes.match("https://example.com") == 0
+
+    def test_exact_compiled(self):
+        regexes = OriginRegexes([r"^https://a\.com$", r"https://example\.com\Z"])
+        assert regexes._combined == ()
+        assert regexes.match("https://example.com") == 1
+        assert regexes.match("https://a.com") == 0
+        assert regexes.match("https://a.com\n") == 0
+        assert regexes.match("https://example.com\n") is None
+        assert regexes.match("https://a.co") is None
+
+    def test_label_compiled(self):
+        regexes = OriginRegexes(
+            [
+                r"^https://[a-z0-9-]{1,5}\.example\.org$",
+                r"^https://(\w+)\.example\.com$",
+                r"^http://[^.]+\.example\.com$",
+            ]
+        )
+        assert regexes._combined == ()
+        assert regexes.match("https://foo-1.example.org") == 0
+        assert regexes.match("https://Foo.example.org") is None
+        assert regexes.match("https://foobar.example.org") is None
+        assert regexes.match("https://foo_é.example.com") == 1
+        assert regexes.match("https://foo-1.example.com") is None
+        assert regexes.match("https://a.b.example.com") is None
+        assert regexes.match("https://.example.com") is None
+        assert regexes.match("http://foo-é_1.example.com") == 2
+        assert regexes.match("http://a.b.example.com") is None
+
+    def test_not_compiled(self):
+        regexes = OriginRegexes(
+            [
+                r"^https://.*\.example\.com$",
+                r"^https://\w+\.example\.com",
+                r"^https://(\w+\.)?example\.com$",
+                re.compile(r"^https://\w+\.example\.com$", re.IGNORECASE),
+            ]
+        )
+        assert regexes._exact == {}
+        assert regexes._labels == {}
+        assert regexes.match("https://a.b.example.com") == 0
+        assert regexes.match("https://FOO.EXAMPLE.COM") == 3
+
+    def test_compiled_logged(self):
+        exact = r"^https://a\.com$"
+        label = r"^https://\w+\.a\.com$"
+        with self.assertLogs("corsheaders", "DEBUG") as logs:
+            OriginRegexes([exact, label, r"^http"])
+        assert [record.getMessage() for record in logs.records] == [
+            f"Matching CORS_ALLOWED_ORIGIN_REGEXES pattern {exact!r} by exact lookup.",
+            f"Matching CORS_ALLOWED_ORIGIN_REGEXES pattern {label!r} by suffix lookup.",
+        ]
+
+    def test_compiled_same_as_regex(self):
+        patterns = [
+            r"^https://\w+\.example\.com$",
+            r"^https://[a-z0-9-]+\.example\.com\Z",
+            r"https://([^.]+)\.example\.com$",
+            r"^http://\d*\.example\.com$",
+            r"^https://app-[\w-]{1,3}?\.example\.com$",
+        ]
+        alphabet = "abZ09_-.:/\né٣"
+        random = Random(0)
+        for pattern in patterns:
+            regexes = OriginRegexes([pattern])
+            compiled = re.compile(pattern)
+            for _ in range(1000):
+                origin = (
+                    random.choice(["https://", "http://", "https://app-"])
+                    + "".join(random.choices(alphabet, k=random.randint(0, 5)))
+                    + random.choice([".example.com", "example.com", ""])
+                    + random.choice(["", "\n"])
+                )
+                assert (regexes.match(origin) is not None) == (
+                    compiled.match(origin) is not None
+                ), (pattern, origin)
+
+
+class OriginWildcardsTests(SimpleTestCase):
+    def test_empty(self):
+        wildcards = OriginWildcards()
+        assert not wildcards
+        assert not wildcards.match(("https", "example.com"))
+
+    def test_subdomain(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert wildcards
+        assert wildcards.match(("https", "foo.example.com"))
+
+    def test_nested_subdomain(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert wildcards.match(("https", "foo.bar.example.com"))
+
+    def test_apex_not_matched(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert not wildcards.match(("https", "example.com"))
+
+    def test_other_domain(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert not wildcards.match(("https", "foo.example.org"))
+        assert not wildcards.match(("https", "fooexample.com"))
+        assert not wildcards.match(("https", "foo.notexample.com"))
+
+    def test_scheme(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert not wildcards.match(("http", "foo.example.com"))
+
+    def test_port(self):
+        wildcards = OriginWildcards([("https", "*.example.com:8443")])
+        assert wildcards.match(("https", "foo.example.com:8443"))
+        assert not wildcards.match(("https", "foo.example.com"))
+        assert not wildcards.match(("https", "foo.example.com:9000"))
+
+    def test_multiple(self):
+        wildcards = OriginWildcards(
+            [("https", "*.example.com"), ("https", "*.eu.example.org")]
+        )
+        assert wildcards.match(("https", "a.example.com"))
+        assert wildcards.match(("https", "a.eu.example.org"))
+        assert not wildcards.match(("https", "a.us.example.org"))
+
+    def test_ipv6(self):
+        wildcards = OriginWildcards([("https", "*.example.com")])
+        assert not wildcards.match(("https", "[::1]"))
+
+    def test_top_level_domain_skipped(self):
+        wildcards = OriginWildcards([("https", "*.com"), ("https", "*.com:8443")])
+        assert not wildcards
+        assert not wildcards.match(("https", "evil.com"))
+        assert not wildcards.match(("https", "evil.com:8443"))
+
+    def test_double_wildcard_skipped(self):
+        wildcards = OriginWildcards([("https", "*.*.example.com")])
+        assert not wildcards
+        assert not wildcards.match(("https", "anything.example.com"))
+        assert not wildcards.match(("https", "a.b.example.com"))
+
+
+class IsValidWildcardTests(SimpleTestCase):
+    def test_valid(self):
+        assert is_valid_wildcard("*.example.com")
+        assert is_valid_wildcard("*.eu.example.com:8443")
+
+    def test_invalid(self):
+        for netloc in (
+            "*.com",
+            "*.com:443",
+            "*.*.example.com",
+            "*example.com",
+            "foo.*.example.com",
+            "*.example..com",
+            "*.",
+            "*.:8000",
+        ):
+            assert not is_valid_wildcard(netloc), netloc
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import re
+
+from django.test import SimpleTestCase
+
+from corsheaders.paths import PathIndex
+
+
+class PathIndexTests(SimpleTestCase):
+    def test_empty(self):
+        assert PathIndex([]).resolve("/") is None
+
+    def test_prefix(self):
+        index = PathIndex(["/api/", "/admin/"])
+        assert index.resolve("/api/users/") == 0
+        assert index.resolve("/admin/") == 1
+        assert index.resolve("/ap") is None
+        assert index.resolve("/other/") is None
+
+    def test_first_prefix_wins(self):
+        index = PathIndex(["/api/partner/", "/api/"])
+        assert index.resolve("/api/partner/orders/") == 0
+        assert index.resolve("/api/public/") == 1
+
+        index = PathIndex(["/api/", "/api/partner/"])
+        assert index.resolve("/api/partner/orders/") == 0
+
+    def test_duplicate_prefix(self):
+        index = PathIndex(["/api/", "/api/"])
+        assert index.resolve("/api/") == 0
+
+    def test_regex(self):
+        index = PathIndex([re.compile(r"^/v\d+/")])
+        assert index.resolve("/v2/items/") == 0
+        assert index.resolve("/vx/items/") is None
+
+    def test_regex_before_prefix(self):
+        index = PathIndex([re.compile(r"^/api/v1/"), "/api/"])
+        assert index.resolve("/api/v1/items/") == 0
+        assert index.resolve("/api/v2/items/") == 1
+
+    def test_regex_after_prefix(self):
+        index = PathIndex(["/api/", re.compile(r"^/api/v1/")])
+        assert index.resolve("/api/v1/items/") == 0
+        assert index.resolve("/v1/") is None
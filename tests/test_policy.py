@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from corsheaders.middleware import CorsMiddleware
+from corsheaders.policy import CorsPolicy
+from corsheaders.responses import PreflightResponse
+
+
+class CorsPolicyTests(SimpleTestCase):
+    def test_defaults(self):
+        policy = CorsPolicy()
+        assert policy.allow_all_origins is False
+        assert policy.allowed_origins == ()
+        assert policy.allow_headers == (
+            "accept, authorization, content-type, user-agent, x-csrftoken, "
+            + "x-requested-with"
+        )
+        assert policy.allow_methods == "DELETE, GET, OPTIONS, PATCH, POST, PUT"
+        assert policy.expose_headers == ""
+        assert policy.preflight_max_age == "86400"
+
+    def test_header_blocks_echo(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"],
+            allow_credentials=True,
+            allow_headers=["content-type"],
+            allow_methods=["GET"],
+            preflight_max_age=10,
+        )
+        assert policy.wildcard_origin is False
+        assert policy.simple_headers == (("access-control-allow-credentials", "true"),)
+        assert policy.preflight_headers == (
+            ("access-control-allow-credentials", "true"),
+            ("access-control-allow-headers", "content-type"),
+            ("access-control-allow-methods", "GET"),
+            ("access-control-max-age", "10"),
+        )
+
+    def test_header_blocks_wildcard(self):
+        policy = CorsPolicy(
+            allow_all_origins=True,
+            expose_headers=["x-foo"],
+            allow_headers=["content-type"],
+            allow_methods=["GET"],
+            preflight_max_age=0,
+        )
+        assert policy.wildcard_origin is True
+        assert policy.simple_headers == (
+            ("access-control-allow-origin", "*"),
+            ("access-control-expose-headers", "x-foo"),
+        )
+        assert policy.preflight_headers == (
+            ("access-control-allow-origin", "*"),
+            ("access-control-expose-headers", "x-foo"),
+            ("access-control-allow-headers", "content-type"),
+            ("access-control-allow-methods", "GET"),
+        )
+
+    def test_header_blocks_allow_all_with_credentials_echoes(self):
+        policy = CorsPolicy(allow_all_origins=True, allow_credentials=True)
+        assert policy.wildcard_origin is False
+
+    def test_no_max_age(self):
+        assert CorsPolicy(preflight_max_age=0).preflight_max_age == ""
+
+    def test_null_origin(self):
+        assert CorsPolicy(allowed_origins=["null"]).allow_null_origin is True
+
+    def test_regexes_compiled(self):
+        compiled = re.compile(r"^https://example\.org$")
+        policy = CorsPolicy(
+            allowed_origin_regexes=[r"^https://example\.com$", compiled]
+        )
+        patterns = policy.allowed_origin_regexes.patterns
+        assert patterns[0].pattern == r"^https://example\.com$"
+        assert patterns[1] is compiled
+
+    def test_immutable(self):
+        policy = CorsPolicy()
+        with pytest.raises(AttributeError, match="CorsPolicy is immutable"):
+            policy.allow_all_origins = True
+
+    def test_immutable_delete(self):
+        policy = CorsPolicy()
+        with pytest.raises(AttributeError, match="CorsPolicy is immutable"):
+            del policy.allow_all_origins
+
+    def test_match_origin(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com", "https://*.example.org", "null"],
+            allowed_origin_regexes=[r"^https://\w+\.example\.net$"],
+        )
+        assert policy.match_origin("https://example.com") is True
+        assert policy.match_origin("https://foo.example.org") is True
+        assert policy.match_origin("https://foo.example.net") is True
+        assert policy.match_origin("null") is True
+        assert policy.match_origin("https://example.net") is False
+        assert policy.match_origin("https://example.com]") is None
+
+    def test_match_origin_invalid_wildcard(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://*.com", "https://*.*.example.com"]
+        )
+        assert policy.match_origin("https://evil.com") is False
+        assert policy.match_origin("https://anything.example.com") is False
+
+    def test_match_origin_allow_all(self):
+        policy = CorsPolicy(allow_all_origins=True)
+        assert policy.match_origin("https://example.com") is True
+        assert policy.match_origin("https://example.com]") is None
+
+    def test_origin_cache_disabled(self):
+        assert CorsPolicy().origin_cache_info() is None
+
+    def test_origin_cache(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"], origin_cache_size=2
+        )
+        assert policy.match_origin("https://example.com") is True
+        assert policy.match_origin("https://example.com") is True
+        assert policy.match_origin("https://example.org") is False
+        cache_info = policy.origin_cache_info()
+        assert cache_info is not None
+        assert cache_info.hits == 1
+        assert cache_info.misses == 2
+
+    def test_origin_cache_bounded(self):
+        policy = CorsPolicy(origin_cache_size=2)
+        for i in range(10):
+            policy.match_origin(f"https://{i}.example.com")
+        cache_info = policy.origin_cache_info()
+        assert cache_info is not None
+        assert cache_info.currsize == 2
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=True,
+        CORS_EXPOSE_HEADERS=["x-foo", "x-bar"],
+    )
+    def test_from_conf(self):
+        policy = CorsPolicy.from_conf()
+        assert policy.allow_all_origins is True
+        assert policy.expose_headers == "x-foo, x-bar"
+
+    def test_for_path(self):
+        policy = CorsPolicy(urls_regex=r"^/api/")
+        assert policy.for_path("/api/") is policy
+        assert policy.for_path("/") is None
+
+    def test_for_path_policies(self):
+        public = CorsPolicy(allow_all_origins=True)
+        policy = CorsPolicy(
+            urls_regex=r"^/api/",
+            path_policies=[
+                ("/api/public/", public),
+                (re.compile(r"^/api/admin/"), None),
+            ],
+        )
+        assert policy.for_path("/api/public/items/") is public
+        assert policy.for_path("/api/admin/") is None
+        assert policy.for_path("/api/other/") is policy
+        assert policy.for_path("/other/") is None
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_EXPOSE_HEADERS=["x-foo"],
+        CORS_PATH_POLICIES=[
+            ("/public/", {"CORS_ALLOW_ALL_ORIGINS": True}),
+            ("/admin/", None),
+        ],
+    )
+    def test_from_conf_path_policies(self):
+        policy = CorsPolicy.from_conf()
+        public = policy.for_path("/public/")
+        assert public is not None
+        assert public is not policy
+        assert public.allow_all_origins is True
+        assert public.expose_headers == "x-foo"
+        assert public.path_index is None
+        assert policy.for_path("/admin/") is None
+        assert policy.for_path("/") is policy
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=True,
+        CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://.*\.example\.com$"],
+        CORS_PATH_POLICIES=[
+            ("/partner/", {"CORS_ALLOWED_ORIGINS": ["https://example.com"]}),
+            ("/public/", {"CORS_ALLOW_CREDENTIALS": True}),
+        ],
+    )
+    def test_from_conf_path_policies_replace_origins(self):
+        policy = CorsPolicy.from_conf()
+        partner = policy.for_path("/partner/")
+        assert partner is not None
+        assert partner.allow_all_origins is False
+        assert len(partner.allowed_origin_regexes) == 0
+        assert partner.match_origin("https://example.com") is True
+        assert partner.match_origin("https://example.org") is False
+
+        public = policy.for_path("/public/")
+        assert public is not None
+        assert public.allow_all_origins is True
+
+    def test_origin_outcome(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com", "null"],
+            allowed_origin_regexes=[r"^https://\w+\.example\.org$"],
+        )
+        assert policy.origin_outcome("https://example.com") == "allowlist"
+        assert policy.origin_outcome("null") == "allowlist"
+        assert policy.origin_outcome("https://a.example.org") == "regex"
+        assert policy.origin_outcome("https://example.net") == "denied"
+        assert policy.origin_outcome("https://example.com]") == "denied"
+        assert CorsPolicy(allow_all_origins=True).origin_outcome("null") == "all"
+
+    def test_lookup_origin(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"],
+            allowed_origin_regexes=[r"^https://\w+\.example\.org$"],
+            origin_cache_size=10,
+        )
+        assert policy.lookup_origin("https://example.com") == (
+            True,
+            False,
+            "allowlist",
+        )
+        assert policy.lookup_origin("https://example.com") == (True, True, "allowlist")
+        assert policy.lookup_origin("https://a.example.org") == (True, False, "regex")
+        assert policy.lookup_origin("https://example.net") == (False, False, "denied")
+        assert policy.lookup_origin("https://example.com]") == (None, False, "denied")
+
+    def test_lookup_origin_no_cache(self):
+        policy = CorsPolicy(allow_all_origins=True, allow_credentials=True)
+        assert policy.lookup_origin("https://example.com") == (True, None, "all")
+
+    def test_preflight_response(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"], allow_private_network=True
+        )
+        response = policy.preflight_response(
+            "https://example.com", private_network=True
+        )
+        assert isinstance(response, PreflightResponse)
+        assert response.content == b""
+        assert response["Content-Length"] == "0"
+        assert response["Vary"] == "origin"
+        assert response["access-control-allow-origin"] == "https://example.com"
+        assert response["access-control-allow-private-network"] == "true"
+        assert response["access-control-allow-methods"] == policy.allow_methods
+
+    def test_decide_preflight(self):
+        policy = CorsPolicy(allowed_origins=["https://example.com"])
+        decision = policy.decide(
+            "/",
+            method="OPTIONS",
+            origin="https://example.com",
+            request_method="GET",
+            request_headers="",
+            private_network=False,
+        )
+        assert decision is not None
+        assert decision.preflight is True
+        assert decision.vary is True
+        headers = dict(decision.headers)
+        assert headers["Content-Length"] == "0"
+        assert headers["Vary"] == "origin"
+        assert headers["access-control-allow-origin"] == "https://example.com"
+
+    def test_decide_denied(self):
+        policy = CorsPolicy(allowed_origins=["https://example.com"])
+        decision = policy.decide(
+            "/",
+            method="GET",
+            origin="https://example.net",
+            request_method=None,
+            request_headers="",
+            private_network=False,
+        )
+        assert decision == (False, (), True)
+
+    def test_decide_disabled(self):
+        policy = CorsPolicy(urls_regex=r"^/api/")
+        decision = policy.decide(
+            "/",
+            method="GET",
+            origin="https://example.com",
+            request_method=None,
+            request_headers="",
+            private_network=False,
+        )
+        assert decision is None
+
+    def test_preflight_response_wildcard(self):
+        policy = CorsPolicy(allow_all_origins=True)
+        response = policy.preflight_response("*", private_network=True)
+        assert "Vary" not in response
+        assert response["access-control-allow-origin"] == "*"
+        assert "access-control-allow-private-network" not in response
+
+    def test_preflight_strict_grants(self):
+        policy = CorsPolicy(
+            allow_headers=["content-type", "X-Token"],
+            allow_methods=["GET", "POST"],
+            preflight_strict=True,
+        )
+        assert policy.preflight_grants("POST", "X-Token, content-type,x-other") == (
+            ("access-control-allow-methods", "POST"),
+            ("access-control-allow-headers", "x-token, content-type"),
+        )
+        assert policy.preflight_grants("PUT", "") == ()
+
+    def test_preflight_strict_wildcard_headers(self):
+        policy = CorsPolicy(allow_headers=["*"], preflight_strict=True)
+        assert policy.preflight_grants("GET", "x-a, x-a, x-b") == (
+            ("access-control-allow-methods", "GET"),
+            ("access-control-allow-headers", "x-a, x-b"),
+        )
+
+    def test_preflight_strict_cached(self):
+        policy = CorsPolicy(preflight_strict=True)
+        policy.preflight_grants("GET", "content-type")
+        policy.preflight_grants("GET", "content-type")
+        cache_info = policy.preflight_grants.cache_info()  # type: ignore [attr-defined]
+        assert cache_info.hits == 1
+        assert cache_info.misses == 1
+
+    def test_preflight_strict_response(self):
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"],
+            allow_methods=["GET"],
+            preflight_strict=True,
+        )
+        assert "access-control-allow-methods" not in policy.preflight_template
+        response = policy.preflight_response(
+            "https://example.com",
+            private_network=False,
+            request_method="GET",
+            request_headers="Content-Type",
+        )
+        assert response["access-control-allow-methods"] == "GET"
+        assert response["access-control-allow-headers"] == "content-type"
+
+    def test_preflight_strict_response_headers(self):
+        policy = CorsPolicy(
+            allow_methods=["GET"], preflight_max_age=0, preflight_strict=True
+        )
+        assert policy.response_headers(
+            "https://example.com",
+            options=True,
+            private_network=False,
+            request_method="DELETE",
+            request_headers="x-other",
+        ) == (("access-control-allow-origin", "https://example.com"),)
+
+    def test_preflight_response_independent_of_template(self):
+        policy = CorsPolicy(allowed_origins=["https://a.com", "https://b.com"])
+        response = policy.preflight_response("https://a.com", private_network=False)
+        response["Vary"] = "origin, cookie"
+        response.set_cookie("a", "b")
+        response.write(b"x")
+
+        other = policy.preflight_response("https://b.com", private_network=False)
+        assert response["access-control-allow-origin"] == "https://a.com"
+        assert other["access-control-allow-origin"] == "https://b.com"
+        assert other["Vary"] == "origin"
+        assert other.cookies == {}
+        assert other.content == b""
+        assert "access-control-allow-origin" not in policy.preflight_template
+
+
+class CorsMiddlewarePolicyTests(SimpleTestCase):
+    def test_rebuilt_on_setting_changed(self):
+        middleware = CorsMiddleware(lambda request: HttpResponse())
+        policy = middleware.policy
+
+        with override_settings(CORS_ALLOW_ALL_ORIGINS=True):
+            overridden = middleware.policy
+
+        assert policy.allow_all_origins is False
+        assert overridden.allow_all_origins is True
+        assert middleware.policy.allow_all_origins is False
+
+    def test_not_rebuilt_on_unrelated_setting(self):
+        middleware = CorsMiddleware(lambda request: HttpResponse())
+        policy = middleware.policy
+
+        with override_settings(USE_TZ=False):
+            assert middleware.policy is policy
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_ORIGIN_CACHE_SIZE=10
+    )
+    def test_origin_cache_invalidated_on_setting_changed(self):
+        middleware = CorsMiddleware(lambda request: HttpResponse())
+        assert middleware.policy.match_origin("https://example.org") is False
+
+        with override_settings(CORS_ALLOWED_ORIGINS=["https://example.org"]):
+            assert middleware.policy.match_origin("https://example.org") is True
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from corsheaders.policy import CorsPolicy, get_policy
+from corsheaders.sources import (
+    VERSION_KEY,
+    FileOriginSource,
+    OriginIndex,
+    OriginSource,
+    invalidate_origins,
+    read_origins_file,
+)
+from tests.utils import origin_source_rows
+
+LOAD_ORIGINS = "tests.utils.load_origins"
+
+
+class OriginIndexTests(SimpleTestCase):
+    def allows(self, index: OriginIndex, origin: str) -> bool:
+        scheme, _, netloc = origin.partition("://")
+        return index.allows(origin, scheme, netloc)
+
+    def test_exact(self):
+        index = OriginIndex(["https://example.com"])
+        assert self.allows(index, "https://example.com")
+        assert not self.allows(index, "https://example.org")
+
+    def test_default_port(self):
+        index = OriginIndex(["https://example.com:443"])
+        assert self.allows(index, "https://example.com")
+
+    def test_wildcard(self):
+        index = OriginIndex(["https://*.example.com"])
+        assert self.allows(index, "https://api.example.com")
+        assert not self.allows(index, "https://example.com")
+
+    def test_null(self):
+        assert self.allows(OriginIndex(["null"]), "null")
+        assert not self.allows(OriginIndex([]), "null")
+
+    def test_invalid_rows_skipped(self):
+        index = OriginIndex(["example.com", "https://[::1", None])
+        assert index.keys == frozenset()
+
+    def test_invalid_wildcards_skipped(self):
+        index = OriginIndex(["https://*.com", "https://*.*.example.com"])
+        assert index.keys == frozenset()
+        assert not index.wildcards
+        assert not self.allows(index, "https://evil.com")
+        assert not self.allows(index, "https://anything.example.com")
+
+
+class OriginSourceTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete(VERSION_KEY)
+        self.origins = ["https://example.com"]
+        self.loads = 0
+
+    def load(self) -> list[str]:
+        self.loads += 1
+        return list(self.origins)
+
+    def test_not_loaded(self):
+        source = OriginSource(self.load)
+        assert source.stale()
+        assert not source.allows("https://example.com")
+        assert self.loads == 0
+
+    def test_refresh(self):
+        source = OriginSource(self.load)
+        source.refresh()
+        assert not source.stale()
+        assert source.allows("https://example.com")
+        assert not source.allows("https://example.org")
+        assert self.loads == 1
+
+    def test_refresh_unchanged_version(self):
+        source = OriginSource(self.load, refresh_interval=0)
+        source.refresh()
+        source.refresh()
+        assert self.loads == 1
+
+    def test_refresh_changed_version(self):
+        source = OriginSource(self.load, refresh_interval=0)
+        source.refresh()
+        self.origins = ["https://example.org"]
+        cache.set(VERSION_KEY, "2")
+        source.refresh()
+        assert self.loads == 2
+        assert source.allows("https://example.org")
+        assert not source.allows("https://example.com")
+
+    def test_refresh_waits_for_interval(self):
+        source = OriginSource(self.load, refresh_interval=60)
+        source.refresh()
+        cache.set(VERSION_KEY, "2")
+        source.refresh()
+        assert self.loads == 1
+        source.expire()
+        source.refresh()
+        assert self.loads == 2
+
+    def test_load_error_keeps_index(self):
+        source = OriginSource(self.load, refresh_interval=0)
+        source.refresh()
+        self.origins = None  # type: ignore [assignment]
+        cache.set(VERSION_KEY, "2")
+        with self.assertLogs("corsheaders", "ERROR") as logs:
+            source.refresh()
+        assert logs.records[0].getMessage() == (
+            "Could not load CORS origins, keeping the previous ones."
+        )
+        assert source.allows("https://example.com")
+
+        # Retried on the next refresh.
+        self.origins = ["https://example.org"]
+        source.refresh()
+        assert source.allows("https://example.org")
+
+    def test_initial_load_error(self):
+        def load():
+            raise RuntimeError("db down")
+
+        source = OriginSource(load, refresh_interval=60)
+        with self.assertLogs("corsheaders", "ERROR"):
+            source.refresh()
+        assert source.index is None
+        assert not source.stale()
+        assert not source.allows("https://example.com")
+
+    def test_version_error(self):
+        source = OriginSource(self.load)
+        with (
+            mock.patch.object(source, "get_version", side_effect=ConnectionError),
+            self.assertLogs("corsheaders", "ERROR") as logs,
+        ):
+            source.refresh()
+        assert logs.records[0].getMessage() == (
+            "Could not check whether CORS origins changed."
+        )
+        assert self.loads == 0
+        assert not source.stale()
+
+    async def test_arefresh(self):
+        source = OriginSource(self.load)
+        await source.arefresh()
+        assert source.allows("https://example.com")
+
+    def test_from_setting_dotted_path(self):
+        source = OriginSource.from_setting(LOAD_ORIGINS)
+        assert source.load.__name__ == "load_origins"
+
+
+class FileOriginSourceTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name) / "origins.txt"
+        self.path.write_text("https://example.com\n")
+
+    def replace(self, content: str) -> None:
+        # Like a deploy script would, so the inode changes.
+        new_path = self.path.with_suffix(".new")
+        new_path.write_text(content)
+        os.replace(new_path, self.path)
+
+    def test_read_origins_file(self):
+        self.path.write_text(
+            "# Partners\nhttps://example.com\n\n  https://example.org  \r\nnull\n"
+        )
+        assert read_origins_file(self.path) == [
+            "https://example.com",
+            "https://example.org",
+            "null",
+        ]
+
+    def test_initial_load_synchronous(self):
+        source = FileOriginSource(self.path)
+        source.refresh()
+        assert source.reload_thread is None
+        assert source.allows("https://example.com")
+
+    def test_reloaded_in_background(self):
+        source = FileOriginSource(self.path, refresh_interval=0)
+        source.refresh()
+        old_index = source.index
+
+        self.replace("https://example.org\n")
+        source.refresh()
+        assert source.reload_thread is not None
+        source.reload_thread.join()
+        assert source.index is not old_index
+        assert source.allows("https://example.org")
+        assert not source.allows("https://example.com")
+
+    def test_not_reloaded_when_unchanged(self):
+        source = FileOriginSource(self.path, refresh_interval=0)
+        source.refresh()
+        old_index = source.index
+        source.refresh()
+        assert source.reload_thread is None
+        assert source.index is old_index
+
+    def test_missing_file_keeps_index(self):
+        source = FileOriginSource(self.path, refresh_interval=0)
+        source.refresh()
+        self.path.unlink()
+        source.refresh()
+        assert source.reload_thread is None
+        assert source.allows("https://example.com")
+
+    def test_policy(self):
+        with override_settings(CORS_ALLOWED_ORIGINS_FILE=str(self.path)):
+            policy = get_policy()
+            policy.refresh_origins()
+            assert policy.match_origin("https://example.com") is True
+            assert policy.match_origin("https://example.org") is False
+
+
+class CorsPolicySourceTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete(VERSION_KEY)
+
+    def test_match_origin(self):
+        source = OriginSource(lambda: ["https://example.org"])
+        policy = CorsPolicy(
+            allowed_origins=["https://example.com"], origin_sources=[source]
+        )
+        policy.refresh_origins()
+        assert policy.match_origin("https://example.com") is True
+        assert policy.match_origin("https://example.org") is True
+        assert policy.match_origin("https://example.net") is False
+        assert policy.match_origin("https://example.com]") is None
+
+    def test_source_not_cached(self):
+        origins = ["https://example.org"]
+        source = OriginSource(lambda: origins, refresh_interval=0)
+        policy = CorsPolicy(origin_sources=[source], origin_cache_size=10)
+        policy.refresh_origins()
+        assert policy.match_origin("https://example.org") is True
+
+        origins = []
+        cache.set(VERSION_KEY, "2")
+        policy.refresh_origins()
+        assert policy.match_origin("https://example.org") is False
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS_SOURCE=LOAD_ORIGINS,
+        CORS_ALLOWED_ORIGINS_SOURCE_REFRESH=60,
+    )
+    def test_from_conf(self):
+        (source,) = get_policy().origin_sources
+        assert source.refresh_interval == 60
+
+    @override_settings(CORS_ALLOWED_ORIGINS_SOURCE=LOAD_ORIGINS)
+    def test_invalidate_origins(self):
+        policy = get_policy()
+        with origin_source_rows(["https://example.com"]):
+            policy.refresh_origins()
+            assert policy.match_origin("https://example.com") is True
+
+        with origin_source_rows(["https://example.org"]):
+            policy.refresh_origins()
+            assert policy.match_origin("https://example.org") is False
+
+            invalidate_origins()
+            assert cache.get(VERSION_KEY) is not None
+            policy.refresh_origins()
+            assert policy.match_origin("https://example.org") is True
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from corsheaders.tracing import TRACE_HEADER
+from tests.utils import temporary_check_request_handler
+
+
+@override_settings(CORS_TRACE=True)
+class TracingTests(TestCase):
+    def traced(self, path: str = "/", **headers: str) -> dict[str, Any]:
+        with self.assertLogs("corsheaders.trace", "INFO") as logs:
+            self.client.get(path, headers=headers)
+        assert len(logs.records) == 1
+        data: dict[str, Any] = logs.records[0].cors_trace  # type: ignore [attr-defined]
+        return data
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_allowlist(self):
+        data = self.traced(origin="https://example.com:443")
+        assert data["method"] == "GET"
+        assert data["path"] == "/"
+        assert data["origin"] == "https://example.com:443"
+        assert data["preflight"] is False
+        assert data["policy"] == "CORS_URLS_REGEX"
+        assert data["outcome"] == "allowlist"
+        assert data["match"] == "https://example.com"
+        assert "receivers" not in data
+        assert data["headers"] == {
+            "Vary": "origin",
+            "access-control-allow-origin": "https://example.com:443",
+        }
+        assert data["duration"] >= 0
+
+    @override_settings(CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://a\.com$", r"^https://"])
+    def test_regex(self):
+        data = self.traced(origin="https://example.com")
+        assert data["outcome"] == "regex"
+        assert data["match"] == "1: ^https://"
+
+    @override_settings(CORS_URLS_REGEX=r"^/api/")
+    def test_disabled(self):
+        data = self.traced(origin="https://example.com")
+        assert data["policy"] is None
+        assert data["outcome"] == "disabled"
+        assert "match" not in data
+        assert data["headers"] == {}
+
+    @override_settings(
+        CORS_PATH_POLICIES=[("/public/", {"CORS_ALLOW_ALL_ORIGINS": True})]
+    )
+    def test_path_policy(self):
+        data = self.traced("/public/", origin="https://example.com")
+        # The view's cors_policy() takes precedence.
+        assert data["policy"] == "cors_policy()"
+
+        data = self.traced("/public/x/", origin="https://example.com")
+        assert data["policy"] == "CORS_PATH_POLICIES[0]"
+
+    def test_receivers(self):
+        def deny(*args, **kwargs):
+            return False
+
+        def allow(*args, **kwargs):
+            return True
+
+        with (
+            temporary_check_request_handler(deny),
+            temporary_check_request_handler(allow),
+        ):
+            data = self.traced(origin="https://example.com")
+
+        assert data["outcome"] == "signal"
+        assert [receiver["receiver"] for receiver in data["receivers"]] == [
+            f"{__name__}.TracingTests.test_receivers.<locals>.deny",
+            f"{__name__}.TracingTests.test_receivers.<locals>.allow",
+        ]
+        assert [receiver["result"] for receiver in data["receivers"]] == [
+            False,
+            True,
+        ]
+        assert data["headers"]["access-control-allow-origin"] == "https://example.com"
+
+    def test_receivers_async(self):
+        async def allow(*args, **kwargs):
+            return True
+
+        with temporary_check_request_handler(allow):
+            data = self.traced(origin="https://example.com")
+
+        assert data["outcome"] == "signal"
+        assert data["receivers"][0]["result"] is True
+
+    async def test_async_receivers(self):
+        def deny(*args, **kwargs):
+            return False
+
+        async def allow(*args, **kwargs):
+            return True
+
+        with (
+            temporary_check_request_handler(deny),
+            temporary_check_request_handler(allow),
+            self.assertLogs("corsheaders.trace", "INFO") as logs,
+        ):
+            resp = await self.async_client.get(
+                "/async/", headers={"origin": "https://example.com"}
+            )
+
+        assert resp["access-control-allow-origin"] == "https://example.com"
+        data = logs.records[0].cors_trace  # type: ignore [attr-defined]
+        assert data["outcome"] == "signal"
+        assert [receiver["result"] for receiver in data["receivers"]] == [
+            False,
+            True,
+        ]
+
+    def test_not_in_response(self):
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert TRACE_HEADER not in resp
+
+
+@override_settings(
+    CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_TRACE_SECRET="s3cret"
+)
+class TraceSecretTests(TestCase):
+    def test_header(self):
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            resp = self.client.get(
+                "/", headers={"origin": "https://example.com", TRACE_HEADER: "s3cret"}
+            )
+        data = json.loads(resp[TRACE_HEADER])
+        assert data["outcome"] == "allowlist"
+
+    def test_preflight(self):
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            resp = self.client.options(
+                "/",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                    TRACE_HEADER: "s3cret",
+                },
+            )
+        data = json.loads(resp[TRACE_HEADER])
+        assert data["preflight"] is True
+        assert "access-control-allow-methods" in data["headers"]
+
+    def test_wrong_secret(self):
+        with self.assertNoLogs("corsheaders.trace"):
+            resp = self.client.get(
+                "/", headers={"origin": "https://example.com", TRACE_HEADER: "guess"}
+            )
+        assert TRACE_HEADER not in resp
+
+    def test_no_header(self):
+        with self.assertNoLogs("corsheaders.trace"):
+            resp = self.client.get("/", headers={"origin": "https://example.com"})
+        assert TRACE_HEADER not in resp
+        assert resp["access-control-allow-origin"] == "https://example.com"
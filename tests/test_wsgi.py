@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import Any
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import override_settings
+
+from corsheaders.middleware import CorsMiddleware
+from corsheaders.policy import HANDLED_KEY, add_headers
+from corsheaders.wsgi import CorsWSGIMiddleware
+from tests.utils import recorded_events, temporary_check_request_handler
+
+
+def make_environ(
+    path: str = "/", method: str = "GET", headers: dict[str, str] | None = None
+) -> dict[str, Any]:
+    environ: dict[str, Any] = {"REQUEST_METHOD": method, "PATH_INFO": path}
+    for name, value in (headers or {}).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    setup_testing_defaults(environ)
+    return environ
+
+
+class RecordingApp:
+    def __init__(self, headers: list[tuple[str, str]] | None = None) -> None:
+        self.headers = headers or []
+        self.environs: list[dict[str, Any]] = []
+
+    def __call__(self, environ: dict[str, Any], start_response: Any) -> Iterable[bytes]:
+        self.environs.append(environ)
+        start_response("200 OK", list(self.headers))
+        return [b"Hello"]
+
+
+def cors_middleware_app(
+    environ: dict[str, Any], start_response: Any
+) -> Iterable[bytes]:
+    # Runs CorsMiddleware as Django's handler would, without its signals.
+    response = CorsMiddleware(lambda request: HttpResponse())(WSGIRequest(environ))
+    assert isinstance(response, HttpResponseBase)
+    start_response(
+        f"{response.status_code} {response.reason_phrase}", list(response.items())
+    )
+    return response
+
+
+class StartResponse:
+    status: str | None = None
+    headers: list[tuple[str, str]] | None = None
+
+    def __call__(
+        self, status: str, headers: list[tuple[str, str]], exc_info: Any = None
+    ) -> Any:
+        self.status = status
+        self.headers = headers
+        return lambda data: None
+
+
+class CorsWSGIMiddlewareTests(SimpleTestCase):
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_preflight_answered_directly(self):
+        app = RecordingApp()
+        start_response = StartResponse()
+        body = CorsWSGIMiddleware(app)(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert app.environs == []
+        assert list(body) == []
+        assert start_response.status == "200 OK"
+        assert start_response.headers is not None
+        headers = dict(start_response.headers)
+        assert headers["Content-Length"] == "0"
+        assert headers["Vary"] == "origin"
+        assert headers["access-control-allow-origin"] == "https://example.com"
+        assert "access-control-allow-methods" in headers
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], DEFAULT_CHARSET="latin-1"
+    )
+    def test_preflight_default_charset(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        headers = dict(start_response.headers)
+        assert headers["Content-Type"] == "text/html; charset=latin-1"
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_preflight_not_allowed(self):
+        app = RecordingApp()
+        start_response = StartResponse()
+        CorsWSGIMiddleware(app)(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.org",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert app.environs == []
+        assert start_response.headers is not None
+        assert "access-control-allow-origin" not in dict(start_response.headers)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_preflight_deferred_to_signal(self):
+        app = RecordingApp()
+        environ = make_environ(
+            method="OPTIONS",
+            headers={
+                "origin": "https://example.org",
+                "access-control-request-method": "GET",
+            },
+        )
+
+        def handler(*args, **kwargs):
+            return True
+
+        with temporary_check_request_handler(handler):
+            CorsWSGIMiddleware(app)(environ, StartResponse())
+
+        assert app.environs == [environ]
+        assert HANDLED_KEY not in environ
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"],
+        CORS_INSTRUMENTATION="tests.utils.record_event",
+    )
+    def test_instrumented_deferred_to_django_middleware(self):
+        recorded_events.clear()
+        start_response = StartResponse()
+        CorsWSGIMiddleware(cors_middleware_app)(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        headers = dict(start_response.headers)
+        assert headers["access-control-allow-origin"] == "https://example.com"
+        assert len(recorded_events) == 1
+        assert recorded_events[0].preflight is True
+        assert recorded_events[0].outcome == "allowlist"
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_TRACE_SECRET="s3cret"
+    )
+    def test_trace_deferred_to_django_middleware(self):
+        start_response = StartResponse()
+        with self.assertLogs("corsheaders.trace", "INFO"):
+            CorsWSGIMiddleware(cors_middleware_app)(
+                make_environ(
+                    headers={"origin": "https://example.com", "x-cors-trace": "s3cret"}
+                ),
+                start_response,
+            )
+        assert start_response.headers is not None
+        assert "X-CORS-Trace" in dict(start_response.headers)
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=["https://example.com"], CORS_TRACE_SECRET="s3cret"
+    )
+    def test_trace_secret_untraced_handled(self):
+        app = RecordingApp()
+        environ = make_environ(headers={"origin": "https://example.com"})
+        CorsWSGIMiddleware(app)(environ, StartResponse())
+        assert environ[HANDLED_KEY] is True
+
+    @override_settings(CORS_URLS_REGEX=r"^/api/")
+    def test_preflight_view_policy(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(
+            make_environ(
+                path="/public/",
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        assert ("access-control-allow-origin", "*") in start_response.headers
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=True,
+        CORS_ALLOW_METHODS=["GET"],
+        CORS_PREFLIGHT_STRICT=True,
+    )
+    def test_preflight_strict(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                    "access-control-request-headers": "Content-Type, X-Other",
+                },
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        headers = dict(start_response.headers)
+        assert headers["access-control-allow-methods"] == "GET"
+        assert headers["access-control-allow-headers"] == "content-type"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    def test_preflight_allow_all_no_vary(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(
+            make_environ(
+                method="OPTIONS",
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-method": "GET",
+                },
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        headers = dict(start_response.headers)
+        assert "Vary" not in headers
+        assert headers["access-control-allow-origin"] == "*"
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True)
+    def test_simple_request_allow_all_no_origin(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp(headers=[("Vary", "Cookie")]))(
+            make_environ(), start_response
+        )
+        assert start_response.headers == [
+            ("Vary", "Cookie"),
+            ("access-control-allow-origin", "*"),
+        ]
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_URLS_REGEX=r"^/api/")
+    def test_url_not_enabled(self):
+        app = RecordingApp()
+        start_response = StartResponse()
+        CorsWSGIMiddleware(app)(
+            make_environ(headers={"origin": "https://example.com"}), start_response
+        )
+        assert start_response.headers == []
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_simple_request_headers_injected(self):
+        app = RecordingApp(headers=[("Vary", "Cookie")])
+        start_response = StartResponse()
+        body = CorsWSGIMiddleware(app)(
+            make_environ(headers={"origin": "https://example.com"}), start_response
+        )
+        assert list(body) == [b"Hello"]
+        assert app.environs[0][HANDLED_KEY] is True
+        assert start_response.headers == [
+            ("Vary", "Cookie, origin"),
+            ("access-control-allow-origin", "https://example.com"),
+        ]
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_streaming_body_passed_through(self):
+        started = False
+
+        def chunks() -> Iterator[bytes]:
+            nonlocal started
+            started = True
+            yield b"chunk"
+
+        body = chunks()
+
+        def app(environ: dict[str, Any], start_response: Any) -> Iterable[bytes]:
+            start_response("200 OK", [])
+            return body
+
+        start_response = StartResponse()
+        result = CorsWSGIMiddleware(app)(
+            make_environ(headers={"origin": "https://example.com"}), start_response
+        )
+        assert result is body
+        assert not started
+        assert start_response.headers == [
+            ("Vary", "origin"),
+            ("access-control-allow-origin", "https://example.com"),
+        ]
+
+    def test_simple_request_no_origin(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(make_environ(), start_response)
+        assert start_response.headers == [("Vary", "origin")]
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_PRIVATE_NETWORK=True)
+    def test_private_network(self):
+        start_response = StartResponse()
+        CorsWSGIMiddleware(RecordingApp())(
+            make_environ(
+                headers={
+                    "origin": "https://example.com",
+                    "access-control-request-private-network": "true",
+                }
+            ),
+            start_response,
+        )
+        assert start_response.headers is not None
+        assert ("access-control-allow-private-network", "true") in (
+            start_response.headers
+        )
+
+    @override_settings(CORS_ALLOWED_ORIGINS=["https://example.com"])
+    def test_django_middleware_skips_handled_requests(self):
+        request = RequestFactory().get("/", headers={"origin": "https://example.com"})
+        request.META[HANDLED_KEY] = True
+        response = CorsMiddleware(lambda request: HttpResponse())(request)
+        assert isinstance(response, HttpResponse)
+        assert "access-control-allow-origin" not in response
+        assert "vary" not in response
+
+
+class AddHeadersTests(SimpleTestCase):
+    def test_no_vary(self):
+        assert add_headers([], []) == [("Vary", "origin")]
+
+    def test_vary_already_origin(self):
+        assert add_headers([("Vary", "Accept, Origin")], []) == [
+            ("Vary", "Accept, Origin")
+        ]
+
+    def test_no_vary_wanted(self):
+        assert add_headers([("Vary", "Cookie")], [], vary=False) == [("Vary", "Cookie")]
+
+    def test_replaces_existing(self):
+        assert add_headers(
+            [("Access-Control-Allow-Origin", "https://a.com")],
+            [("access-control-allow-origin", "*")],
+        ) == [("Vary", "origin"), ("access-control-allow-origin", "*")]
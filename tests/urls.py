@@ -9,4 +9,6 @@ urlpatterns = [
     path("async/", views.async_),
     path("unauthorized/", views.unauthorized),
     path("delete-enabled/", views.delete_enabled_attribute),
+    path("public/", views.public),
+    path("partner/", views.PartnerView.as_view()),
 ]
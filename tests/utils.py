@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Generator
+from collections.abc import Awaitable, Callable, Generator
 from contextlib import contextmanager
 
 from django.test.utils import modify_settings
 
+from corsheaders.instrumentation import CorsEvent
 from corsheaders.signals import check_request_enabled
 
 
@@ -17,9 +18,34 @@ def prepend_middleware(path: str) -> modify_settings:
 
 
 @contextmanager
-def temporary_check_request_handler(handler: Callable[..., bool]) -> Generator[None]:
+def temporary_check_request_handler(
+    handler: Callable[..., bool | Awaitable[bool]],
+) -> Generator[None]:
     check_request_enabled.connect(handler)
     try:
         yield
     finally:
         check_request_enabled.disconnect(handler)
+
+
+_origin_source_rows: list[object] = []
+
+
+def load_origins() -> list[object]:
+    return list(_origin_source_rows)
+
+
+@contextmanager
+def origin_source_rows(rows: list[object]) -> Generator[None]:
+    _origin_source_rows[:] = rows
+    try:
+        yield
+    finally:
+        _origin_source_rows.clear()
+
+
+recorded_events: list[CorsEvent] = []
+
+
+def record_event(event: CorsEvent) -> None:
+    recorded_events.append(event)
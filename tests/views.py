@@ -3,8 +3,11 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from django.http import HttpResponse
+from django.views import View
 from django.views.decorators.http import require_GET
 
+from corsheaders.decorators import cors_policy
+
 
 @require_GET
 def index(request):
@@ -22,3 +25,14 @@ def unauthorized(request):
 def delete_enabled_attribute(request):
     del request._cors_enabled
     return HttpResponse()
+
+
+@cors_policy(allow_all_origins=True, expose_headers=["x-view"])
+def public(request):
+    return HttpResponse("Public")
+
+
+@cors_policy(allowed_origins=["https://partner.example.com"], allow_credentials=True)
+class PartnerView(View):
+    def get(self, request):
+        return HttpResponse("Partner")